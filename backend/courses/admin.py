@@ -1,6 +1,9 @@
 """Admin configuration for courses app."""
 from django.contrib import admin
-from .models import Category, Course, Lesson, Video, Assignment, Quiz, Question, Submission, Progress, Payment
+from .models import (
+    Category, Course, Lesson, Video, Assignment, Quiz, Question, Submission, Progress, Payment,
+    LessonCompletionStat, QuizAttempt, UploadSession, StoredBlob, SimilarSubmissionPair, CoursePackage
+)
 
 
 @admin.register(Category)
@@ -113,7 +116,7 @@ class QuestionInline(admin.TabularInline):
 class AssignmentAdmin(admin.ModelAdmin):
     """Admin configuration for Assignment model."""
     
-    list_display = ['title', 'course', 'deadline', 'max_score', 'created_at']
+    list_display = ['title', 'course', 'deadline', 'max_score', 'closed_at', 'created_at']
     list_filter = ['deadline', 'created_at']
     search_fields = ['title', 'description', 'course__title']
     ordering = ['-deadline']
@@ -123,7 +126,10 @@ class AssignmentAdmin(admin.ModelAdmin):
             'fields': ('course', 'title', 'description')
         }),
         ('Assignment Details', {
-            'fields': ('instructions', 'deadline', 'max_score', 'file_url')
+            'fields': ('instructions', 'deadline', 'max_score', 'test_harness')
+        }),
+        ('Deadline Events', {
+            'fields': ('reminder_sent_at', 'closed_at')
         }),
         ('Metadata', {
             'fields': ('created_at', 'updated_at'),
@@ -131,7 +137,7 @@ class AssignmentAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ['created_at', 'updated_at']
+    readonly_fields = ['reminder_sent_at', 'closed_at', 'created_at', 'updated_at']
 
 
 @admin.register(Quiz)
@@ -149,7 +155,10 @@ class QuizAdmin(admin.ModelAdmin):
             'fields': ('course', 'title', 'description')
         }),
         ('Quiz Settings', {
-            'fields': ('duration', 'passing_score', 'max_attempts')
+            'fields': ('duration', 'passing_score', 'max_attempts', 'window_start')
+        }),
+        ('Question Bank', {
+            'fields': ('sample_size', 'stratify_by')
         }),
         ('Metadata', {
             'fields': ('created_at', 'updated_at'),
@@ -174,7 +183,7 @@ class QuestionAdmin(admin.ModelAdmin):
             'fields': ('quiz', 'order')
         }),
         ('Question', {
-            'fields': ('question_text', 'points')
+            'fields': ('question_text', 'points', 'tag')
         }),
         ('Options', {
             'fields': ('option_a', 'option_b', 'option_c', 'option_d', 'correct_answer')
@@ -193,7 +202,7 @@ class SubmissionAdmin(admin.ModelAdmin):
     """Admin configuration for Submission model."""
     
     list_display = ['assignment', 'student', 'status', 'grade', 'submission_date', 'graded_at']
-    list_filter = ['status', 'submission_date', 'graded_at']
+    list_filter = ['status', 'autograde_status', 'submission_date', 'graded_at']
     search_fields = ['assignment__title', 'student__email', 'student__first_name', 'student__last_name']
     ordering = ['-submission_date']
     
@@ -202,7 +211,7 @@ class SubmissionAdmin(admin.ModelAdmin):
             'fields': ('assignment', 'student', 'file_url', 'status')
         }),
         ('Grading', {
-            'fields': ('grade', 'feedback', 'graded_at')
+            'fields': ('grade', 'feedback', 'graded_at', 'autograde_status')
         }),
         ('Metadata', {
             'fields': ('submission_date', 'updated_at'),
@@ -238,6 +247,22 @@ class ProgressAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
 
 
+@admin.register(QuizAttempt)
+class QuizAttemptAdmin(admin.ModelAdmin):
+    """Admin configuration for QuizAttempt model."""
+    
+    list_display = ['quiz', 'enrollment', 'attempt_number', 'status', 'score', 'percentage', 'submitted_at']
+    list_filter = ['status', 'submitted_at']
+    search_fields = ['enrollment__student__email', 'quiz__title']
+    ordering = ['-started_at']
+    readonly_fields = [
+        'enrollment', 'quiz', 'attempt_number', 'key_version', 'question_count',
+        'score', 'total_points', 'percentage', 'status', 'started_at', 'submitted_at',
+        'graded_at'
+    ]
+    exclude = ['answers', 'answered']
+
+
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
     """Admin configuration for Payment model."""
@@ -261,3 +286,60 @@ class PaymentAdmin(admin.ModelAdmin):
     )
     
     readonly_fields = ['created_at', 'updated_at']
+
+
+@admin.register(LessonCompletionStat)
+class LessonCompletionStatAdmin(admin.ModelAdmin):
+    """Admin configuration for LessonCompletionStat model."""
+    
+    list_display = ['lesson', 'course', 'completed_count', 'updated_at']
+    search_fields = ['lesson__title', 'course__title']
+    ordering = ['course', 'lesson__order']
+    readonly_fields = ['course', 'lesson', 'completed_count', 'updated_at']
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    """Admin configuration for UploadSession model."""
+    
+    list_display = ['filename', 'user', 'target', 'offset', 'size', 'status', 'expires_at']
+    list_filter = ['target', 'status']
+    search_fields = ['filename', 'user__email']
+    ordering = ['-created_at']
+    readonly_fields = [
+        'user', 'target', 'assignment', 'lesson', 'filename', 'size', 'offset',
+        'created_at', 'updated_at', 'completed_at'
+    ]
+
+
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    """Admin configuration for StoredBlob model."""
+    
+    list_display = ['name', 'size', 'ref_count', 'updated_at']
+    list_filter = ['ref_count']
+    search_fields = ['name']
+    ordering = ['-updated_at']
+    readonly_fields = ['name', 'size', 'ref_count', 'created_at', 'updated_at']
+
+
+@admin.register(SimilarSubmissionPair)
+class SimilarSubmissionPairAdmin(admin.ModelAdmin):
+    """Admin configuration for SimilarSubmissionPair model."""
+    
+    list_display = ['assignment', 'first', 'second', 'similarity', 'detected_at']
+    search_fields = [
+        'assignment__title', 'first__student__email', 'second__student__email'
+    ]
+    ordering = ['-similarity']
+    readonly_fields = ['assignment', 'first', 'second', 'similarity', 'detected_at']
+
+
+@admin.register(CoursePackage)
+class CoursePackageAdmin(admin.ModelAdmin):
+    """Admin configuration for CoursePackage model."""
+    
+    list_display = ['course', 'version', 'size', 'built_at']
+    search_fields = ['course__title']
+    ordering = ['-built_at']
+    readonly_fields = ['course', 'version', 'file_name', 'size', 'built_at']
@@ -0,0 +1,97 @@
+"""Streamed ZIP archives of assignment submissions.
+
+The archive is produced on the fly: `zipfile` writes into a sink that is
+not seekable, which makes it emit each entry with a trailing data
+descriptor instead of seeking back to patch the header. Every chunk read
+from a submission file is written to its entry and the bytes produced so
+far are handed to the response straight away, so at most one chunk (plus
+the deflate window) is held in memory. Entries are forced to zip64 so
+files and archives over 4GB stay valid.
+"""
+import os
+import re
+import zipfile
+
+from django.utils import timezone
+
+from .models import Submission
+
+ARCHIVE_CHUNK_SIZE = 64 * 1024
+
+
+class _Sink:
+    """Write-only buffer drained after every chunk; deliberately has no tell/seek."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _safe(value):
+    return re.sub(r'[^\w@.+-]+', '_', value).strip('_') or 'student'
+
+
+def entry_name(submission):
+    """Archive name for a submission, e.g. `Doe_Jane_jane@example.com_LATE.pdf`."""
+    student = submission.student
+    extension = os.path.splitext(submission.file_url.name)[1].lower()
+    parts = [_safe(student.last_name), _safe(student.first_name), _safe(student.email)]
+    if submission.status == 'LATE':
+        parts.append('LATE')
+    return '_'.join(parts) + extension
+
+
+def _zip_date(value):
+    # ZIP timestamps cannot predate 1980
+    return max(timezone.localtime(value).timetuple()[:6], (1980, 1, 1, 0, 0, 0))
+
+
+def stream_submissions_zip(assignment, compress=False):
+    """Yield the bytes of a ZIP archive holding every submission file of an assignment."""
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    submissions = Submission.objects.filter(
+        assignment=assignment
+    ).exclude(file_url='').select_related('student').order_by(
+        'student__last_name', 'student__first_name', 'id'
+    )
+
+    sink = _Sink()
+    missing = []
+    with zipfile.ZipFile(sink, 'w', compression=compression, allowZip64=True) as archive:
+        for submission in submissions.iterator(chunk_size=500):
+            name = entry_name(submission)
+            try:
+                source = submission.file_url.storage.open(submission.file_url.name, 'rb')
+            except FileNotFoundError:
+                missing.append(name)
+                continue
+
+            info = zipfile.ZipInfo(name, date_time=_zip_date(submission.submission_date))
+            info.compress_type = compression
+            with source, archive.open(info, 'w', force_zip64=True) as entry:
+                for chunk in iter(lambda: source.read(ARCHIVE_CHUNK_SIZE), b''):
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+
+        if missing:
+            archive.writestr(
+                'MISSING.txt',
+                'These submissions have no file in storage:\n' + '\n'.join(missing) + '\n'
+            )
+
+    # Trailing data descriptor, central directory and end records
+    yield sink.drain()
@@ -0,0 +1,64 @@
+"""Quiz attempt bookkeeping.
+
+Attempt limits are enforced with a per-(enrollment, quiz) counter row that
+is incremented with a conditional UPDATE, so concurrent submissions cannot
+push a student past `Quiz.max_attempts`. An attempt discarded before it
+was submitted gives its slot back with `release_attempt`.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import QuizAttemptCounter
+
+
+def get_attempt_count(enrollment_id, quiz_id):
+    """Return the number of attempts used by an enrollment on a quiz."""
+    count = QuizAttemptCounter.objects.filter(
+        enrollment_id=enrollment_id,
+        quiz_id=quiz_id
+    ).values_list('count', flat=True).first()
+    return count or 0
+
+
+def reserve_attempt(enrollment_id, quiz):
+    """Claim the next attempt number, or return None if none are left.
+
+    Must be called inside a transaction: the counter row stays locked until
+    the attempt is committed, and rolling back releases the attempt.
+    """
+    counters = QuizAttemptCounter.objects.filter(
+        enrollment_id=enrollment_id,
+        quiz_id=quiz.id
+    )
+    if not counters.exists():
+        try:
+            with transaction.atomic():
+                QuizAttemptCounter.objects.create(enrollment_id=enrollment_id, quiz_id=quiz.id)
+        except IntegrityError:
+            pass  # Created concurrently
+
+    claimed = counters.filter(count__lt=quiz.max_attempts).update(
+        count=F('count') + 1,
+        updated_at=timezone.now()
+    )
+    if not claimed:
+        return None
+    return counters.values_list('count', flat=True).get()
+
+
+def release_attempt(attempt):
+    """Give back the slot of an attempt that is being discarded unsubmitted.
+
+    Must be called in the transaction that deletes the attempt. Only the
+    latest attempt's slot can be returned: the counter is decremented only
+    while it still equals that attempt's number.
+    """
+    return QuizAttemptCounter.objects.filter(
+        enrollment_id=attempt.enrollment_id,
+        quiz_id=attempt.quiz_id,
+        count=attempt.attempt_number
+    ).update(
+        count=F('count') - 1,
+        updated_at=timezone.now()
+    ) > 0
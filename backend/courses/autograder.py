@@ -0,0 +1,163 @@
+"""Automatic grading of code submissions against an assignment's test harness.
+
+A submission to an assignment that has a `test_harness` is queued
+(`autograde_status` QUEUED) when it is uploaded. A worker claims a batch
+in a short transaction, marking it RUNNING, runs it on a bounded process
+pool (see `sandbox`) and writes grades and feedback back with
+`bulk_update`, AUTOGRADER_WRITE_BATCH_SIZE rows at a time as results come
+in. Results for a submission that was replaced while it ran are dropped;
+the new file is already queued. Rows left RUNNING by a worker that died
+are queued again after AUTOGRADER_STALE_SECONDS.
+"""
+import os
+from concurrent.futures import as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Assignment, Submission
+from .sandbox import isolation_error, run_submission
+
+
+def pool_size(workers=None):
+    return workers or settings.AUTOGRADER_WORKERS or os.cpu_count() or 1
+
+
+def limits():
+    """Sandbox limits for one run, from settings."""
+    return {
+        'timeout': settings.AUTOGRADER_TIMEOUT_SECONDS,
+        'memory_bytes': settings.AUTOGRADER_MEMORY_MB * 1024 * 1024,
+        'file_bytes': settings.AUTOGRADER_FILE_SIZE_MB * 1024 * 1024,
+        'max_processes': settings.AUTOGRADER_MAX_PROCESSES,
+        'uid': settings.AUTOGRADER_SANDBOX_UID,
+        'gid': settings.AUTOGRADER_SANDBOX_GID,
+    }
+
+
+def sandbox_error():
+    """Why runs cannot be sandboxed here, or None if they can."""
+    return isolation_error(settings.AUTOGRADER_SANDBOX_UID)
+
+
+def queue_assignment(assignment):
+    """Queue every submission of an assignment for (re)grading; returns how many."""
+    return Submission.objects.filter(
+        assignment=assignment
+    ).exclude(file_url='').exclude(autograde_status='RUNNING').update(
+        autograde_status='QUEUED',
+        updated_at=timezone.now()
+    )
+
+
+def requeue_stale(now=None):
+    """Put back runs whose worker stopped before writing a result."""
+    now = now or timezone.now()
+    return Submission.objects.filter(
+        autograde_status='RUNNING',
+        updated_at__lt=now - timedelta(seconds=settings.AUTOGRADER_STALE_SECONDS)
+    ).update(autograde_status='QUEUED', updated_at=now)
+
+
+def _claim(batch_size):
+    """Mark a batch of queued submissions RUNNING; returns (id, file name, assignment id) rows."""
+    with transaction.atomic():
+        queued = Submission.objects.filter(autograde_status='QUEUED').order_by('submission_date')
+        if connection.features.has_select_for_update_skip_locked:
+            # Lets several workers drain the queue without waiting on each other
+            queued = queued.select_for_update(skip_locked=True)
+        else:
+            queued = queued.select_for_update()
+        rows = list(queued.values_list('id', 'file_url', 'assignment_id')[:batch_size])
+        if rows:
+            Submission.objects.filter(id__in=[row[0] for row in rows]).update(
+                autograde_status='RUNNING',
+                updated_at=timezone.now()
+            )
+    return rows
+
+
+def _write_results(results, max_scores):
+    """Store a batch of sandbox results; returns the number of submissions written."""
+    now = timezone.now()
+    graded = []
+    failed = []
+    with transaction.atomic():
+        # Only rows still running the file that was graded take the result
+        current = set(Submission.objects.select_for_update().filter(
+            id__in=[key[0] for key, *_ in results],
+            autograde_status='RUNNING'
+        ).values_list('id', 'file_url'))
+
+        for (submission_id, name), score, feedback, error in results:
+            if (submission_id, name) not in current:
+                continue
+            if error:
+                failed.append(Submission(
+                    id=submission_id,
+                    feedback=f'Automatic grading failed: {error}',
+                    autograde_status='FAILED',
+                    updated_at=now
+                ))
+            else:
+                graded.append(Submission(
+                    id=submission_id,
+                    grade=round(score * max_scores[submission_id]),
+                    feedback=feedback,
+                    status='GRADED',
+                    graded_at=now,
+                    autograde_status='DONE',
+                    updated_at=now
+                ))
+
+        Submission.objects.bulk_update(
+            graded,
+            ['grade', 'feedback', 'status', 'graded_at', 'autograde_status', 'updated_at']
+        )
+        # Failed runs keep their PENDING/LATE status for a human to grade
+        Submission.objects.bulk_update(failed, ['feedback', 'autograde_status', 'updated_at'])
+    return len(graded) + len(failed)
+
+
+def grade_batch(pool, batch_size=None):
+    """Claim one batch of queued submissions and grade it on `pool`.
+
+    Returns the number of submissions taken off the queue.
+    """
+    rows = _claim(batch_size or settings.AUTOGRADER_BATCH_SIZE)
+    if not rows:
+        return 0
+
+    assignments = {
+        assignment.id: assignment
+        for assignment in Assignment.objects.filter(
+            id__in={assignment_id for _, _, assignment_id in rows}
+        ).only('id', 'test_harness', 'max_score')
+    }
+    storage = Submission._meta.get_field('file_url').storage
+    sandbox_limits = limits()
+    max_scores = {}
+    results = []
+    futures = []
+    for submission_id, name, assignment_id in rows:
+        assignment = assignments[assignment_id]
+        max_scores[submission_id] = assignment.max_score
+        key = (submission_id, name)
+        if not assignment.test_harness:
+            results.append((key, None, '', 'the assignment has no test harness'))
+            continue
+        futures.append(pool.submit(
+            run_submission,
+            (key, storage.path(name), assignment.test_harness.path, sandbox_limits)
+        ))
+
+    for future in as_completed(futures):
+        results.append(future.result())
+        if len(results) >= settings.AUTOGRADER_WRITE_BATCH_SIZE:
+            _write_results(results, max_scores)
+            results = []
+    if results:
+        _write_results(results, max_scores)
+    return len(rows)
@@ -0,0 +1,254 @@
+"""In-process scheduler for assignment deadline events.
+
+Two events hang off every assignment deadline: a reminder to enrolled
+students who have not submitted yet, sent ASSIGNMENT_REMINDER_LEAD_HOURS
+before the deadline, and the close at the deadline itself, which marks
+submissions changed after the deadline as late and sends the instructor a
+summary.
+
+Upcoming events are kept in a min-heap ordered by fire time. The heap only
+holds one window (DEADLINE_SCHEDULER_WINDOW_SECONDS) of events at a time;
+each window is loaded with one range query on the `deadline` index, never
+a scan of the whole table. Assignments saved in this process push their
+new events onto the heap straight away. Saves made in other processes are
+picked up when the next window loads.
+
+Every event is claimed with a conditional UPDATE on `reminder_sent_at` /
+`closed_at` that also matches the deadline it was scheduled for, so stale
+heap entries (the deadline has since moved) and schedulers running in
+several processes never send anything twice.
+"""
+import heapq
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Assignment, Submission
+
+logger = logging.getLogger(__name__)
+
+REMIND = 'REMIND'
+CLOSE = 'CLOSE'
+
+
+def _reminder_lead():
+    return timedelta(hours=settings.ASSIGNMENT_REMINDER_LEAD_HOURS)
+
+
+def assignment_events(deadline, reminder_sent_at, closed_at):
+    """Return the (fire_at, kind) events still pending for an assignment."""
+    events = []
+    if reminder_sent_at is None:
+        events.append((deadline - _reminder_lead(), REMIND))
+    if closed_at is None:
+        events.append((deadline, CLOSE))
+    return events
+
+
+def _claim(assignment_id, deadline, field, now, **conditions):
+    """Atomically mark an event as handled; False if it is stale or already taken."""
+    return Assignment.objects.filter(
+        id=assignment_id,
+        deadline=deadline,
+        **{f'{field}__isnull': True},
+        **conditions
+    ).update(**{field: now}) == 1
+
+
+def _send_batched(messages):
+    """Send messages over one connection, ASSIGNMENT_REMINDER_BATCH_SIZE at a time."""
+    batch_size = settings.ASSIGNMENT_REMINDER_BATCH_SIZE
+    connection = get_connection(fail_silently=True)
+    sent = 0
+    for start in range(0, len(messages), batch_size):
+        sent += connection.send_messages(messages[start:start + batch_size]) or 0
+    return sent
+
+
+def send_reminders(assignment_id, deadline, now=None):
+    """Remind enrolled students without a submission; returns the number of emails sent."""
+    from enrollments.models import Enrollment
+
+    now = now or timezone.now()
+    if not _claim(assignment_id, deadline, 'reminder_sent_at', now, deadline__gt=now):
+        return 0
+
+    assignment = Assignment.objects.select_related('course').get(id=assignment_id)
+    # Anti-join: enrolled students with no submission for this assignment
+    missing = Enrollment.objects.filter(course_id=assignment.course_id).filter(
+        ~Exists(Submission.objects.filter(
+            assignment_id=assignment_id,
+            student_id=OuterRef('student_id')
+        ))
+    ).values_list('student__email', 'student__first_name')
+
+    due = timezone.localtime(assignment.deadline).strftime('%Y-%m-%d %H:%M %Z')
+    messages = [
+        EmailMessage(
+            subject=f'Assignment Due Soon - {assignment.title}',
+            body=f'Hi {first_name},\n\n'
+                 f'Your assignment "{assignment.title}" for "{assignment.course.title}" '
+                 f'is due on {due} and we have not received your submission yet.',
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email],
+        )
+        for email, first_name in missing.iterator(chunk_size=1000)
+    ]
+    return _send_batched(messages)
+
+
+def close_assignment(assignment_id, deadline, now=None):
+    """Close an assignment at its deadline; returns the number of submissions marked late.
+
+    Pending submissions last changed after the deadline (e.g. because the
+    deadline was moved earlier) become LATE.
+    """
+    from enrollments.models import Enrollment
+
+    now = now or timezone.now()
+    with transaction.atomic():
+        if not _claim(assignment_id, deadline, 'closed_at', now, deadline__lte=now):
+            return 0
+        late = Submission.objects.filter(
+            assignment_id=assignment_id,
+            status='PENDING',
+            updated_at__gt=deadline
+        ).update(status='LATE')
+
+    assignment = Assignment.objects.select_related('course__instructor').get(id=assignment_id)
+    submitted = Submission.objects.filter(assignment_id=assignment_id).count()
+    enrolled = Enrollment.objects.filter(course_id=assignment.course_id).count()
+    _send_batched([EmailMessage(
+        subject=f'Assignment Closed - {assignment.title}',
+        body=f'The deadline for "{assignment.title}" in "{assignment.course.title}" has passed.\n\n'
+             f'Submissions: {submitted} of {enrolled} enrolled students\n'
+             f'Late submissions marked: {late}',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[assignment.course.instructor.email],
+    )])
+    return late
+
+
+HANDLERS = {
+    REMIND: send_reminders,
+    CLOSE: close_assignment,
+}
+
+
+class DeadlineScheduler:
+    """Min-heap of upcoming deadline events, fired by a single daemon thread."""
+
+    def __init__(self):
+        self._heap = []
+        self._condition = threading.Condition()
+        self._window_end = None
+        self._thread = None
+        self._stopping = False
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._condition:
+            if self.running:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self.run, name='deadline-scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def schedule(self, assignment_id, deadline, reminder_sent_at=None, closed_at=None):
+        """Push an assignment's pending events if they fall in the loaded window."""
+        with self._condition:
+            if self._window_end is None:
+                return
+            for fire_at, kind in assignment_events(deadline, reminder_sent_at, closed_at):
+                if fire_at <= self._window_end:
+                    heapq.heappush(self._heap, (fire_at, kind, assignment_id, deadline))
+            self._condition.notify()
+
+    def _load_window(self, now):
+        """Replace the heap with the events firing up to the end of the next window.
+
+        The first window also catches up on events missed while no
+        scheduler was running, up to DEADLINE_SCHEDULER_CATCHUP_HOURS back.
+        """
+        start = self._window_end or now - timedelta(hours=settings.DEADLINE_SCHEDULER_CATCHUP_HOURS)
+        end = now + timedelta(seconds=settings.DEADLINE_SCHEDULER_WINDOW_SECONDS)
+        # Reminders fire before their deadline, so the range reaches one lead further
+        rows = Assignment.objects.filter(
+            Q(reminder_sent_at__isnull=True) | Q(closed_at__isnull=True),
+            deadline__gt=start,
+            deadline__lte=end + _reminder_lead()
+        ).values_list('id', 'deadline', 'reminder_sent_at', 'closed_at')
+
+        heap = []
+        for assignment_id, deadline, reminder_sent_at, closed_at in rows:
+            for fire_at, kind in assignment_events(deadline, reminder_sent_at, closed_at):
+                # Reminders already due are still worth sending while the deadline is ahead
+                if fire_at <= end and (fire_at > start or deadline > now):
+                    heap.append((fire_at, kind, assignment_id, deadline))
+
+        with self._condition:
+            # Keep events pushed by signals that are due before the new window
+            heap.extend(entry for entry in self._heap if entry[0] <= end)
+            heapq.heapify(heap)
+            self._heap = heap
+            self._window_end = end
+
+    def _next_due(self):
+        """Wait for the next due event; None when stopping or the window is used up."""
+        with self._condition:
+            while not self._stopping:
+                now = timezone.now()
+                if self._heap and self._heap[0][0] <= now:
+                    return heapq.heappop(self._heap)
+                if now >= self._window_end:
+                    return None
+                wake_at = min(self._heap[0][0], self._window_end) if self._heap else self._window_end
+                self._condition.wait((wake_at - now).total_seconds())
+            return None
+
+    def run(self):
+        """Fire events until stopped; also usable in the foreground."""
+        while not self._stopping:
+            try:
+                close_old_connections()
+                self._load_window(timezone.now())
+                while True:
+                    entry = self._next_due()
+                    if entry is None:
+                        break
+                    fire_at, kind, assignment_id, deadline = entry
+                    close_old_connections()
+                    try:
+                        HANDLERS[kind](assignment_id, deadline)
+                    except Exception:
+                        logger.exception('Deadline event %s for assignment %s failed', kind, assignment_id)
+            except Exception:
+                logger.exception('Deadline scheduler failed to load events, retrying')
+                with self._condition:
+                    self._condition.wait(settings.DEADLINE_SCHEDULER_WINDOW_SECONDS)
+        close_old_connections()
+
+
+scheduler = DeadlineScheduler()
+
+
+def start_scheduler():
+    """Start the shared scheduler thread when DEADLINE_SCHEDULER_AUTOSTART is on."""
+    if settings.DEADLINE_SCHEDULER_AUTOSTART:
+        scheduler.start()
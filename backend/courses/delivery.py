@@ -0,0 +1,44 @@
+"""Cached, pre-encoded quiz delivery payloads.
+
+The answer-free quiz detail payload is the same for every student, so it
+is rendered to JSON once per quiz content version and cached as bytes.
+Per-user fields are spliced onto the end of the cached object without
+decoding it again.
+"""
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+QUIZ_PAYLOAD_CACHE_PREFIX = 'quiz_payload'
+
+
+def _cache_key(quiz_id):
+    return f'{QUIZ_PAYLOAD_CACHE_PREFIX}:{quiz_id}'
+
+
+def get_quiz_payload(quiz):
+    """Return the encoded answer-free payload for a quiz."""
+    from .serializers import QuizDetailSerializer
+
+    payload = cache.get(_cache_key(quiz.id))
+    if payload is None:
+        data = QuizDetailSerializer(quiz).data
+        data.pop('has_completed', None)
+        payload = JSONRenderer().render(data)
+        cache.set(_cache_key(quiz.id), payload, settings.QUIZ_PAYLOAD_CACHE_TIMEOUT)
+    return payload
+
+
+def invalidate_quiz_payload(quiz_id):
+    """Drop the cached payload after the quiz or its questions change."""
+    cache.delete(_cache_key(quiz_id))
+
+
+def merge_user_fields(payload, **fields):
+    """Append per-user fields to an encoded JSON object."""
+    extra = json.dumps(fields, separators=(',', ':')).encode()
+    if payload.endswith(b'{}'):
+        return extra
+    return payload[:-1] + b',' + extra[1:]
@@ -0,0 +1,237 @@
+"""Scheduled exam windows.
+
+A quiz with a `window_start` is taken by the whole class within `duration`
+minutes of that time, so every student starts and submits in the same
+burst. Before the window opens the answer key, the quiz payload and the
+course's enrollment map are pre-warmed into the cache, submissions are
+written to `QuizAttempt` as QUEUED and acknowledged immediately, and a
+worker grades the queue in batches: one answer key per quiz, one
+`bulk_update` for the attempts, batched `Progress` upserts and a single
+enrollment progress recompute per enrollment.
+
+If the quiz is edited between submission and grading, the answers are
+graded against the current key for the questions that still exist,
+matched by the question ids stored with the attempt. Such an attempt
+keeps its original key version, so item analysis and the answer review,
+which need the exact key, leave it out. An attempt with nothing left to
+grade gets its attempt back and is marked FAILED with its answers kept.
+"""
+import logging
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .attempts import release_attempt
+from .delivery import get_quiz_payload
+from .grading import get_answer_key, grade, unpack_answers
+from .item_analysis import record_attempt
+from .models import Quiz, QuizAttempt
+from .progress import record_quiz_progress_batch, update_enrollment_progress
+from .sampling import select_questions
+
+logger = logging.getLogger(__name__)
+
+ENROLLMENT_CACHE_PREFIX = 'exam_enrollments'
+
+
+def _enrollment_cache_key(course_id):
+    return f'{ENROLLMENT_CACHE_PREFIX}:{course_id}'
+
+
+def is_exam(quiz):
+    return quiz.window_start is not None
+
+
+def window_end(quiz):
+    return quiz.window_start + timedelta(minutes=quiz.duration)
+
+
+def exam_window_error(quiz, now=None):
+    """Return an error message if the quiz's exam window is not open, else None."""
+    if not is_exam(quiz):
+        return None
+
+    now = now or timezone.now()
+    if now < quiz.window_start:
+        return f'This quiz opens at {quiz.window_start.isoformat()}'
+    if now > window_end(quiz) + timedelta(seconds=settings.QUIZ_SUBMISSION_GRACE_SECONDS):
+        return 'The exam window for this quiz has closed'
+    return None
+
+
+def attempt_deadline(quiz, attempt):
+    """Latest accepted submission time for an attempt, grace included."""
+    deadline = attempt.started_at + timedelta(minutes=quiz.duration)
+    if is_exam(quiz):
+        deadline = min(deadline, window_end(quiz))
+    return deadline + timedelta(seconds=settings.QUIZ_SUBMISSION_GRACE_SECONDS)
+
+
+def warm_enrollments(course_id, timeout):
+    """Cache the course's student id -> enrollment id map."""
+    from enrollments.models import Enrollment
+
+    enrollments = {
+        str(student_id): enrollment_id
+        for student_id, enrollment_id in Enrollment.objects.filter(
+            course_id=course_id
+        ).values_list('student_id', 'id').iterator()
+    }
+    cache.set(_enrollment_cache_key(course_id), enrollments, timeout)
+    return enrollments
+
+
+def invalidate_enrollments(course_id):
+    cache.delete(_enrollment_cache_key(course_id))
+
+
+def get_enrollment_id(student_id, course_id):
+    """Look up an enrollment id, using the pre-warmed map when there is one."""
+    from enrollments.models import Enrollment
+
+    enrollments = cache.get(_enrollment_cache_key(course_id))
+    if enrollments is not None and str(student_id) in enrollments:
+        return enrollments[str(student_id)]
+
+    # Students who enrolled after the map was warmed
+    return Enrollment.objects.filter(
+        student_id=student_id,
+        course_id=course_id
+    ).values_list('id', flat=True).first()
+
+
+def prewarm_exam_windows(now=None):
+    """Warm caches for exam windows opening soon or currently open.
+
+    Returns the quizzes that were warmed.
+    """
+    now = now or timezone.now()
+    lead = timedelta(minutes=settings.QUIZ_PREWARM_LEAD_MINUTES)
+    quizzes = [
+        quiz for quiz in Quiz.objects.select_related('course').filter(
+            window_start__lte=now + lead,
+            # Durations are in minutes, so older windows are long closed
+            window_start__gte=now - timedelta(days=1)
+        )
+        if window_end(quiz) >= now
+    ]
+
+    for quiz in quizzes:
+        get_answer_key(quiz.id)
+        get_quiz_payload(quiz)
+        # Keep the map until the last submission of the window is accepted
+        timeout = (window_end(quiz) - now).total_seconds() + lead.total_seconds()
+        warm_enrollments(quiz.course_id, int(timeout))
+
+    return quizzes
+
+
+def _claim(batch_size):
+    """Lock a batch of queued attempts for grading."""
+    attempts = QuizAttempt.objects.filter(status='QUEUED').order_by('submitted_at')
+    if connection.features.has_select_for_update_skip_locked:
+        # Lets several workers drain the queue without waiting on each other
+        attempts = attempts.select_for_update(skip_locked=True)
+    else:
+        attempts = attempts.select_for_update()
+    return list(attempts[:batch_size])
+
+
+def _realign(key, attempt):
+    """(attempt key, codes) for a queued attempt's answers under a newer key.
+
+    Returns (None, None) if none of its questions are left in `key`.
+    """
+    question_ids = attempt.question_ids.split(',') if attempt.question_ids else []
+    codes = unpack_answers(attempt.answers, attempt.answered, len(question_ids))
+    kept = sorted(
+        (key.index[question_id], code)
+        for question_id, code in zip(question_ids, codes)
+        if question_id in key.index
+    )
+    if not kept:
+        return None, None
+    positions = [position for position, _ in kept]
+    return key.subset(positions), np.array([code for _, code in kept], dtype=np.uint8)
+
+
+def grade_queued_attempts(batch_size=None):
+    """Grade one batch of queued attempts.
+
+    Returns the number of attempts taken off the queue.
+    """
+    from enrollments.models import Enrollment
+
+    batch_size = batch_size or settings.QUIZ_GRADING_BATCH_SIZE
+    graded = []
+
+    with transaction.atomic():
+        attempts = _claim(batch_size)
+        if not attempts:
+            return 0
+
+        now = timezone.now()
+        keys = {}
+        progress = {}
+        for attempt in attempts:
+            if attempt.quiz_id not in keys:
+                keys[attempt.quiz_id] = get_answer_key(attempt.quiz_id)
+            key = keys[attempt.quiz_id]
+            attempt.graded_at = now
+
+            if attempt.key_version != key.version:
+                # The quiz was edited after the answers were queued
+                attempt_key, codes = _realign(key, attempt)
+                if attempt_key is None:
+                    attempt.status = 'FAILED'
+                    release_attempt(attempt)
+                    logger.warning(
+                        'Queued attempt %s of quiz %s has no questions left to grade after a quiz edit; '
+                        'the attempt was given back', attempt.id, attempt.quiz_id
+                    )
+                    continue
+                positions = None
+            else:
+                positions = select_questions(key, attempt.question_count, attempt.seed)
+                attempt_key = key if len(positions) == len(key) else key.subset(positions)
+                codes = unpack_answers(attempt.answers, attempt.answered, attempt.question_count)
+            earned_points, _, _ = grade(attempt_key, codes)
+            total_points = attempt_key.total_points
+            score_percentage = (earned_points / total_points * 100) if total_points > 0 else 0
+
+            attempt.score = earned_points
+            attempt.total_points = total_points
+            attempt.percentage = round(score_percentage, 2)
+            attempt.status = 'GRADED'
+            if positions is not None:
+                graded.append((attempt, key, positions, codes))
+
+            # Several attempts of one enrollment collapse into its best score
+            pair = (attempt.enrollment_id, attempt.quiz_id)
+            best, number = progress.get(pair, (score_percentage, attempt.attempt_number))
+            progress[pair] = (max(best, score_percentage), max(number, attempt.attempt_number))
+
+        QuizAttempt.objects.bulk_update(
+            attempts,
+            ['score', 'total_points', 'percentage', 'status', 'graded_at'],
+            batch_size=500
+        )
+        record_quiz_progress_batch(progress)
+
+    enrollment_ids = {enrollment_id for enrollment_id, _ in progress}
+    for enrollment in Enrollment.objects.select_related('course').filter(id__in=enrollment_ids):
+        update_enrollment_progress(enrollment)
+
+    for attempt, key, positions, codes in graded:
+        record_attempt(
+            attempt.quiz_id, key, positions, codes,
+            attempt.score / attempt.total_points if attempt.total_points else 0.0,
+            attempt.graded_at
+        )
+
+    return len(attempts)
+
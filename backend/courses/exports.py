@@ -0,0 +1,211 @@
+"""Streaming CSV/NDJSON exports for gradebooks and enrollment rosters.
+
+Rows are produced lazily and written to a `StreamingHttpResponse` as they
+are generated, so memory use does not depend on the number of rows. Rows
+are read with keyset pagination (`WHERE key > last ORDER BY key LIMIT n`)
+rather than one large cursor: the MySQL driver buffers the full result of
+a query client-side even under `.iterator()`, while keyset pages keep
+both the client and the database working on `EXPORT_CHUNK_SIZE` rows at
+a time. Each page is still read with `.iterator(chunk_size=...)` so no
+model cache is built.
+
+The gradebook is a merge join of three streams sorted by student:
+the course's enrollments, its assignment submissions and its quiz
+progress rows. Only the column headers (assignments and quizzes) are held
+in memory.
+"""
+import csv
+import json
+from decimal import Decimal
+
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+
+from .models import Assignment, Progress, Quiz, Submission
+
+EXPORT_CHUNK_SIZE = 2000
+FLUSH_EVERY = 500
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def keyset_rows(queryset, fields, key, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield `values_list(*fields)` rows ordered by the `key` columns, one page at a time.
+
+    `key` must be unique as a whole, and its columns must come first in
+    `fields`.
+    """
+    queryset = queryset.order_by(*key)
+    last = None
+    while True:
+        page = queryset
+        if last is not None:
+            # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y)
+            condition = Q()
+            for position in range(len(key)):
+                term = Q(**{f'{key[position]}__gt': last[position]})
+                for earlier in range(position):
+                    term &= Q(**{key[earlier]: last[earlier]})
+                condition |= term
+            page = page.filter(condition)
+
+        count = 0
+        for row in page.values_list(*fields)[:chunk_size].iterator(chunk_size=chunk_size):
+            count += 1
+            last = row
+            yield row
+        if count < chunk_size:
+            return
+
+
+class _Echo:
+    """File-like object that hands back what `csv.writer` writes to it."""
+
+    def write(self, value):
+        return value
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _render(header, rows, fmt):
+    """Encode rows (tuples aligned with `header`) as CSV or NDJSON, in batches."""
+    writer = csv.writer(_Echo())
+    buffer = []
+    if fmt == 'csv':
+        buffer.append(writer.writerow(header))
+
+    for row in rows:
+        if fmt == 'csv':
+            buffer.append(writer.writerow(['' if value is None else value for value in row]))
+        else:
+            buffer.append(json.dumps(dict(zip(header, row)), default=_json_default) + '\n')
+        if len(buffer) >= FLUSH_EVERY:
+            yield ''.join(buffer)
+            buffer.clear()
+
+    if buffer:
+        yield ''.join(buffer)
+
+
+def streaming_export(header, rows, fmt, filename):
+    """Build the streaming response for an export."""
+    response = StreamingHttpResponse(
+        _render(header, rows, fmt),
+        content_type=FORMATS[fmt]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+def _take(stream, pending, student_id):
+    """Collect the rows of `stream` belonging to `student_id`.
+
+    `pending` holds the one row read ahead; students that only appear in
+    the side stream (e.g. submissions without an enrollment) are skipped.
+    Ordering matches the database: UUIDs compare the same way in Python.
+    """
+    rows = []
+    row = pending[0]
+    while row is not None and row[0] < student_id:
+        row = next(stream, None)
+    while row is not None and row[0] == student_id:
+        rows.append(row)
+        row = next(stream, None)
+    pending[0] = row
+    return rows
+
+
+def gradebook_rows(course):
+    """Return (header, rows) for a course gradebook.
+
+    One row per enrolled student with their progress, a grade column per
+    assignment and a best-score column per quiz.
+    """
+    from enrollments.models import Enrollment
+
+    assignments = list(
+        Assignment.objects.filter(course=course).order_by('deadline').values_list('id', 'title')
+    )
+    quizzes = list(
+        Quiz.objects.filter(course=course).order_by('created_at').values_list('id', 'title')
+    )
+    assignment_columns = {assignment_id: i for i, (assignment_id, _) in enumerate(assignments)}
+    quiz_columns = {quiz_id: i for i, (quiz_id, _) in enumerate(quizzes)}
+
+    header = [
+        'student_id', 'email', 'first_name', 'last_name', 'enrolled_at',
+        'progress', 'completed'
+    ]
+    header += [f'assignment: {title}' for _, title in assignments]
+    header += [f'quiz: {title}' for _, title in quizzes]
+
+    def rows():
+        enrollments = keyset_rows(
+            Enrollment.objects.filter(course=course),
+            ['student_id', 'student__email', 'student__first_name', 'student__last_name',
+             'enrolled_at', 'progress', 'completed'],
+            ['student_id']
+        )
+        submissions = keyset_rows(
+            Submission.objects.filter(assignment__course=course),
+            ['student_id', 'id', 'assignment_id', 'grade'],
+            ['student_id', 'id']
+        )
+        progress = keyset_rows(
+            Progress.objects.filter(quiz__course=course, quiz__isnull=False),
+            ['enrollment__student_id', 'id', 'quiz_id', 'quiz_score'],
+            ['enrollment__student_id', 'id']
+        )
+        pending_submission = [next(submissions, None)]
+        pending_progress = [next(progress, None)]
+
+        for student_id, email, first_name, last_name, enrolled_at, percent, completed in enrollments:
+            grades = [None] * len(assignments)
+            for _, _, assignment_id, grade in _take(submissions, pending_submission, student_id):
+                grades[assignment_columns[assignment_id]] = grade
+            scores = [None] * len(quizzes)
+            for _, _, quiz_id, quiz_score in _take(progress, pending_progress, student_id):
+                column = quiz_columns[quiz_id]
+                if scores[column] is None or (quiz_score is not None and quiz_score > scores[column]):
+                    scores[column] = quiz_score
+            yield (
+                str(student_id), email, first_name, last_name, enrolled_at.isoformat(),
+                percent, completed, *grades, *scores
+            )
+
+    return header, rows()
+
+
+def enrollment_rows(course_id=None):
+    """Return (header, rows) for the platform-wide enrollment roster."""
+    from enrollments.models import Enrollment
+
+    header = [
+        'enrollment_id', 'student_id', 'email', 'first_name', 'last_name',
+        'course_id', 'course_title', 'enrolled_at', 'progress', 'completed'
+    ]
+    enrollments = Enrollment.objects.all()
+    if course_id:
+        enrollments = enrollments.filter(course_id=course_id)
+
+    def rows():
+        for (enrollment_id, student_id, email, first_name, last_name, course, title,
+                enrolled_at, progress, completed) in keyset_rows(
+            enrollments,
+            ['id', 'student_id', 'student__email', 'student__first_name', 'student__last_name',
+             'course_id', 'course__title', 'enrolled_at', 'progress', 'completed'],
+            ['id']
+        ):
+            yield (
+                str(enrollment_id), str(student_id), email, first_name, last_name,
+                str(course), title, enrolled_at.isoformat(), progress, completed
+            )
+
+    return header, rows()
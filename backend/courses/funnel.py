@@ -0,0 +1,120 @@
+"""Lesson completion funnel read model.
+
+Each lesson has one `LessonCompletionStat` row counting the enrollments
+that completed it. Lesson completion can be recorded either through the
+courses `Progress` table or the enrollments `LessonProgress` table, so an
+enrollment is only counted once per lesson regardless of which table
+transitioned first.
+"""
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef
+from django.utils import timezone
+
+from .models import Lesson, LessonCompletionStat, Progress
+
+
+def _completed_elsewhere(enrollment_id, lesson_id, source):
+    """Check if the other progress table already records this completion."""
+    from enrollments.models import LessonProgress
+
+    if source == 'progress':
+        other = LessonProgress.objects.filter(
+            enrollment_id=enrollment_id, lesson_id=lesson_id, completed=True
+        )
+    else:
+        other = Progress.objects.filter(
+            enrollment_id=enrollment_id, lesson_id=lesson_id, completed=True
+        )
+    return other.exists()
+
+
+def _adjust(lesson, delta):
+    """Apply a counter delta to the lesson's funnel row."""
+    updated = LessonCompletionStat.objects.filter(lesson_id=lesson.id).update(
+        completed_count=F('completed_count') + delta,
+        updated_at=timezone.now()
+    )
+    if not updated and delta > 0:
+        stat, created = LessonCompletionStat.objects.get_or_create(
+            lesson_id=lesson.id,
+            defaults={'course_id': lesson.course_id, 'completed_count': delta}
+        )
+        if not created:
+            LessonCompletionStat.objects.filter(pk=stat.pk).update(
+                completed_count=F('completed_count') + delta,
+                updated_at=timezone.now()
+            )
+
+
+def record_lesson_completion(enrollment_id, lesson, source):
+    """Count a not-completed -> completed transition.
+
+    `source` is 'progress' or 'lesson_progress', naming the table whose row
+    just transitioned.
+    """
+    if not _completed_elsewhere(enrollment_id, lesson.id, source):
+        _adjust(lesson, 1)
+
+
+def revert_lesson_completion(enrollment_id, lesson, source):
+    """Undo a completion when a progress row is marked incomplete again."""
+    if not _completed_elsewhere(enrollment_id, lesson.id, source):
+        LessonCompletionStat.objects.filter(
+            lesson_id=lesson.id, completed_count__gt=0
+        ).update(
+            completed_count=F('completed_count') - 1,
+            updated_at=timezone.now()
+        )
+
+
+def rebuild_completion_funnel(course_ids=None):
+    """Recompute funnel counters from the progress tables.
+
+    Returns the number of lesson counters written.
+    """
+    from enrollments.models import LessonProgress
+
+    lessons = Lesson.objects.all()
+    lesson_progress = LessonProgress.objects.filter(completed=True)
+    progress = Progress.objects.filter(lesson__isnull=False, completed=True)
+    if course_ids is not None:
+        lessons = lessons.filter(course_id__in=course_ids)
+        lesson_progress = lesson_progress.filter(lesson__course_id__in=course_ids)
+        progress = progress.filter(lesson__course_id__in=course_ids)
+
+    counts = {}
+    for row in lesson_progress.values('lesson_id').annotate(
+        n=Count('enrollment', distinct=True)
+    ):
+        counts[row['lesson_id']] = row['n']
+
+    # Progress rows only count where LessonProgress hasn't already
+    progress = progress.annotate(
+        counted=Exists(LessonProgress.objects.filter(
+            enrollment_id=OuterRef('enrollment_id'),
+            lesson_id=OuterRef('lesson_id'),
+            completed=True
+        ))
+    ).filter(counted=False)
+    for row in progress.values('lesson_id').annotate(
+        n=Count('enrollment', distinct=True)
+    ):
+        counts[row['lesson_id']] = counts.get(row['lesson_id'], 0) + row['n']
+
+    stats = [
+        LessonCompletionStat(
+            course_id=course_id,
+            lesson_id=lesson_id,
+            completed_count=counts.get(lesson_id, 0)
+        )
+        for lesson_id, course_id in lessons.values_list('id', 'course_id').iterator()
+    ]
+
+    with transaction.atomic():
+        existing = LessonCompletionStat.objects.all()
+        if course_ids is not None:
+            existing = existing.filter(course_id__in=course_ids)
+        existing.delete()
+        LessonCompletionStat.objects.bulk_create(stats, batch_size=1000)
+
+    return len(stats)
@@ -0,0 +1,200 @@
+"""Quiz grading engine backed by a cached, compact answer key.
+
+The answer key for a quiz is built once from its questions and cached as
+plain bytes: the question ids in delivery order, a byte array of correct
+choices (A=0 .. D=3) and a uint16 array of points. Grading a submission
+then only encodes the submitted answers and compares them against the key
+with NumPy, without loading any `Question` rows.
+"""
+import hashlib
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Question, Quiz
+
+CHOICES = 'ABCD'
+CHOICE_CODES = {choice: code for code, choice in enumerate(CHOICES)}
+UNANSWERED = 255
+
+ANSWER_KEY_CACHE_PREFIX = 'quiz_answer_key'
+
+
+def _cache_key(quiz_id):
+    return f'{ANSWER_KEY_CACHE_PREFIX}:{quiz_id}'
+
+
+class AnswerKey:
+    """Compact, read-only answer key for one version of a quiz."""
+
+    __slots__ = (
+        'version', 'question_ids', 'correct', 'points', 'tags', 'stratify_by',
+        'total_points', '_index'
+    )
+
+    def __init__(self, version, question_ids, correct, points, tags=(), stratify_by=''):
+        self.version = version
+        self.question_ids = question_ids
+        self.correct = np.frombuffer(correct, dtype=np.uint8)
+        self.points = np.frombuffer(points, dtype=np.uint16)
+        self.tags = tags
+        self.stratify_by = stratify_by
+        self.total_points = int(self.points.sum())
+        self._index = None
+
+    def __len__(self):
+        return len(self.question_ids)
+
+    @property
+    def index(self):
+        """Map of question id to its position in the key."""
+        if self._index is None:
+            self._index = {qid: i for i, qid in enumerate(self.question_ids)}
+        return self._index
+
+    def subset(self, positions):
+        """Key restricted to the questions drawn for one attempt."""
+        return AnswerKey(
+            self.version,
+            tuple(self.question_ids[i] for i in positions),
+            self.correct[positions].tobytes(),
+            self.points[positions].tobytes(),
+            tuple(self.tags[i] for i in positions) if self.tags else (),
+            self.stratify_by
+        )
+
+    @classmethod
+    def build(cls, quiz_id):
+        """Build the key for a quiz straight from the database."""
+        stratify_by = Quiz.objects.filter(id=quiz_id).values_list(
+            'stratify_by', flat=True
+        ).first() or ''
+        rows = list(
+            Question.objects.filter(quiz_id=quiz_id)
+            .order_by('order')
+            .values_list('id', 'correct_answer', 'points', 'tag')
+        )
+        question_ids = tuple(str(row[0]) for row in rows)
+        correct = bytes(CHOICE_CODES.get(row[1], UNANSWERED) for row in rows)
+        points = np.array([row[2] for row in rows], dtype=np.uint16).tobytes()
+        tags = tuple(row[3] for row in rows)
+
+        digest = hashlib.sha1()
+        digest.update('|'.join(question_ids).encode())
+        digest.update(correct)
+        digest.update(points)
+        digest.update('|'.join(tags).encode())
+        digest.update(stratify_by.encode())
+        return cls(digest.hexdigest()[:16], question_ids, correct, points, tags, stratify_by)
+
+    def to_cache(self):
+        return {
+            'version': self.version,
+            'question_ids': self.question_ids,
+            'correct': self.correct.tobytes(),
+            'points': self.points.tobytes(),
+            'tags': self.tags,
+            'stratify_by': self.stratify_by,
+        }
+
+    @classmethod
+    def from_cache(cls, data):
+        return cls(
+            data['version'], data['question_ids'], data['correct'], data['points'],
+            data['tags'], data['stratify_by']
+        )
+
+
+def get_answer_key(quiz_id):
+    """Return the cached answer key for a quiz, building it on a miss."""
+    data = cache.get(_cache_key(quiz_id))
+    if data is not None:
+        return AnswerKey.from_cache(data)
+
+    key = AnswerKey.build(quiz_id)
+    cache.set(_cache_key(quiz_id), key.to_cache(), settings.QUIZ_ANSWER_KEY_CACHE_TIMEOUT)
+    return key
+
+
+def invalidate_answer_key(quiz_id):
+    """Drop the cached answer key after the quiz or its questions change."""
+    cache.delete(_cache_key(quiz_id))
+
+
+def encode_answers(key, answers):
+    """Encode a {question_id: 'A'..'D'} mapping into a choice array aligned with the key."""
+    codes = np.full(len(key), UNANSWERED, dtype=np.uint8)
+    if not isinstance(answers, dict):
+        return codes
+
+    index = key.index
+    for question_id, answer in answers.items():
+        position = index.get(str(question_id))
+        # Anything but a choice letter (e.g. a list sent by a client) stays unanswered
+        if position is not None and isinstance(answer, str):
+            codes[position] = CHOICE_CODES.get(answer, UNANSWERED)
+    return codes
+
+
+def grade(key, codes):
+    """Grade encoded answers against the key.
+
+    Returns (earned_points, correct_count, correct_mask).
+    """
+    correct_mask = codes == key.correct
+    earned_points = int(key.points[correct_mask].sum())
+    return earned_points, int(correct_mask.sum()), correct_mask
+
+
+def build_review(key, codes, correct_mask):
+    """Build the per-question review payload shown after submission."""
+    questions = {
+        str(question.id): question
+        for question in Question.objects.filter(id__in=key.question_ids)
+    }
+    review = []
+    for position, question_id in enumerate(key.question_ids):
+        question = questions.get(question_id)
+        if question is None:
+            continue
+        code = int(codes[position])
+        review.append({
+            'id': question_id,
+            'question_text': question.question_text,
+            'option_a': question.option_a,
+            'option_b': question.option_b,
+            'option_c': question.option_c,
+            'option_d': question.option_d,
+            'correct_answer': question.correct_answer,
+            'user_answer': CHOICES[code] if code != UNANSWERED else None,
+            'is_correct': bool(correct_mask[position]),
+            'points': question.points
+        })
+    return review
+
+
+def pack_answers(codes):
+    """Pack encoded answers into (choices, answered) byte strings.
+
+    Choices use 2 bits per question, four questions per byte with the first
+    question in the high bits; unanswered questions are stored as 0 and
+    flagged in the 1-bit `answered` mask.
+    """
+    answered = codes != UNANSWERED
+    choices = np.where(answered, codes, 0).astype(np.uint8)
+    padded = np.zeros(-(-len(choices) // 4) * 4, dtype=np.uint8)
+    padded[:len(choices)] = choices
+    quads = padded.reshape(-1, 4)
+    packed = (quads[:, 0] << 6) | (quads[:, 1] << 4) | (quads[:, 2] << 2) | quads[:, 3]
+    return packed.astype(np.uint8).tobytes(), np.packbits(answered).tobytes()
+
+
+def unpack_answers(choices, answered, question_count):
+    """Inverse of `pack_answers`, returning an encoded answer array."""
+    packed = np.frombuffer(bytes(choices), dtype=np.uint8)
+    quads = np.stack([(packed >> shift) & 0b11 for shift in (6, 4, 2, 0)], axis=1)
+    codes = quads.reshape(-1)[:question_count].astype(np.uint8)
+    mask = np.unpackbits(np.frombuffer(bytes(answered), dtype=np.uint8))[:question_count]
+    codes[mask == 0] = UNANSWERED
+    return codes
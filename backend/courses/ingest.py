@@ -0,0 +1,177 @@
+"""Post-upload processing of lesson videos.
+
+Once a new video file is committed to `Lesson.video_url`, a background
+task (see `tasks`) probes its duration and extracts a poster frame, then
+fills in `Lesson.duration` and the lesson's uploaded `Video` row so the
+catalog's `total_duration` no longer depends on hand-typed values. The
+`Video` row points at the lesson's playback route, which checks access
+and issues a signed URL, never at the stored file itself.
+
+The duration comes from `ffprobe` when it is installed, otherwise from
+the `mvhd` atom of MP4/MOV files, read by seeking over the top-level
+atoms without loading the media data. Poster frames need `ffmpeg`;
+without it the thumbnail is left as it is.
+"""
+import logging
+import math
+import shutil
+import struct
+import subprocess
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Lesson, Video
+from .packages import schedule_package
+
+logger = logging.getLogger(__name__)
+
+POSTER_DIR = 'lesson_posters'
+
+
+def _binary(name):
+    return shutil.which(name)
+
+
+def _ffprobe_duration(path):
+    ffprobe = _binary(settings.VIDEO_INGEST_FFPROBE)
+    if not ffprobe:
+        return None
+    try:
+        result = subprocess.run(
+            [ffprobe, '-v', 'error', '-show_entries', 'format=duration',
+             '-of', 'default=noprint_wrappers=1:nokey=1', path],
+            capture_output=True,
+            timeout=settings.VIDEO_INGEST_TIMEOUT_SECONDS,
+            check=True
+        )
+        return float(result.stdout.strip())
+    except (subprocess.SubprocessError, ValueError):
+        return None
+
+
+def _boxes(source, end):
+    """Yield (type, body offset, body size) for the atoms up to `end`."""
+    offset = source.tell()
+    while offset + 8 <= end:
+        source.seek(offset)
+        size, kind = struct.unpack('>I4s', source.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', source.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield kind, offset + header, size - header
+        offset += size
+
+
+def mp4_duration(path):
+    """Duration in seconds from the movie header of an MP4/MOV file, or None."""
+    try:
+        with open(path, 'rb') as source:
+            source.seek(0, 2)
+            length = source.tell()
+            source.seek(0)
+            for kind, start, size in _boxes(source, length):
+                if kind != b'moov':
+                    continue
+                source.seek(start)
+                for inner, inner_start, _ in _boxes(source, start + size):
+                    if inner != b'mvhd':
+                        continue
+                    source.seek(inner_start)
+                    version = source.read(1)[0]
+                    if version == 1:
+                        source.seek(inner_start + 20)
+                        timescale, duration = struct.unpack('>IQ', source.read(12))
+                    else:
+                        source.seek(inner_start + 12)
+                        timescale, duration = struct.unpack('>II', source.read(8))
+                    return duration / timescale if timescale else None
+    except (OSError, struct.error, IndexError):
+        pass
+    return None
+
+
+def probe_duration(path):
+    """Duration of a video file in seconds, or None if it cannot be determined."""
+    duration = _ffprobe_duration(path)
+    if duration is None:
+        duration = mp4_duration(path)
+    return duration
+
+
+def extract_poster(path, duration=None):
+    """JPEG bytes of a frame a little way into the video, or None without ffmpeg."""
+    ffmpeg = _binary(settings.VIDEO_INGEST_FFMPEG)
+    if not ffmpeg:
+        return None
+    # Skip black intro frames, but stay inside short clips
+    offset = min(5.0, duration / 10) if duration else 0
+    try:
+        result = subprocess.run(
+            [ffmpeg, '-v', 'error', '-ss', f'{offset:.2f}', '-i', path, '-frames:v', '1',
+             '-vf', f'scale={settings.VIDEO_POSTER_WIDTH}:-2', '-f', 'image2', '-c:v', 'mjpeg', 'pipe:1'],
+            capture_output=True,
+            timeout=settings.VIDEO_INGEST_TIMEOUT_SECONDS,
+            check=True
+        )
+    except subprocess.SubprocessError:
+        return None
+    return result.stdout or None
+
+
+def _save_poster(lesson_id, data):
+    name = f'{POSTER_DIR}/{lesson_id}.jpg'
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.url(default_storage.save(name, ContentFile(data)))
+
+
+def ingest_lesson_video(lesson_id, name):
+    """Fill in duration and poster for the video `name` of a lesson.
+
+    Returns the duration in seconds, or None if the lesson no longer holds
+    that file or its duration could not be read.
+    """
+    lesson = Lesson.objects.filter(id=lesson_id, video_url=name).first()
+    if lesson is None:
+        # Replaced or deleted since the job was queued
+        return None
+    path = lesson.video_url.path
+
+    duration = probe_duration(path)
+    poster = extract_poster(path, duration)
+    if duration is None and poster is None:
+        logger.warning('Could not probe lesson video %s', name)
+        return None
+
+    video_fields = {'updated_at': timezone.now()}
+    if duration is not None:
+        # Lesson durations are in minutes, Video durations in seconds
+        Lesson.objects.filter(id=lesson_id, video_url=name).update(duration=math.ceil(duration / 60))
+        video_fields['duration'] = round(duration)
+    if poster:
+        video_fields['thumbnail_url'] = _save_poster(lesson_id, poster)
+
+    # Video rows are public, the file URL is not
+    playback_url = reverse('lesson-playback', kwargs={'lesson_id': lesson_id})
+    uploads = Video.objects.filter(lesson_id=lesson_id, video_type='UPLOAD', storage_provider='LOCAL')
+    if not uploads.update(video_url=playback_url, **video_fields):
+        video_fields.pop('updated_at')
+        Video.objects.create(
+            lesson_id=lesson_id,
+            video_url=playback_url,
+            video_type='UPLOAD',
+            storage_provider='LOCAL',
+            **video_fields
+        )
+    # The duration was written with update(), which skips the signals
+    schedule_package(lesson.course_id)
+    return duration
@@ -0,0 +1,196 @@
+"""Item analysis for quiz questions.
+
+Per-question difficulty (p-value), point-biserial discrimination and the
+distribution of chosen options are derived from running sums kept per quiz
+and answer key version. The sums are built in bulk from stored
+`QuizAttempt` answers (one matrix row per attempt, one column per
+question in the bank, masked to the questions each attempt was given) and
+then folded forward as new attempts arrive, so the instructor endpoint
+never rescans every attempt.
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .grading import CHOICES, UNANSWERED, unpack_answers
+from .models import QuizAttempt
+from .sampling import select_questions
+
+ITEM_STATS_CACHE_PREFIX = 'quiz_item_stats'
+BATCH_SIZE = 2000
+
+
+def _cache_key(quiz_id, version):
+    return f'{ITEM_STATS_CACHE_PREFIX}:{quiz_id}:{version}'
+
+
+def _empty_stats(key):
+    size = len(key)
+    return {
+        'version': key.version,
+        'count': 0,
+        'through': None,
+        'exposure': np.zeros(size, dtype=np.int64),
+        'correct': np.zeros(size, dtype=np.int64),
+        'score_sum': np.zeros(size, dtype=np.float64),
+        'score_sq_sum': np.zeros(size, dtype=np.float64),
+        'correct_score_sum': np.zeros(size, dtype=np.float64),
+        'choices': np.zeros((size, len(CHOICES) + 1), dtype=np.int64),
+    }
+
+
+def _fold(stats, key, answers, seen, scores):
+    """Fold a block of attempts into the running sums.
+
+    `answers` is an (attempts x questions) matrix of encoded choices over
+    the whole bank, `seen` marks which questions each attempt was given and
+    `scores` is the matching vector of score fractions (0..1).
+    """
+    correct = (answers == key.correct) & seen
+    stats['count'] += len(scores)
+    stats['exposure'] += seen.sum(axis=0)
+    stats['correct'] += correct.sum(axis=0)
+    stats['score_sum'] += scores @ seen
+    stats['score_sq_sum'] += np.square(scores) @ seen
+    stats['correct_score_sum'] += scores @ correct
+    for code in range(len(CHOICES)):
+        stats['choices'][:, code] += ((answers == code) & seen).sum(axis=0)
+    stats['choices'][:, len(CHOICES)] += ((answers == UNANSWERED) & seen).sum(axis=0)
+
+
+def _expand(key, positions, codes):
+    """Scatter an attempt's answers over the full bank width."""
+    answers = np.full(len(key), UNANSWERED, dtype=np.uint8)
+    seen = np.zeros(len(key), dtype=bool)
+    answers[positions] = codes
+    seen[positions] = True
+    return answers, seen
+
+
+def _load(stats, key, attempts):
+    """Fold attempt rows (answers, answered, count, seed, score, total, graded_at) in batches."""
+    rows, masks, scores = [], [], []
+
+    def flush():
+        if rows:
+            _fold(stats, key, np.vstack(rows), np.vstack(masks), np.array(scores, dtype=np.float64))
+            rows.clear()
+            masks.clear()
+            scores.clear()
+
+    for answers, answered, question_count, seed, score, total, graded_at in attempts:
+        positions = select_questions(key, question_count, seed)
+        if len(positions) != question_count:
+            continue
+        expanded, seen = _expand(key, positions, unpack_answers(answers, answered, question_count))
+        rows.append(expanded)
+        masks.append(seen)
+        scores.append(score / total if total else 0.0)
+        if stats['through'] is None or graded_at > stats['through']:
+            stats['through'] = graded_at
+        if len(rows) >= BATCH_SIZE:
+            flush()
+    flush()
+
+
+def _attempts(quiz_id, key):
+    return QuizAttempt.objects.filter(
+        quiz_id=quiz_id,
+        key_version=key.version,
+        status='GRADED'
+    )
+
+
+def _rows(queryset):
+    return queryset.values_list(
+        'answers', 'answered', 'question_count', 'seed', 'score', 'total_points', 'graded_at'
+    ).iterator(chunk_size=BATCH_SIZE)
+
+
+def _store(quiz_id, stats):
+    cache.set(
+        _cache_key(quiz_id, stats['version']),
+        stats,
+        settings.QUIZ_ITEM_ANALYSIS_CACHE_TIMEOUT
+    )
+
+
+def build_item_statistics(quiz_id, key):
+    """Recompute the running sums for a quiz from all stored attempts."""
+    stats = _empty_stats(key)
+    _load(stats, key, _rows(_attempts(quiz_id, key)))
+    _store(quiz_id, stats)
+    return stats
+
+
+def get_item_statistics(quiz_id, key):
+    """Return up to date running sums, catching up on new attempts only."""
+    stats = cache.get(_cache_key(quiz_id, key.version))
+    if stats is None:
+        return build_item_statistics(quiz_id, key)
+
+    attempts = _attempts(quiz_id, key)
+    total = attempts.count()
+    if total == stats['count']:
+        return stats
+
+    if stats['through'] is not None:
+        attempts = attempts.filter(graded_at__gt=stats['through'])
+    _load(stats, key, _rows(attempts))
+    if stats['count'] != total:
+        # Attempts were missed or double counted; start over
+        return build_item_statistics(quiz_id, key)
+
+    _store(quiz_id, stats)
+    return stats
+
+
+def record_attempt(quiz_id, key, positions, codes, score_fraction, graded_at):
+    """Fold a just-graded attempt into the cached sums, if any.
+
+    `positions` are the key positions the attempt was given and `codes` the
+    encoded answers for those questions.
+    """
+    stats = cache.get(_cache_key(quiz_id, key.version))
+    if stats is None:
+        return
+
+    answers, seen = _expand(key, positions, codes)
+    _fold(
+        stats, key, answers.reshape(1, -1), seen.reshape(1, -1),
+        np.array([score_fraction], dtype=np.float64)
+    )
+    if stats['through'] is None or graded_at > stats['through']:
+        stats['through'] = graded_at
+    _store(quiz_id, stats)
+
+
+def summarize(key, stats):
+    """Turn running sums into per-question difficulty and discrimination."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        exposure = stats['exposure'].astype(np.float64)
+        difficulty = stats['correct'] / exposure
+        mean_score = stats['score_sum'] / exposure
+        score_var = stats['score_sq_sum'] / exposure - np.square(mean_score)
+        covariance = stats['correct_score_sum'] / exposure - difficulty * mean_score
+        discrimination = covariance / np.sqrt(difficulty * (1 - difficulty) * score_var)
+        distribution = stats['choices'] / exposure[:, None]
+
+    questions = []
+    for position, question_id in enumerate(key.question_ids):
+        seen = int(stats['exposure'][position])
+        p_value = difficulty[position]
+        r_pb = discrimination[position]
+        questions.append({
+            'id': question_id,
+            'position': position + 1,
+            'correct_answer': CHOICES[key.correct[position]] if key.correct[position] != UNANSWERED else None,
+            'responses': seen,
+            'difficulty': round(float(p_value), 4) if seen else None,
+            'discrimination': round(float(r_pb), 4) if np.isfinite(r_pb) else None,
+            'choices': {
+                label: round(float(distribution[position, code]), 4) if seen else 0
+                for code, label in enumerate(list(CHOICES) + ['unanswered'])
+            }
+        })
+    return questions
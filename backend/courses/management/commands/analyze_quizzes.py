@@ -0,0 +1,30 @@
+"""Recompute cached item analysis statistics for quizzes."""
+from django.core.management.base import BaseCommand
+
+from courses.grading import get_answer_key
+from courses.item_analysis import build_item_statistics
+from courses.models import Quiz
+
+
+class Command(BaseCommand):
+    help = 'Rebuild per-question item analysis statistics from stored quiz attempts'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--quiz',
+            action='append',
+            dest='quizzes',
+            help='Only analyze the given quiz ID (may be repeated)'
+        )
+    
+    def handle(self, *args, **options):
+        quizzes = Quiz.objects.all()
+        if options['quizzes']:
+            quizzes = quizzes.filter(id__in=options['quizzes'])
+        
+        for quiz_id in quizzes.values_list('id', flat=True).iterator():
+            key = get_answer_key(quiz_id)
+            stats = build_item_statistics(quiz_id, key)
+            self.stdout.write(f'{quiz_id}: {stats["count"]} attempts, {len(key)} questions')
+        
+        self.stdout.write(self.style.SUCCESS('Item analysis complete'))
@@ -0,0 +1,40 @@
+"""Build offline packages of approved courses."""
+from django.core.management.base import BaseCommand
+
+from courses.models import Course
+from courses.packages import build_package
+
+
+class Command(BaseCommand):
+    help = 'Build or update the offline package of every approved course whose content changed'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            help='Only package the course with this id'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Repack every lesson from its source files instead of reusing the previous archive'
+        )
+    
+    def handle(self, *args, **options):
+        courses = Course.objects.filter(status='APPROVED')
+        if options['course']:
+            courses = courses.filter(id=options['course'])
+        
+        built = unchanged = 0
+        for course_id in courses.values_list('id', flat=True).iterator():
+            previous = Course.objects.filter(id=course_id).values_list('package__version', flat=True).first()
+            package = build_package(course_id, force=options['force'])
+            if package is None:
+                continue
+            if package.version == previous and not options['force']:
+                unchanged += 1
+            else:
+                built += 1
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Built {built} package(s), {unchanged} already up to date'
+        ))
@@ -0,0 +1,45 @@
+"""Find near-duplicate submissions with MinHash signatures and LSH buckets."""
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Assignment
+from courses.similarity import scan_assignment
+
+
+class Command(BaseCommand):
+    help = 'Sign new or changed submission files and rebuild suspected duplicate pairs'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--assignment',
+            help='Only scan this assignment (default: every assignment with submissions)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Processes used to sign files (default: SIMILARITY_WORKERS)'
+        )
+        parser.add_argument(
+            '--rescan',
+            action='store_true',
+            help='Sign files again even if they already have a signature'
+        )
+    
+    def handle(self, *args, **options):
+        assignments = Assignment.objects.filter(submissions__isnull=False).distinct()
+        if options['assignment']:
+            assignments = Assignment.objects.filter(id=options['assignment'])
+            if not assignments.exists():
+                raise CommandError(f"Assignment {options['assignment']} not found")
+        
+        total_signed = total_pairs = 0
+        for assignment in assignments.iterator():
+            signed, pairs = scan_assignment(assignment, options['workers'], options['rescan'])
+            total_signed += signed
+            total_pairs += pairs
+            if pairs:
+                self.stdout.write(f'{assignment.title}: {pairs} suspected duplicate pair(s)')
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Signed {total_signed} file(s), {total_pairs} suspected duplicate pair(s)'
+        ))
@@ -0,0 +1,34 @@
+"""Generate resized variants of course thumbnails."""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from courses.models import Course
+from courses.thumbnails import generate_variants, source_digest
+
+
+class Command(BaseCommand):
+    help = 'Write missing WebP/JPEG size variants of every deduplicated course thumbnail'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of images resized in parallel (default: 4)'
+        )
+    
+    def handle(self, *args, **options):
+        names = {
+            name
+            for name in Course.objects.exclude(thumbnail_url='').values_list('thumbnail_url', flat=True)
+            if source_digest(name)
+        }
+        
+        # Pillow releases the GIL while resizing and encoding, so threads scale
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            written = sum(pool.map(generate_variants, names))
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} variant(s) for {len(names)} thumbnail(s)'
+        ))
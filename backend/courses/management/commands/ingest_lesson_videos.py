@@ -0,0 +1,32 @@
+"""Probe duration and extract posters for uploaded lesson videos."""
+from django.core.management.base import BaseCommand
+
+from courses.ingest import ingest_lesson_video
+from courses.models import Lesson
+
+
+class Command(BaseCommand):
+    help = 'Fill in duration and poster frames of uploaded lesson videos (missing durations only by default)'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Process every uploaded video, not only those with no duration'
+        )
+    
+    def handle(self, *args, **options):
+        lessons = Lesson.objects.exclude(video_url='').exclude(video_url__isnull=True)
+        if not options['all']:
+            lessons = lessons.filter(duration=0)
+        
+        processed = failed = 0
+        for lesson_id, name in lessons.values_list('id', 'video_url').iterator():
+            if ingest_lesson_video(lesson_id, name) is None:
+                failed += 1
+            else:
+                processed += 1
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {processed} video(s), {failed} could not be probed'
+        ))
@@ -0,0 +1,15 @@
+"""Warm answer keys, quiz payloads and enrollment maps for upcoming exams."""
+from django.core.management.base import BaseCommand
+
+from courses.exams import prewarm_exam_windows
+
+
+class Command(BaseCommand):
+    help = 'Pre-warm caches for exam windows opening within QUIZ_PREWARM_LEAD_MINUTES'
+    
+    def handle(self, *args, **options):
+        quizzes = prewarm_exam_windows()
+        for quiz in quizzes:
+            self.stdout.write(f'{quiz.id}: window opens {quiz.window_start.isoformat()}')
+        
+        self.stdout.write(self.style.SUCCESS(f'Warmed {len(quizzes)} exam window(s)'))
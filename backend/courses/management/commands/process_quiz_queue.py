@@ -0,0 +1,53 @@
+"""Grade quiz attempts queued during exam windows."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.exams import grade_queued_attempts, prewarm_exam_windows
+
+
+class Command(BaseCommand):
+    help = 'Grade queued quiz attempts in batches, draining the queue continuously unless --once is given'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Attempts graded per batch (defaults to QUIZ_GRADING_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when the queue is empty'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue once and exit'
+        )
+    
+    def handle(self, *args, **options):
+        last_prewarm = 0.0
+        
+        while True:
+            if not options['once'] and time.monotonic() - last_prewarm >= 60:
+                # A long-running worker also keeps upcoming exam windows warm
+                prewarm_exam_windows()
+                last_prewarm = time.monotonic()
+            
+            total = 0
+            while True:
+                graded = grade_queued_attempts(options['batch_size'])
+                if not graded:
+                    break
+                total += graded
+            
+            if total:
+                self.stdout.write(f'Graded {total} attempt(s)')
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+        
+        self.stdout.write(self.style.SUCCESS('Quiz queue drained'))
@@ -0,0 +1,12 @@
+"""Remove abandoned resumable upload sessions."""
+from django.core.management.base import BaseCommand
+
+from courses.uploads import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Delete expired upload sessions together with their partial files'
+    
+    def handle(self, *args, **options):
+        count = purge_expired_sessions()
+        self.stdout.write(self.style.SUCCESS(f'Removed {count} expired upload session(s)'))
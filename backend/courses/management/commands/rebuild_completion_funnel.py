@@ -0,0 +1,20 @@
+"""Rebuild lesson completion funnel counters from progress records."""
+from django.core.management.base import BaseCommand
+
+from courses.funnel import rebuild_completion_funnel
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-lesson completion counters used by the instructor funnel'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--course',
+            action='append',
+            dest='courses',
+            help='Only rebuild the given course ID (may be repeated)'
+        )
+    
+    def handle(self, *args, **options):
+        written = rebuild_completion_funnel(options['courses'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} lesson counters'))
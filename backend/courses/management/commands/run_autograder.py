@@ -0,0 +1,82 @@
+"""Grade queued code submissions against their assignment's test harness."""
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from courses.autograder import grade_batch, pool_size, requeue_stale, sandbox_error
+
+
+class Command(BaseCommand):
+    help = 'Run queued submissions through their test harness on a process pool and report throughput'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Sandbox processes run in parallel (default: AUTOGRADER_WORKERS, 0 = one per CPU)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Submissions claimed per batch (default: AUTOGRADER_BATCH_SIZE)'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait when the queue is empty'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Drain the queue once and exit'
+        )
+    
+    def report(self, graded, elapsed, workers):
+        per_minute = graded / elapsed * 60
+        self.stdout.write(
+            f'Graded {graded} submission(s) in {elapsed:.1f}s: {per_minute:.0f}/min, '
+            f'{per_minute / workers:.1f}/min per core '
+            f'(1,000 submissions in ~{1000 / per_minute:.1f} min)'
+        )
+    
+    def handle(self, *args, **options):
+        reason = sandbox_error()
+        if reason:
+            # Submissions stay queued until runs can be confined
+            raise CommandError(f'Cannot sandbox submissions: {reason}')
+        
+        workers = pool_size(options['workers'])
+        # Forked workers must not inherit open database connections
+        connections.close_all()
+        rounds = total = 0
+        total_elapsed = 0.0
+        
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                requeue_stale()
+                started = time.monotonic()
+                graded = 0
+                while True:
+                    count = grade_batch(pool, options['batch_size'])
+                    if not count:
+                        break
+                    graded += count
+                
+                if graded:
+                    elapsed = time.monotonic() - started
+                    self.report(graded, elapsed, workers)
+                    rounds += 1
+                    total += graded
+                    total_elapsed += elapsed
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        
+        if rounds > 1:
+            self.report(total, total_elapsed, workers)
+        self.stdout.write(self.style.SUCCESS('Autograder queue drained'))
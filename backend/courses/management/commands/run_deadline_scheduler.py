@@ -0,0 +1,16 @@
+"""Run the assignment deadline scheduler as a standalone worker."""
+from django.core.management.base import BaseCommand
+
+from courses.deadlines import scheduler
+
+
+class Command(BaseCommand):
+    help = 'Send assignment deadline reminders and close assignments as their deadlines pass'
+    
+    def handle(self, *args, **options):
+        self.stdout.write('Deadline scheduler running, press Ctrl+C to stop')
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS('Deadline scheduler stopped'))
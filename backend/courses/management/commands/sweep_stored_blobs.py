@@ -0,0 +1,23 @@
+"""Reclaim deduplicated upload blobs that are no longer referenced."""
+from django.core.management.base import BaseCommand
+
+from courses.storage import recount_references, sweep_orphans
+
+
+class Command(BaseCommand):
+    help = 'Delete content-addressed blobs with no references after the grace period'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help='Recompute reference counts from the file fields before sweeping'
+        )
+    
+    def handle(self, *args, **options):
+        if options['recount']:
+            changed = recount_references()
+            self.stdout.write(f'Corrected {changed} reference count(s)')
+        
+        removed = sweep_orphans()
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} orphaned blob(s)'))
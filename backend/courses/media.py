@@ -0,0 +1,210 @@
+"""Protected, seekable delivery of uploaded media files.
+
+Access is checked once, when a playback token is issued: the token is a
+signed, timestamped (lesson, user) pair that the media URL carries in its
+query string, so `<video>` elements can fetch ranges without sending the
+JWT and without a database query per range request. Offline course
+packages use (course, user) tokens and submission files (submission,
+user) tokens the same way.
+
+Files are served with `Accept-Ranges`, single-range `206 Partial Content`
+responses, `If-Range`, strong ETags and `If-None-Match`. When the web
+server in front can send files itself, the transfer is handed off with
+`X-Accel-Redirect` (nginx) or `X-Sendfile` (Apache, lighttpd) and the web
+server handles ranges too. Otherwise the file goes out as a
+`FileResponse`, whose file object WSGI servers such as gunicorn pass to
+`sendfile()`; ranges use a wrapper that keeps the real file descriptor
+and stops reading at the end of the range.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+from .storage import is_blob_name
+
+PLAYBACK_SALT = 'courses.media.playback'
+PACKAGE_SALT = 'courses.media.package'
+SUBMISSION_SALT = 'courses.media.submission'
+
+_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def playback_token(lesson_id, user_id):
+    """Signed token granting `user_id` playback of a lesson's video."""
+    return signing.dumps({'lesson': str(lesson_id), 'user': str(user_id)}, salt=PLAYBACK_SALT)
+
+
+def check_playback_token(token, lesson_id):
+    """Return the user id the token was issued to, or None if it is invalid or expired."""
+    try:
+        payload = signing.loads(token, salt=PLAYBACK_SALT, max_age=settings.MEDIA_PLAYBACK_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if payload.get('lesson') != str(lesson_id):
+        return None
+    return payload.get('user')
+
+
+def package_token(course_id, user_id):
+    """Signed token granting `user_id` the offline package of a course."""
+    return signing.dumps({'course': str(course_id), 'user': str(user_id)}, salt=PACKAGE_SALT)
+
+
+def check_package_token(token, course_id):
+    """Return the user id the token was issued to, or None if it is invalid or expired."""
+    try:
+        payload = signing.loads(token, salt=PACKAGE_SALT, max_age=settings.COURSE_PACKAGE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if payload.get('course') != str(course_id):
+        return None
+    return payload.get('user')
+
+
+def submission_token(submission_id, user_id):
+    """Signed token granting `user_id` the uploaded file of a submission."""
+    return signing.dumps({'submission': str(submission_id), 'user': str(user_id)}, salt=SUBMISSION_SALT)
+
+
+def check_submission_token(token, submission_id):
+    """Return the user id the token was issued to, or None if it is invalid or expired."""
+    try:
+        payload = signing.loads(token, salt=SUBMISSION_SALT, max_age=settings.MEDIA_PLAYBACK_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    if payload.get('submission') != str(submission_id):
+        return None
+    return payload.get('user')
+
+
+class FileRange:
+    """Read-only view of `length` bytes of an open file starting at `start`.
+
+    Exposes the underlying `fileno()` so WSGI file wrappers can still use
+    `sendfile()`; they send `Content-Length` bytes from the current offset.
+    """
+
+    def __init__(self, file, start, length):
+        self._file = file
+        self._file.seek(start)
+        self._remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def tell(self):
+        return self._file.tell()
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self._file.close()
+
+
+def parse_range(header, size):
+    """Return (start, end) inclusive for a single byte range, None to send the whole file.
+
+    Raises ValueError if the range cannot be satisfied. Multiple ranges are
+    answered with the whole file, which the specification allows.
+    """
+    match = _RANGE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError('Range not satisfiable')
+    return start, end
+
+
+def file_etag(name, stat):
+    """Strong ETag: the content hash for deduplicated uploads, else size and mtime."""
+    if is_blob_name(name):
+        return '"%s"' % os.path.splitext(os.path.basename(name))[0]
+    return '"%x-%x"' % (stat.st_size, stat.st_mtime_ns)
+
+
+def _if_range_matches(value, etag, last_modified):
+    if value.startswith('"') or value.startswith('W/'):
+        # Weak validators never match for ranges
+        return value == etag
+    modified = parse_http_date_safe(value)
+    return modified is not None and modified >= last_modified
+
+
+def _offload(name, path, content_type):
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    if backend == 'x-accel-redirect':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_LOCATION.rstrip('/') + '/' + name
+        return response
+    if backend == 'x-sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+        return response
+    return None
+
+
+def serve_file(request, storage, name, cache_control='private, max-age=3600', filename=None):
+    """Serve a stored file with range, conditional request and sendfile support."""
+    path = storage.path(name)
+    stat = os.stat(path)
+    size = stat.st_size
+    etag = file_etag(name, stat)
+    last_modified = int(stat.st_mtime)
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Accept-Ranges'] = 'bytes'
+        response['Cache-Control'] = cache_control
+        if filename:
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    if request.headers.get('If-None-Match') in (etag, '*'):
+        return finish(HttpResponseNotModified())
+
+    response = _offload(name, path, content_type)
+    if response is not None:
+        return finish(response)
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if not if_range or _if_range_matches(if_range, etag, last_modified):
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return finish(response)
+
+    handle = open(path, 'rb')
+    if byte_range is None:
+        response = FileResponse(handle, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(FileRange(handle, start, end - start + 1), content_type=content_type, status=206)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return finish(response)
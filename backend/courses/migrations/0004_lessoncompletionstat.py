@@ -0,0 +1,29 @@
+# Generated by Django 5.0 on 2026-10-19 08:22
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0003_assignment_payment_quiz_question_progress_submission_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LessonCompletionStat',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('completed_count', models.PositiveIntegerField(default=0, help_text='Number of enrollments that completed this lesson')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completion_stats', to='courses.course')),
+                ('lesson', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='completion_stat', to='courses.lesson')),
+            ],
+            options={
+                'db_table': 'lesson_completion_stats',
+                'indexes': [models.Index(fields=['course'], name='lesson_comp_course__617bd2_idx')],
+            },
+        ),
+    ]
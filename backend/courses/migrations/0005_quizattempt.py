@@ -0,0 +1,75 @@
+# Generated by Django 5.0 on 2026-10-19 08:23
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+def seed_attempt_counters(apps, schema_editor):
+    """Carry over attempts recorded as quiz Progress rows."""
+    Progress = apps.get_model('courses', 'Progress')
+    QuizAttemptCounter = apps.get_model('courses', 'QuizAttemptCounter')
+    
+    rows = (
+        Progress.objects.filter(quiz__isnull=False)
+        .values('enrollment_id', 'quiz_id')
+        .annotate(n=models.Count('id'))
+    )
+    QuizAttemptCounter.objects.bulk_create([
+        QuizAttemptCounter(
+            enrollment_id=row['enrollment_id'],
+            quiz_id=row['quiz_id'],
+            count=row['n']
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_lessoncompletionstat'),
+        ('enrollments', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizAttempt',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('attempt_number', models.PositiveIntegerField()),
+                ('key_version', models.CharField(help_text='Version of the answer key the answers are aligned with', max_length=16)),
+                ('question_count', models.PositiveIntegerField(default=0)),
+                ('answers', models.BinaryField(default=bytes, help_text='Chosen options packed 2 bits per question (A=0 .. D=3)')),
+                ('answered', models.BinaryField(default=bytes, help_text='Bitmask of answered questions')),
+                ('score', models.PositiveIntegerField(default=0)),
+                ('total_points', models.PositiveIntegerField(default=0)),
+                ('percentage', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('submitted_at', models.DateTimeField(blank=True, null=True)),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_attempts', to='enrollments.enrollment')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempts', to='courses.quiz')),
+            ],
+            options={
+                'db_table': 'quiz_attempts',
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['quiz', 'key_version'], name='quiz_attemp_quiz_id_94aeed_idx')],
+                'unique_together': {('enrollment', 'quiz', 'attempt_number')},
+            },
+        ),
+        migrations.CreateModel(
+            name='QuizAttemptCounter',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_attempt_counters', to='enrollments.enrollment')),
+                ('quiz', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attempt_counters', to='courses.quiz')),
+            ],
+            options={
+                'db_table': 'quiz_attempt_counters',
+                'unique_together': {('enrollment', 'quiz')},
+            },
+        ),
+        migrations.RunPython(seed_attempt_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-19 08:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0005_quizattempt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='tag',
+            field=models.CharField(blank=True, help_text='Topic tag used to stratify question bank sampling', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='sample_size',
+            field=models.PositiveIntegerField(default=0, help_text='Questions drawn from the bank per attempt (0 = all questions)'),
+        ),
+        migrations.AddField(
+            model_name='quiz',
+            name='stratify_by',
+            field=models.CharField(blank=True, choices=[('', 'None'), ('TAG', 'Tag'), ('POINTS', 'Points')], default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='seed',
+            field=models.BigIntegerField(blank=True, help_text='RNG seed used to draw the attempt questions from the bank', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['quiz', 'tag'], name='questions_quiz_id_e13698_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0 on 2026-10-19 08:30
+
+from django.db import migrations, models
+
+
+def mark_submitted_attempts_graded(apps, schema_editor):
+    """Attempts submitted so far were graded synchronously on submit."""
+    QuizAttempt = apps.get_model('courses', 'QuizAttempt')
+    QuizAttempt.objects.filter(submitted_at__isnull=False).update(
+        status='GRADED',
+        graded_at=models.F('submitted_at')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_question_bank_sampling'),
+        ('enrollments', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='window_start',
+            field=models.DateTimeField(blank=True, help_text='Start of the scheduled exam window (leave empty for self-paced quizzes)', null=True),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='graded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='quizattempt',
+            name='status',
+            field=models.CharField(choices=[('STARTED', 'Started'), ('QUEUED', 'Queued for Grading'), ('GRADED', 'Graded'), ('FAILED', 'Failed')], default='STARTED', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='quiz',
+            index=models.Index(fields=['window_start'], name='quizzes_window__bfd75c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quizattempt',
+            index=models.Index(fields=['status', 'submitted_at'], name='quiz_attemp_status_4b34dd_idx'),
+        ),
+        migrations.RunPython(mark_submitted_attempts_graded, migrations.RunPython.noop),
+    ]
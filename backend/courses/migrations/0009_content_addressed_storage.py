@@ -0,0 +1,46 @@
+# Generated by Django 5.0 on 2026-10-19 08:36
+
+import courses.storage
+import django.core.validators
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0008_upload_sessions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='thumbnail_url',
+            field=models.ImageField(blank=True, null=True, storage=courses.storage.get_upload_storage, upload_to='course_thumbnails/', validators=[django.core.validators.FileExtensionValidator(['jpg', 'jpeg', 'png', 'webp'])]),
+        ),
+        migrations.AlterField(
+            model_name='lesson',
+            name='video_url',
+            field=models.FileField(blank=True, null=True, storage=courses.storage.get_upload_storage, upload_to='lesson_videos/', validators=[django.core.validators.FileExtensionValidator(['mp4', 'mov', 'avi', 'mkv'])]),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='file_url',
+            field=models.FileField(storage=courses.storage.get_upload_storage, upload_to='submissions/', validators=[django.core.validators.FileExtensionValidator(['pdf', 'doc', 'docx', 'txt', 'zip'])]),
+        ),
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(help_text='Storage name (cas/ab/cd/<sha256>.<ext>)', max_length=255, unique=True)),
+                ('size', models.BigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text='Number of file fields pointing at this blob')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'stored_blobs',
+                'indexes': [models.Index(fields=['ref_count', 'updated_at'], name='stored_blob_ref_cou_bb7af0_idx')],
+            },
+        ),
+    ]
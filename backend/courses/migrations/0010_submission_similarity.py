@@ -0,0 +1,63 @@
+# Generated by Django 5.0 on 2026-10-19 08:43
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0009_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarSubmissionPair',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('similarity', models.FloatField(help_text='Estimated Jaccard similarity (0..1)')),
+                ('detected_at', models.DateTimeField(auto_now=True)),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_pairs', to='courses.assignment')),
+                ('first', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_pairs_as_first', to='courses.submission')),
+                ('second', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='similar_pairs_as_second', to='courses.submission')),
+            ],
+            options={
+                'db_table': 'similar_submission_pairs',
+                'ordering': ['-similarity'],
+                'indexes': [models.Index(fields=['assignment', 'similarity'], name='similar_sub_assignm_77b6ba_idx')],
+                'unique_together': {('first', 'second')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SubmissionLSHBucket',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='courses.assignment')),
+                ('submission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='courses.submission')),
+            ],
+            options={
+                'db_table': 'submission_lsh_buckets',
+                'indexes': [models.Index(fields=['assignment', 'band', 'bucket'], name='submission__assignm_ffd315_idx')],
+                'unique_together': {('submission', 'band')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SubmissionSignature',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(help_text='Stored file the signature was computed from', max_length=255)),
+                ('signature', models.BinaryField(default=bytes, help_text='MinHash values, one uint32 per permutation')),
+                ('shingle_count', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='submission_signatures', to='courses.assignment')),
+                ('submission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='similarity_signature', to='courses.submission')),
+            ],
+            options={
+                'db_table': 'submission_signatures',
+                'indexes': [models.Index(fields=['assignment'], name='submission__assignm_8ec87b_idx')],
+            },
+        ),
+    ]
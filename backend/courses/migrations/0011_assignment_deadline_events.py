@@ -0,0 +1,34 @@
+# Generated by Django 5.0 on 2026-10-19 08:45
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def close_past_assignments(apps, schema_editor):
+    """Assignments already past their deadline must not fire reminders or closes."""
+    Assignment = apps.get_model('courses', 'Assignment')
+    Assignment.objects.filter(deadline__lte=timezone.now()).update(
+        reminder_sent_at=models.F('deadline'),
+        closed_at=models.F('deadline')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0010_submission_similarity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='closed_at',
+            field=models.DateTimeField(blank=True, help_text='When the deadline passed and the assignment was closed', null=True),
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='reminder_sent_at',
+            field=models.DateTimeField(blank=True, help_text='When students without a submission were reminded of the deadline', null=True),
+        ),
+        migrations.RunPython(close_past_assignments, migrations.RunPython.noop),
+    ]
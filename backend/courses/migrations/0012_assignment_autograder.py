@@ -0,0 +1,36 @@
+# Generated by Django 5.0 on 2026-10-19 08:48
+
+import courses.storage
+import django.core.validators
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0011_assignment_deadline_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='test_harness',
+            field=models.FileField(blank=True, help_text='Python script (or zip with run.py) that grades code submissions', upload_to='harnesses/', validators=[django.core.validators.FileExtensionValidator(['py', 'zip'])]),
+        ),
+        migrations.AddField(
+            model_name='submission',
+            name='autograde_status',
+            field=models.CharField(blank=True, choices=[('', 'Not Autograded'), ('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='submission',
+            name='file_url',
+            field=models.FileField(storage=courses.storage.get_upload_storage, upload_to='submissions/', validators=[django.core.validators.FileExtensionValidator(['pdf', 'doc', 'docx', 'txt', 'zip', 'py', 'java', 'c', 'cpp', 'js'])]),
+        ),
+        migrations.AddIndex(
+            model_name='submission',
+            index=models.Index(fields=['autograde_status', 'submission_date'], name='submissions_autogra_a32d31_idx'),
+        ),
+    ]
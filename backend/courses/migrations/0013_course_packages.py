@@ -0,0 +1,29 @@
+# Generated by Django 5.0 on 2026-10-19 08:56
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0012_assignment_autograder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoursePackage',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('version', models.CharField(help_text='Hash of the packaged content; a new version means a rebuild', max_length=64)),
+                ('file_name', models.CharField(help_text='Storage name of the archive (course_packages/<course>/<version>.tar)', max_length=255)),
+                ('size', models.BigIntegerField(default=0)),
+                ('built_at', models.DateTimeField()),
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='package', to='courses.course')),
+            ],
+            options={
+                'db_table': 'course_packages',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-19 09:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0013_course_packages'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempt',
+            name='question_ids',
+            field=models.TextField(blank=True, default='', help_text='Comma-separated ids of the questions the answers are aligned with, kept for queued attempts'),
+        ),
+    ]
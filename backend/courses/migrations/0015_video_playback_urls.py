@@ -0,0 +1,30 @@
+# Generated by Django 5.0 on 2026-10-19 11:05
+
+from django.conf import settings
+from django.db import migrations
+from django.urls import reverse
+
+
+def point_uploads_at_playback(apps, schema_editor):
+    """Uploaded Video rows filled in by ingest held the raw media URL."""
+    Video = apps.get_model('courses', 'Video')
+    uploads = Video.objects.filter(
+        video_type='UPLOAD',
+        storage_provider='LOCAL',
+        video_url__startswith=settings.MEDIA_URL
+    )
+    for video in uploads.only('id', 'lesson_id'):
+        Video.objects.filter(id=video.id).update(
+            video_url=reverse('lesson-playback', kwargs={'lesson_id': video.lesson_id})
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0014_quiz_attempt_question_ids'),
+    ]
+
+    operations = [
+        migrations.RunPython(point_uploads_at_playback, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-19 09:32
+
+import os
+import shutil
+
+import courses.storage
+import django.core.validators
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+
+def move_harnesses(apps, schema_editor):
+    """Move existing harnesses out of MEDIA_ROOT, where they were publicly served."""
+    Assignment = apps.get_model('courses', 'Assignment')
+    private_storage = courses.storage.get_private_storage()
+    for name in Assignment.objects.exclude(test_harness='').values_list('test_harness', flat=True):
+        source = default_storage.path(name)
+        destination = private_storage.path(name)
+        if os.path.exists(source) and not os.path.exists(destination):
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.move(source, destination)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0015_video_playback_urls'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignment',
+            name='test_harness',
+            field=models.FileField(blank=True, help_text='Python script (or zip with run.py) that grades code submissions', storage=courses.storage.get_private_storage, upload_to='harnesses/', validators=[django.core.validators.FileExtensionValidator(['py', 'zip'])]),
+        ),
+        migrations.RunPython(move_harnesses, migrations.RunPython.noop),
+    ]
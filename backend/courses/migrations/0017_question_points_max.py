@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-19 09:34
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0016_assignment_private_harness'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='question',
+            name='points',
+            field=models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(65535)]),
+        ),
+    ]
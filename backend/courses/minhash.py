@@ -0,0 +1,128 @@
+"""Text extraction and MinHash signatures for submission files.
+
+This module deliberately imports nothing from Django so its functions can
+run in a process pool, whatever the start method.
+
+Text is extracted from txt, docx and pdf files, lower-cased and cut into
+overlapping word 5-grams (shingles). A signature keeps, for each of
+`NUM_PERM` random hash permutations, the smallest permuted shingle hash;
+the fraction of positions where two signatures agree estimates the
+Jaccard similarity of the two shingle sets. Signatures are split into
+`BANDS` bands of `ROWS` values for locality-sensitive hashing: two
+documents share at least one band bucket with probability
+1 - (1 - s^ROWS)^BANDS, about 0.7 similarity being the turning point.
+"""
+import hashlib
+import os
+import re
+import zipfile
+import zlib
+from xml.etree import ElementTree
+
+import numpy as np
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+SHINGLE_BLOCK = 4096
+MAX_TEXT_BYTES = 5 * 1024 * 1024
+
+# Permutations h(x) = (a * x + b) mod p over 32-bit shingle hashes; a * x + b
+# stays below 2**64, so uint64 arithmetic never overflows. The seed is fixed
+# so signatures computed at different times remain comparable.
+_PRIME = 4294967291  # largest prime below 2**32
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.uint64)
+
+_WORDS = re.compile(r'\w+')
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def _docx_text(path):
+    parts = []
+    with zipfile.ZipFile(path) as archive, archive.open('word/document.xml') as document:
+        for _, element in ElementTree.iterparse(document):
+            if element.tag == f'{_WORD_NS}t' and element.text:
+                parts.append(element.text)
+            elif element.tag == f'{_WORD_NS}p':
+                parts.append('\n')
+            element.clear()
+    return ''.join(parts)
+
+
+def _pdf_text(path):
+    from pypdf import PdfReader
+
+    reader = PdfReader(path)
+    return '\n'.join(page.extract_text() or '' for page in reader.pages)
+
+
+def extract_text(path):
+    """Return the plain text of a txt, docx or pdf file ('' for other types)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.txt':
+        with open(path, 'rb') as source:
+            return source.read(MAX_TEXT_BYTES).decode('utf-8', errors='ignore')
+    if extension == '.docx':
+        return _docx_text(path)
+    if extension == '.pdf':
+        return _pdf_text(path)
+    return ''
+
+
+def shingle_hashes(text):
+    """Distinct 32-bit hashes of the word 5-grams of `text`."""
+    words = _WORDS.findall(text.lower())
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    size = min(SHINGLE_SIZE, len(words))
+    hashes = np.fromiter(
+        (zlib.crc32(' '.join(words[i:i + size]).encode()) for i in range(len(words) - size + 1)),
+        dtype=np.uint64
+    )
+    return np.unique(hashes)
+
+
+def minhash(hashes):
+    """MinHash signature (uint32 array of NUM_PERM values) of a shingle hash set."""
+    signature = np.full(NUM_PERM, _PRIME, dtype=np.uint64)
+    for start in range(0, len(hashes), SHINGLE_BLOCK):
+        block = hashes[start:start + SHINGLE_BLOCK]
+        permuted = (np.outer(block, _A) + _B) % _PRIME
+        np.minimum(signature, permuted.min(axis=0), out=signature)
+    return signature.astype(np.uint32)
+
+
+def band_hashes(signature):
+    """One signed 64-bit bucket hash per band of a signature."""
+    return [
+        int.from_bytes(
+            hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(),
+            'big',
+            signed=True
+        )
+        for band in range(BANDS)
+    ]
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(first == second))
+
+
+def compute_signature(task):
+    """Process pool entry point: (key, path) -> (key, signature bytes, shingle count).
+
+    Unreadable or unsupported files produce an empty signature.
+    """
+    key, path = task
+    try:
+        hashes = shingle_hashes(extract_text(path))
+    except Exception:
+        # Corrupt documents must not take the whole batch down
+        hashes = np.empty(0, dtype=np.uint64)
+    if not len(hashes):
+        return key, b'', 0
+    return key, minhash(hashes).tobytes(), len(hashes)
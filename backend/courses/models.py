@@ -1,7 +1,8 @@
 """Models for courses app."""
 from django.db import models
-from django.core.validators import MinValueValidator, FileExtensionValidator
+from django.core.validators import MinValueValidator, MaxValueValidator, FileExtensionValidator
 from users.models import User
+from .storage import get_private_storage, get_upload_storage
 import uuid
 
 
@@ -57,6 +58,7 @@ class Course(models.Model):
     )
     thumbnail_url = models.ImageField(
         upload_to='course_thumbnails/',
+        storage=get_upload_storage,
         blank=True,
         null=True,
         validators=[FileExtensionValidator(['jpg', 'jpeg', 'png', 'webp'])]
@@ -140,6 +142,7 @@ class Lesson(models.Model):
     )
     video_url = models.FileField(
         upload_to='lesson_videos/',
+        storage=get_upload_storage,
         blank=True,
         null=True,
         validators=[FileExtensionValidator(['mp4', 'mov', 'avi', 'mkv'])]
@@ -236,6 +239,23 @@ class Assignment(models.Model):
         validators=[MinValueValidator(1)],
         default=100
     )
+    test_harness = models.FileField(
+        upload_to='harnesses/',
+        storage=get_private_storage,
+        blank=True,
+        validators=[FileExtensionValidator(['py', 'zip'])],
+        help_text='Python script (or zip with run.py) that grades code submissions'
+    )
+    reminder_sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When students without a submission were reminded of the deadline'
+    )
+    closed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='When the deadline passed and the assignment was closed'
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -255,6 +275,12 @@ class Assignment(models.Model):
 class Quiz(models.Model):
     """Quiz model for storing quiz information."""
     
+    STRATIFY_CHOICES = [
+        ('', 'None'),
+        ('TAG', 'Tag'),
+        ('POINTS', 'Points'),
+    ]
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     course = models.ForeignKey(
         Course,
@@ -278,6 +304,25 @@ class Quiz(models.Model):
         default=3
     )
     
+    # Question bank sampling
+    sample_size = models.PositiveIntegerField(
+        default=0,
+        help_text='Questions drawn from the bank per attempt (0 = all questions)'
+    )
+    stratify_by = models.CharField(
+        max_length=20,
+        choices=STRATIFY_CHOICES,
+        blank=True,
+        default=''
+    )
+    
+    # Exam window: everyone takes the quiz within `duration` minutes of the start
+    window_start = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Start of the scheduled exam window (leave empty for self-paced quizzes)'
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -286,6 +331,7 @@ class Quiz(models.Model):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['course']),
+            models.Index(fields=['window_start']),
         ]
     
     def __str__(self):
@@ -318,11 +364,17 @@ class Question(models.Model):
         max_length=1,
         choices=CORRECT_ANSWER_CHOICES
     )
+    # Packed as uint16 in the cached answer key (see grading)
     points = models.PositiveIntegerField(
-        validators=[MinValueValidator(1)],
+        validators=[MinValueValidator(1), MaxValueValidator(65535)],
         default=1
     )
     order = models.PositiveIntegerField(default=0)
+    tag = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text='Topic tag used to stratify question bank sampling'
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -332,6 +384,7 @@ class Question(models.Model):
         ordering = ['quiz', 'order']
         indexes = [
             models.Index(fields=['quiz', 'order']),
+            models.Index(fields=['quiz', 'tag']),
         ]
         unique_together = ['quiz', 'order']
     
@@ -348,6 +401,14 @@ class Submission(models.Model):
         ('LATE', 'Late'),
     ]
     
+    AUTOGRADE_STATUS_CHOICES = [
+        ('', 'Not Autograded'),
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     assignment = models.ForeignKey(
         Assignment,
@@ -363,7 +424,10 @@ class Submission(models.Model):
     
     file_url = models.FileField(
         upload_to='submissions/',
-        validators=[FileExtensionValidator(['pdf', 'doc', 'docx', 'txt', 'zip'])]
+        storage=get_upload_storage,
+        validators=[FileExtensionValidator([
+            'pdf', 'doc', 'docx', 'txt', 'zip', 'py', 'java', 'c', 'cpp', 'js'
+        ])]
     )
     submission_date = models.DateTimeField(auto_now_add=True)
     grade = models.PositiveIntegerField(
@@ -378,6 +442,12 @@ class Submission(models.Model):
         default='PENDING'
     )
     graded_at = models.DateTimeField(null=True, blank=True)
+    autograde_status = models.CharField(
+        max_length=20,
+        choices=AUTOGRADE_STATUS_CHOICES,
+        blank=True,
+        default=''
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -389,6 +459,7 @@ class Submission(models.Model):
             models.Index(fields=['assignment']),
             models.Index(fields=['student']),
             models.Index(fields=['status']),
+            models.Index(fields=['autograde_status', 'submission_date']),
         ]
         unique_together = ['assignment', 'student']
     
@@ -447,6 +518,109 @@ class Progress(models.Model):
         return f"{self.enrollment.student.full_name} - Progress"
 
 
+class QuizAttempt(models.Model):
+    """A single quiz attempt with its answers packed 2 bits per question."""
+    
+    STATUS_CHOICES = [
+        ('STARTED', 'Started'),
+        ('QUEUED', 'Queued for Grading'),
+        ('GRADED', 'Graded'),
+        ('FAILED', 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    enrollment = models.ForeignKey(
+        'enrollments.Enrollment',
+        on_delete=models.CASCADE,
+        related_name='quiz_attempts'
+    )
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.CASCADE,
+        related_name='attempts'
+    )
+    
+    attempt_number = models.PositiveIntegerField()
+    key_version = models.CharField(
+        max_length=16,
+        help_text='Version of the answer key the answers are aligned with'
+    )
+    question_count = models.PositiveIntegerField(default=0)
+    question_ids = models.TextField(
+        blank=True,
+        default='',
+        help_text='Comma-separated ids of the questions the answers are aligned with, kept for queued attempts'
+    )
+    seed = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text='RNG seed used to draw the attempt questions from the bank'
+    )
+    answers = models.BinaryField(
+        default=bytes,
+        help_text='Chosen options packed 2 bits per question (A=0 .. D=3)'
+    )
+    answered = models.BinaryField(
+        default=bytes,
+        help_text='Bitmask of answered questions'
+    )
+    score = models.PositiveIntegerField(default=0)
+    total_points = models.PositiveIntegerField(default=0)
+    percentage = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=0
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='STARTED'
+    )
+    
+    started_at = models.DateTimeField(auto_now_add=True)
+    submitted_at = models.DateTimeField(null=True, blank=True)
+    graded_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'quiz_attempts'
+        ordering = ['-started_at']
+        unique_together = ['enrollment', 'quiz', 'attempt_number']
+        indexes = [
+            models.Index(fields=['quiz', 'key_version']),
+            models.Index(fields=['status', 'submitted_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.quiz.title} - Attempt {self.attempt_number}"
+
+
+class QuizAttemptCounter(models.Model):
+    """Number of attempts used per enrollment and quiz."""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    enrollment = models.ForeignKey(
+        'enrollments.Enrollment',
+        on_delete=models.CASCADE,
+        related_name='quiz_attempt_counters'
+    )
+    quiz = models.ForeignKey(
+        Quiz,
+        on_delete=models.CASCADE,
+        related_name='attempt_counters'
+    )
+    
+    count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'quiz_attempt_counters'
+        unique_together = ['enrollment', 'quiz']
+    
+    def __str__(self):
+        return f"{self.quiz.title} - {self.count} attempts"
+
+
 class Payment(models.Model):
     """Payment model for mock payment records."""
     
@@ -510,3 +684,256 @@ class Payment(models.Model):
     
     def __str__(self):
         return f"{self.student.full_name} - {self.course.title} - ${self.amount}"
+
+
+class LessonCompletionStat(models.Model):
+    """Funnel counter of enrollments that have completed a lesson."""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    course = models.ForeignKey(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='completion_stats'
+    )
+    lesson = models.OneToOneField(
+        Lesson,
+        on_delete=models.CASCADE,
+        related_name='completion_stat'
+    )
+    
+    completed_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Number of enrollments that completed this lesson'
+    )
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'lesson_completion_stats'
+        indexes = [
+            models.Index(fields=['course']),
+        ]
+    
+    def __str__(self):
+        return f"{self.lesson.title} - {self.completed_count} completions"
+
+
+class UploadSession(models.Model):
+    """Resumable chunked upload of a submission file or lesson video."""
+    
+    TARGET_CHOICES = [
+        ('SUBMISSION', 'Assignment Submission'),
+        ('LESSON_VIDEO', 'Lesson Video'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('ACTIVE', 'Active'),
+        ('COMPLETE', 'Complete'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions'
+    )
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    assignment = models.ForeignKey(
+        Assignment,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        null=True,
+        blank=True
+    )
+    lesson = models.ForeignKey(
+        Lesson,
+        on_delete=models.CASCADE,
+        related_name='upload_sessions',
+        null=True,
+        blank=True
+    )
+    
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField(help_text='Total upload length in bytes')
+    offset = models.BigIntegerField(
+        default=0,
+        help_text='Bytes received and written to disk so far'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='ACTIVE'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField()
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'upload_sessions'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'status']),
+            models.Index(fields=['status', 'expires_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
+
+
+class StoredBlob(models.Model):
+    """A deduplicated upload stored once under its content hash."""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        help_text='Storage name (cas/ab/cd/<sha256>.<ext>)'
+    )
+    size = models.BigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(
+        default=0,
+        help_text='Number of file fields pointing at this blob'
+    )
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'stored_blobs'
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+
+class SubmissionSignature(models.Model):
+    """MinHash signature of a submission's extracted text."""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    submission = models.OneToOneField(
+        Submission,
+        on_delete=models.CASCADE,
+        related_name='similarity_signature'
+    )
+    assignment = models.ForeignKey(
+        Assignment,
+        on_delete=models.CASCADE,
+        related_name='submission_signatures'
+    )
+    
+    file_name = models.CharField(
+        max_length=255,
+        help_text='Stored file the signature was computed from'
+    )
+    signature = models.BinaryField(
+        default=bytes,
+        help_text='MinHash values, one uint32 per permutation'
+    )
+    shingle_count = models.PositiveIntegerField(default=0)
+    
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'submission_signatures'
+        indexes = [
+            models.Index(fields=['assignment']),
+        ]
+    
+    def __str__(self):
+        return f"Signature of {self.submission_id}"
+
+
+class SubmissionLSHBucket(models.Model):
+    """Locality-sensitive hashing bucket of one signature band."""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    assignment = models.ForeignKey(
+        Assignment,
+        on_delete=models.CASCADE,
+        related_name='lsh_buckets'
+    )
+    submission = models.ForeignKey(
+        Submission,
+        on_delete=models.CASCADE,
+        related_name='lsh_buckets'
+    )
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+    
+    class Meta:
+        db_table = 'submission_lsh_buckets'
+        unique_together = ['submission', 'band']
+        indexes = [
+            models.Index(fields=['assignment', 'band', 'bucket']),
+        ]
+    
+    def __str__(self):
+        return f"Band {self.band} bucket {self.bucket}"
+
+
+class SimilarSubmissionPair(models.Model):
+    """Two submissions to the same assignment suspected to be near-duplicates."""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    assignment = models.ForeignKey(
+        Assignment,
+        on_delete=models.CASCADE,
+        related_name='similar_pairs'
+    )
+    first = models.ForeignKey(
+        Submission,
+        on_delete=models.CASCADE,
+        related_name='similar_pairs_as_first'
+    )
+    second = models.ForeignKey(
+        Submission,
+        on_delete=models.CASCADE,
+        related_name='similar_pairs_as_second'
+    )
+    similarity = models.FloatField(help_text='Estimated Jaccard similarity (0..1)')
+    
+    detected_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'similar_submission_pairs'
+        ordering = ['-similarity']
+        unique_together = ['first', 'second']
+        indexes = [
+            models.Index(fields=['assignment', 'similarity']),
+        ]
+    
+    def __str__(self):
+        return f"{self.first_id} ~ {self.second_id} ({self.similarity:.2f})"
+
+
+class CoursePackage(models.Model):
+    """Offline download archive of an approved course."""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    course = models.OneToOneField(
+        Course,
+        on_delete=models.CASCADE,
+        related_name='package'
+    )
+    
+    version = models.CharField(
+        max_length=64,
+        help_text='Hash of the packaged content; a new version means a rebuild'
+    )
+    file_name = models.CharField(
+        max_length=255,
+        help_text='Storage name of the archive (course_packages/<course>/<version>.tar)'
+    )
+    size = models.BigIntegerField(default=0)
+    
+    built_at = models.DateTimeField()
+    
+    class Meta:
+        db_table = 'course_packages'
+    
+    def __str__(self):
+        return f"Package {self.version[:12]} of {self.course_id}"
@@ -0,0 +1,337 @@
+"""Offline download packages of approved courses.
+
+A package is an uncompressed tar (the videos are compressed already)
+holding the uploaded files of a course, followed by `manifest.json`: the
+course and lesson metadata plus every file's path, size, SHA-256 and byte
+offset in the archive, so a client can verify what it downloaded and
+fetch a single lesson again with a range request. The manifest is also
+kept next to the archive for the API.
+
+The files of each lesson form one contiguous run of tar members, recorded
+in the manifest as a span with a fingerprint of the files in it. A rebuild
+copies every span whose fingerprint is unchanged straight out of the
+previous archive (with `copy_file_range` where the kernel has it) and only
+reads and hashes the files of lessons that changed; edits to metadata alone
+just rewrite the manifest. Packages are built in the background when a
+course is approved or its content changes (see `signals`), never during a
+request, and a build whose version hash matches the current package is a
+no-op.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+from .models import Course, CoursePackage, Lesson
+from .storage import is_blob_name
+from .tasks import submit_task
+
+PACKAGES_PREFIX = 'course_packages'
+MANIFEST_FORMAT = 1
+COPY_CHUNK_SIZE = 1024 * 1024
+COURSE_SPAN = 'course'
+
+package_storage = FileSystemStorage()
+
+_pending = set()
+_pending_lock = threading.Lock()
+_build_locks = {}
+
+
+def package_name(course_id, version, extension='.tar'):
+    return f'{PACKAGES_PREFIX}/{course_id}/{version}{extension}'
+
+
+def _file_identity(storage, name):
+    """What must stay the same for a packaged copy of a stored file to be reused."""
+    if is_blob_name(name):
+        # Deduplicated uploads are named by their content hash
+        return name
+    stat = os.stat(storage.path(name))
+    return f'{name}:{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def _plan(course):
+    """Return (metadata, spans) for a course.
+
+    `spans` is a list of (key, files, fingerprint) with `files` a list of
+    (archive path, storage, name); `metadata` is the manifest without file
+    entries.
+    """
+    spans = []
+    course_files = []
+    if course.thumbnail_url:
+        extension = os.path.splitext(course.thumbnail_url.name)[1].lower()
+        course_files.append((f'thumbnail{extension}', course.thumbnail_url.storage, course.thumbnail_url.name))
+    spans.append((COURSE_SPAN, course_files))
+
+    lessons = []
+    video_storage = Lesson._meta.get_field('video_url').storage
+    for lesson in course.lessons.order_by('order'):
+        files = []
+        if lesson.video_url:
+            extension = os.path.splitext(lesson.video_url.name)[1].lower()
+            files.append((f'lessons/{lesson.id}/video{extension}', video_storage, lesson.video_url.name))
+        spans.append((str(lesson.id), files))
+        lessons.append({
+            'id': str(lesson.id),
+            'order': lesson.order,
+            'title': lesson.title,
+            'description': lesson.description,
+            'duration': lesson.duration,
+            'media_type': lesson.media_type,
+            'external_link': lesson.external_link,
+        })
+
+    metadata = {
+        'format': MANIFEST_FORMAT,
+        'course': {
+            'id': str(course.id),
+            'title': course.title,
+            'description': course.description,
+            'syllabus': course.syllabus,
+            'instructor': course.instructor.full_name,
+            'category': course.category.name if course.category else None,
+        },
+        'lessons': lessons,
+    }
+    fingerprinted = []
+    for key, files in spans:
+        identity = json.dumps([(path, _file_identity(storage, name)) for path, storage, name in files])
+        fingerprinted.append((key, files, hashlib.sha256(identity.encode()).hexdigest()))
+    return metadata, fingerprinted
+
+
+def content_version(metadata, spans):
+    """Hash identifying the packaged content of a course."""
+    content = json.dumps(
+        {'metadata': metadata, 'spans': [(key, fingerprint) for key, _, fingerprint in spans]},
+        sort_keys=True
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def _header(path, size, mtime):
+    info = tarfile.TarInfo(path)
+    info.size = size
+    info.mtime = mtime
+    info.mode = 0o644
+    return info.tobuf()
+
+
+def _padding(size):
+    return b'\0' * (-size % tarfile.BLOCKSIZE)
+
+
+def _copy_range(source, target, offset, length):
+    """Append `length` bytes of `source`, starting at `offset`, to `target`."""
+    target.flush()
+    if hasattr(os, 'copy_file_range'):
+        # Stays in the kernel, and shares extents on filesystems with reflinks
+        try:
+            while length:
+                copied = os.copy_file_range(source.fileno(), target.fileno(), length, offset)
+                if not copied:
+                    break
+                offset += copied
+                length -= copied
+        except OSError:
+            pass
+        # The buffered writer does not see the kernel moving the file position
+        target.seek(0, os.SEEK_END)
+    source.seek(offset)
+    while length:
+        chunk = source.read(min(COPY_CHUNK_SIZE, length))
+        if not chunk:
+            raise OSError('Source file is shorter than expected')
+        target.write(chunk)
+        length -= len(chunk)
+
+
+def _append_file(archive, path, storage, name):
+    """Add one stored file as a tar member; returns its manifest entry."""
+    source_path = storage.path(name)
+    stat = os.stat(source_path)
+    archive.write(_header(path, stat.st_size, int(stat.st_mtime)))
+    offset = archive.tell()
+    with open(source_path, 'rb') as source:
+        if is_blob_name(name):
+            digest = os.path.splitext(os.path.basename(name))[0]
+            _copy_range(source, archive, 0, stat.st_size)
+        else:
+            hasher = hashlib.sha256()
+            for chunk in iter(lambda: source.read(COPY_CHUNK_SIZE), b''):
+                hasher.update(chunk)
+                archive.write(chunk)
+            digest = hasher.hexdigest()
+    archive.write(_padding(stat.st_size))
+    return {'path': path, 'size': stat.st_size, 'sha256': digest, 'offset': offset}
+
+
+def read_manifest(package):
+    """The stored manifest of a package, or None if it is missing."""
+    try:
+        with package_storage.open(package_name(package.course_id, package.version, '.json')) as manifest:
+            return json.load(manifest)
+    except (OSError, ValueError):
+        return None
+
+
+def _previous_spans(package):
+    """Reusable spans of the current package: {key: (span, files)} and its archive path."""
+    if package is None:
+        return {}, None
+    manifest = read_manifest(package)
+    archive_path = package_storage.path(package.file_name)
+    if manifest is None or not os.path.exists(archive_path):
+        return {}, None
+    files = {COURSE_SPAN: manifest['course']['files']}
+    for lesson in manifest['lessons']:
+        files[lesson['id']] = lesson['files']
+    return {
+        key: (span, files[key])
+        for key, span in manifest['spans'].items()
+        if key in files
+    }, archive_path
+
+
+def _write_atomic(path, write):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            write(output)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _remove_other_versions(course_id, version):
+    directory = package_storage.path(f'{PACKAGES_PREFIX}/{course_id}')
+    for entry in os.listdir(directory):
+        # Temporary files belong to builds still running
+        if entry.endswith('.tmp') or os.path.splitext(entry)[0] == version:
+            continue
+        try:
+            os.unlink(os.path.join(directory, entry))
+        except FileNotFoundError:
+            pass
+
+
+def build_package(course_id, force=False):
+    """Build the package of an approved course if its content changed.
+
+    Unchanged lessons are copied from the previous archive unless `force`
+    is set. Returns the CoursePackage, or None if the course is not approved.
+    """
+    course = Course.objects.select_related('instructor', 'category').filter(
+        id=course_id,
+        status='APPROVED'
+    ).first()
+    if course is None:
+        return None
+    package = CoursePackage.objects.filter(course_id=course_id).first()
+
+    metadata, spans = _plan(course)
+    version = content_version(metadata, spans)
+    if (
+        not force
+        and package is not None
+        and package.version == version
+        and package_storage.exists(package.file_name)
+    ):
+        return package
+
+    previous, previous_path = ({}, None) if force else _previous_spans(package)
+    manifest = dict(metadata, version=version, built_at=timezone.now().isoformat(), spans={})
+    lessons = {lesson['id']: lesson for lesson in manifest['lessons']}
+
+    def write(archive):
+        old_archive = open(previous_path, 'rb') if previous_path else None
+        try:
+            for key, files, fingerprint in spans:
+                start = archive.tell()
+                reused = previous.get(key)
+                if old_archive and reused and reused[0]['fingerprint'] == fingerprint:
+                    span, entries = reused
+                    _copy_range(old_archive, archive, span['start'], span['length'])
+                    shift = start - span['start']
+                    entries = [dict(entry, offset=entry['offset'] + shift) for entry in entries]
+                else:
+                    entries = [_append_file(archive, *file) for file in files]
+                manifest['spans'][key] = {
+                    'fingerprint': fingerprint,
+                    'start': start,
+                    'length': archive.tell() - start,
+                }
+                if key == COURSE_SPAN:
+                    manifest['course']['files'] = entries
+                else:
+                    lessons[key]['files'] = entries
+        finally:
+            if old_archive:
+                old_archive.close()
+
+        data = json.dumps(manifest, indent=2).encode()
+        archive.write(_header('manifest.json', len(data), int(timezone.now().timestamp())))
+        archive.write(data)
+        archive.write(_padding(len(data)))
+        # End-of-archive marker, padded to a whole record like tarfile does
+        archive.write(b'\0' * (2 * tarfile.BLOCKSIZE))
+        archive.write(b'\0' * (-archive.tell() % tarfile.RECORDSIZE))
+
+    name = package_name(course_id, version)
+    path = package_storage.path(name)
+    _write_atomic(path, write)
+    _write_atomic(
+        package_storage.path(package_name(course_id, version, '.json')),
+        lambda output: output.write(json.dumps(manifest).encode())
+    )
+
+    package, _ = CoursePackage.objects.update_or_create(
+        course_id=course_id,
+        defaults={
+            'version': version,
+            'file_name': name,
+            'size': os.path.getsize(path),
+            'built_at': timezone.now(),
+        }
+    )
+    _remove_other_versions(course_id, version)
+    return package
+
+
+def delete_package_files(course_id):
+    shutil.rmtree(package_storage.path(f'{PACKAGES_PREFIX}/{course_id}'), ignore_errors=True)
+
+
+def _build_once(course_id):
+    # Leave the queue before reading the course, so a change made during
+    # the build queues another one; builds of one course never overlap
+    with _pending_lock:
+        _pending.discard(course_id)
+        lock = _build_locks.setdefault(course_id, threading.Lock())
+    with lock:
+        build_package(course_id)
+
+
+def schedule_package(course_id):
+    """Queue a package build for a course unless one is already queued."""
+    with _pending_lock:
+        if course_id in _pending:
+            return True
+        _pending.add(course_id)
+    if not submit_task(_build_once, course_id):
+        with _pending_lock:
+            _pending.discard(course_id)
+        return False
+    return True
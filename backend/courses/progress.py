@@ -0,0 +1,107 @@
+"""Enrollment progress calculation shared by views and background workers."""
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Progress
+
+
+def record_quiz_progress(enrollment_id, quiz, score_percentage, attempt_number):
+    """Create or update the enrollment's progress record for a quiz."""
+    progress = Progress.objects.filter(enrollment_id=enrollment_id, quiz=quiz).first()
+    if progress is None:
+        Progress.objects.create(
+            enrollment_id=enrollment_id,
+            quiz=quiz,
+            completed=True,
+            completion_date=timezone.now(),
+            quiz_score=score_percentage,
+            quiz_attempts=attempt_number
+        )
+        return
+    
+    progress.completed = True
+    progress.completion_date = timezone.now()
+    progress.quiz_attempts = attempt_number
+    if progress.quiz_score is None or score_percentage > progress.quiz_score:
+        progress.quiz_score = score_percentage
+    progress.save()
+
+
+def record_quiz_progress_batch(results):
+    """Apply many graded attempts to quiz progress with a handful of queries.
+    
+    `results` maps (enrollment_id, quiz_id) to (best_percentage, attempt_number)
+    for the attempts just graded.
+    """
+    if not results:
+        return
+    
+    now = timezone.now()
+    enrollment_ids = {enrollment_id for enrollment_id, _ in results}
+    quiz_ids = {quiz_id for _, quiz_id in results}
+    existing = {
+        (progress.enrollment_id, progress.quiz_id): progress
+        for progress in Progress.objects.filter(
+            enrollment_id__in=enrollment_ids,
+            quiz_id__in=quiz_ids
+        )
+    }
+    
+    to_create, to_update = [], []
+    for (enrollment_id, quiz_id), (score_percentage, attempt_number) in results.items():
+        progress = existing.get((enrollment_id, quiz_id))
+        if progress is None:
+            to_create.append(Progress(
+                enrollment_id=enrollment_id,
+                quiz_id=quiz_id,
+                completed=True,
+                completion_date=now,
+                quiz_score=score_percentage,
+                quiz_attempts=attempt_number
+            ))
+            continue
+        
+        progress.completed = True
+        progress.completion_date = now
+        progress.quiz_attempts = max(progress.quiz_attempts, attempt_number)
+        if progress.quiz_score is None or score_percentage > progress.quiz_score:
+            progress.quiz_score = score_percentage
+        to_update.append(progress)
+    
+    Progress.objects.bulk_create(to_create, batch_size=500)
+    Progress.objects.bulk_update(
+        to_update,
+        ['completed', 'completion_date', 'quiz_attempts', 'quiz_score'],
+        batch_size=500
+    )
+
+
+def update_enrollment_progress(enrollment):
+    """Recalculate and update enrollment progress."""
+    course = enrollment.course
+    
+    # Count completed lessons
+    completed_lessons = Progress.objects.filter(
+        enrollment=enrollment,
+        lesson__isnull=False,
+        completed=True
+    ).count()
+    
+    # Count passed quizzes
+    passed_quizzes = Progress.objects.filter(
+        enrollment=enrollment,
+        quiz__isnull=False,
+        quiz_score__gte=F('quiz__passing_score')
+    ).count()
+    
+    # Total items
+    total_lessons = course.lessons.count()
+    total_quizzes = course.quizzes.count()
+    total_items = total_lessons + total_quizzes
+    
+    if total_items > 0:
+        completed_items = completed_lessons + passed_quizzes
+        progress_percentage = (completed_items / total_items) * 100
+        enrollment.progress = round(progress_percentage, 2)
+        enrollment.completed = progress_percentage == 100
+        enrollment.save()
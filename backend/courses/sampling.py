@@ -0,0 +1,60 @@
+"""Per-attempt question sampling from a quiz's question bank.
+
+Questions are drawn from the cached answer key (an array of question ids),
+never with ORDER BY RAND(). Each attempt stores the seed it was drawn
+with, so the exact selection can be replayed when grading or analyzing it.
+"""
+import secrets
+
+import numpy as np
+
+
+def new_seed():
+    """Return a fresh seed that fits in a signed 64-bit column."""
+    return secrets.randbits(62)
+
+
+def _allocate(counts, sample_size):
+    """Split `sample_size` across strata proportionally (largest remainder)."""
+    quotas = counts * sample_size / counts.sum()
+    allocation = np.floor(quotas).astype(np.int64)
+    shortfall = sample_size - int(allocation.sum())
+    if shortfall:
+        # Stable sort keeps ties in stratum order so the split is deterministic
+        order = np.argsort(-(quotas - allocation), kind='stable')
+        allocation[order[:shortfall]] += 1
+    return np.minimum(allocation, counts)
+
+
+def _strata(key):
+    if key.stratify_by == 'TAG' and key.tags:
+        return np.array(key.tags)
+    if key.stratify_by == 'POINTS':
+        return key.points
+    return None
+
+
+def select_questions(key, sample_size, seed):
+    """Return the sorted key positions drawn for an attempt.
+
+    With no sample size (or one covering the whole bank) every question is
+    used. Otherwise `sample_size` questions are drawn with an RNG seeded by
+    `seed`, optionally stratified by tag or points as configured on the quiz.
+    """
+    size = len(key)
+    if seed is None or not sample_size or sample_size >= size:
+        return np.arange(size)
+
+    rng = np.random.default_rng(seed)
+    strata = _strata(key)
+    if strata is None:
+        return np.sort(rng.choice(size, size=sample_size, replace=False))
+
+    _, inverse, counts = np.unique(strata, return_inverse=True, return_counts=True)
+    allocation = _allocate(counts, sample_size)
+    chosen = [
+        rng.choice(np.flatnonzero(inverse == stratum), size=quota, replace=False)
+        for stratum, quota in enumerate(allocation)
+        if quota
+    ]
+    return np.sort(np.concatenate(chosen))
@@ -0,0 +1,344 @@
+"""Run a submission against an assignment's test harness in a locked-down subprocess.
+
+Like `minhash`, this module imports nothing from Django so it can run in
+a process pool whatever the start method.
+
+The harness is a Python file (or a zip with a top-level `run.py`) and is
+run as `python -I run.py submission/` from its own directory, with the
+submission in `submission/`: a zip is extracted there, a single file is
+saved as `submission/solution.<ext>`. It reports its result on the last line of output as
+JSON: `{"score": 0.85, "feedback": "17/20 tests passed"}`, with the score a
+fraction between 0 and 1. Student code imported by the harness could
+print a result line of its own, so harnesses should run it in a child
+process and only print the result themselves.
+
+Each run is confined, and a run that cannot be confined is not run at all:
+
+- `unshare` gives it new mount, PID, network (loopback only), IPC and UTS
+  namespaces.
+- It is chrooted into a root that holds read-only binds of the system and
+  Python runtime directories, `/proc`, a small `/tmp` and the work
+  harness as `/sandbox`, and read-write binds of the submission as
+  `/sandbox/submission`. The harness stays root's and read-only, so the
+  code under test cannot rewrite the tests. The project tree, MEDIA_ROOT
+  and `.env` are not visible.
+- It runs as the dedicated unprivileged uid/gid from the limits (never the
+  Django uid) with no supplementary groups and `no_new_privs`.
+- It gets resource limits: CPU seconds, address space, file size, open
+  files, processes for its uid, and no core dumps.
+- It runs in its own session. When the run ends or times out, the whole
+  process group is killed, and leaving the PID namespace kills anything
+  left over.
+
+The jail is set up by this file run as a script inside the new
+namespaces (see `_enter_jail`). That needs root, so the grading worker
+runs as root and drops to the sandbox uid for every run.
+"""
+import ctypes
+import json
+import logging
+import os
+import resource
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_TAIL_BYTES = 4096
+MAX_EXTRACTED_FILES = 1000
+# Exit status of the jail setup when it fails before the harness starts
+SETUP_FAILED = 125
+UNSHARE_OPTIONS = ['--mount', '--net', '--pid', '--ipc', '--uts', '--fork', '--kill-child']
+# Read-only in the jail, besides the Python installation
+SYSTEM_DIRS = ['/usr', '/bin', '/lib', '/lib64', '/lib32']
+DEVICES = ['/dev/null', '/dev/zero', '/dev/urandom']
+
+MS_RDONLY = 0x1
+MS_NOSUID = 0x2
+MS_NODEV = 0x4
+MS_NOEXEC = 0x8
+MS_REMOUNT = 0x20
+MS_BIND = 0x1000
+MS_REC = 0x4000
+PR_SET_NO_NEW_PRIVS = 38
+
+_isolation_error = None
+
+
+class SandboxError(Exception):
+    """The run could not be set up, e.g. a malformed archive or a missing harness."""
+
+
+def isolation_error(uid):
+    """Why runs cannot be confined as `uid` here, or None if they can (checked once per process)."""
+    global _isolation_error
+    if _isolation_error is None:
+        if uid is None:
+            _isolation_error = 'AUTOGRADER_SANDBOX_UID is not set'
+        elif uid == 0:
+            _isolation_error = 'AUTOGRADER_SANDBOX_UID must not be root'
+        elif os.geteuid() != 0:
+            _isolation_error = 'the grading worker must run as root to confine runs'
+        elif not shutil.which('unshare'):
+            _isolation_error = 'unshare (util-linux) is not installed'
+        elif subprocess.run(
+            ['unshare'] + UNSHARE_OPTIONS + ['true'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        ).returncode != 0:
+            _isolation_error = 'unshare cannot create mount, PID and network namespaces'
+        else:
+            _isolation_error = ''
+    return _isolation_error or None
+
+
+def _extract(archive_path, target, max_bytes):
+    """Extract a zip, refusing absolute paths, `..` components and zip bombs."""
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            members = archive.infolist()
+            if len(members) > MAX_EXTRACTED_FILES:
+                raise SandboxError('Archive has too many files')
+            if sum(member.file_size for member in members) > max_bytes:
+                raise SandboxError('Archive is too large once extracted')
+            root = os.path.realpath(target)
+            for member in members:
+                destination = os.path.realpath(os.path.join(root, member.filename))
+                if os.path.commonpath([root, destination]) != root:
+                    raise SandboxError(f'Archive entry escapes the submission folder: {member.filename}')
+            archive.extractall(root)
+    except zipfile.BadZipFile as exc:
+        raise SandboxError(f'Not a valid zip archive: {exc}')
+
+
+def _apply_limits(cpu_seconds, memory_bytes, file_bytes, max_processes):
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (file_bytes, file_bytes))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (64, 64))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    # Counted per uid, so it also stops a fork bomb once it has dropped to the sandbox uid
+    resource.setrlimit(resource.RLIMIT_NPROC, (max_processes, max_processes))
+
+
+def _runtime_paths():
+    """(directories, symlinks) the jail needs read-only to run this Python.
+
+    Symlinks such as `/lib64 -> usr/lib64` on merged-/usr systems are
+    recreated in the jail rather than bound.
+    """
+    dirs = []
+    links = {}
+    candidates = SYSTEM_DIRS + [
+        sys.base_prefix, sys.prefix, os.path.dirname(os.path.dirname(os.path.realpath(sys.executable)))
+    ]
+    for path in candidates:
+        if path in SYSTEM_DIRS and os.path.islink(path):
+            links[path] = os.readlink(path)
+        path = os.path.realpath(path)
+        if not os.path.isdir(path) or path == '/':
+            continue
+        if any(path == parent or path.startswith(parent + os.sep) for parent in dirs):
+            continue
+        dirs = [d for d in dirs if not d.startswith(path + os.sep)] + [path]
+    return dirs, links
+
+
+def _mount(libc, source, target, fstype, flags, data=None):
+    if libc.mount(
+        source.encode() if source else None,
+        target.encode(),
+        fstype.encode() if fstype else None,
+        flags,
+        data.encode() if data else None
+    ) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, f'mount {target}: {os.strerror(errno)}')
+
+
+def _bind(libc, source, target, read_only):
+    if os.path.isdir(source):
+        os.makedirs(target, exist_ok=True)
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        open(target, 'a').close()
+    _mount(libc, source, target, None, MS_BIND | MS_REC)
+    flags = MS_BIND | MS_REMOUNT | MS_NOSUID | MS_NODEV
+    if read_only:
+        flags |= MS_RDONLY
+    _mount(libc, None, target, None, flags)
+
+
+def _enter_jail(config):
+    """Build the jail, drop privileges and exec the harness; runs as PID 1 of the new namespaces."""
+    jail = config['root']
+    # Opened before chroot, where the file is not reachable, and closed by exec
+    error_file = open(config['error_path'], 'w')
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        for path in config['runtime_dirs']:
+            _bind(libc, path, jail + path, read_only=True)
+        for path, target in config['runtime_links'].items():
+            os.symlink(target, jail + path)
+        for device in DEVICES:
+            if os.path.exists(device):
+                _bind(libc, device, jail + device, read_only=False)
+        _bind(libc, config['harness_dir'], jail + '/sandbox', read_only=True)
+        _bind(libc, config['submission_dir'], jail + '/sandbox/submission', read_only=False)
+        os.makedirs(jail + '/proc', exist_ok=True)
+        _mount(libc, 'proc', jail + '/proc', 'proc', MS_NOSUID | MS_NODEV | MS_NOEXEC)
+        os.makedirs(jail + '/tmp', exist_ok=True)
+        _mount(libc, 'tmpfs', jail + '/tmp', 'tmpfs', MS_NOSUID | MS_NODEV, f"size={config['file_bytes']},mode=1777")
+
+        os.chroot(jail)
+        os.chdir('/sandbox')
+        os.setgroups([])
+        os.setgid(config['gid'])
+        os.setuid(config['uid'])
+        if libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0) != 0:
+            raise OSError(ctypes.get_errno(), 'prctl(PR_SET_NO_NEW_PRIVS) failed')
+        _apply_limits(config['timeout'], config['memory_bytes'], config['file_bytes'], config['max_processes'])
+        os.execve(config['python'], [config['python'], '-I', 'run.py', 'submission'], config['env'])
+    except Exception as exc:
+        error_file.write(str(exc))
+        error_file.close()
+        os._exit(SETUP_FAILED)
+
+
+def _parse_result(output):
+    """Read `{"score": ..., "feedback": ...}` from the last non-empty output line."""
+    lines = [line for line in output.splitlines() if line.strip()]
+    if lines:
+        try:
+            result = json.loads(lines[-1])
+            score = min(max(float(result['score']), 0.0), 1.0)
+            return score, str(result.get('feedback', ''))
+        except (ValueError, KeyError, TypeError):
+            pass
+    return None
+
+
+def run_submission(task):
+    """Process pool entry point.
+
+    `task` is (key, submission_path, harness_path, limits) with limits a
+    dict of `timeout`, `memory_bytes`, `file_bytes`, `max_processes` and
+    the sandbox `uid` and `gid`.
+    Returns (key, score, feedback, error). A run that fails, times out or
+    prints no result scores 0 with an explanation as feedback; when the run
+    could not even be set up, `score` is None and `error` says why (the
+    submission then needs a human).
+    """
+    key, submission_path, harness_path, limits = task
+    reason = isolation_error(limits['uid'])
+    if reason:
+        # Fail closed: never run student code without the sandbox
+        logger.error('Refusing to run submission %s unconfined: %s', key[0], reason)
+        return key, None, '', f'the sandbox is unavailable ({reason})'
+
+    base = tempfile.mkdtemp(prefix='autograde-')
+    harness_dir = os.path.join(base, 'harness')
+    submission_dir = os.path.join(base, 'submission')
+    try:
+        os.makedirs(submission_dir)
+        os.makedirs(harness_dir)
+        if submission_path.lower().endswith('.zip'):
+            _extract(submission_path, submission_dir, limits['file_bytes'])
+        else:
+            extension = os.path.splitext(submission_path)[1].lower()
+            shutil.copy(submission_path, os.path.join(submission_dir, f'solution{extension}'))
+
+        if harness_path.lower().endswith('.zip'):
+            _extract(harness_path, harness_dir, limits['file_bytes'])
+            if not os.path.isfile(os.path.join(harness_dir, 'run.py')):
+                raise SandboxError('Test harness archive has no run.py')
+        else:
+            shutil.copy(harness_path, os.path.join(harness_dir, 'run.py'))
+        # Mount point for the submission
+        os.makedirs(os.path.join(harness_dir, 'submission'), exist_ok=True)
+
+        # The harness stays root's and read-only, only the submission belongs to the sandbox uid
+        for directory, _, files in os.walk(harness_dir):
+            os.chmod(directory, 0o555)
+            for name in files:
+                os.chmod(os.path.join(directory, name), 0o444)
+        for directory, subdirs, files in os.walk(submission_dir):
+            for name in [directory] + [os.path.join(directory, entry) for entry in subdirs + files]:
+                os.lchown(name, limits['uid'], limits['gid'])
+
+        error_path = os.path.join(base, 'setup.err')
+        runtime_dirs, runtime_links = _runtime_paths()
+        config = {
+            'root': os.path.join(base, 'root'),
+            'harness_dir': harness_dir,
+            'submission_dir': submission_dir,
+            'error_path': error_path,
+            'runtime_dirs': runtime_dirs,
+            'runtime_links': runtime_links,
+            'python': os.path.realpath(sys.executable),
+            'env': {'PATH': '/usr/bin:/bin', 'HOME': '/tmp', 'TMPDIR': '/tmp', 'LANG': 'C.UTF-8'},
+            'uid': limits['uid'],
+            'gid': limits['gid'],
+            'timeout': limits['timeout'],
+            'memory_bytes': limits['memory_bytes'],
+            'file_bytes': limits['file_bytes'],
+            'max_processes': limits['max_processes'],
+        }
+        command = ['unshare'] + UNSHARE_OPTIONS + [
+            sys.executable, '-I', os.path.abspath(__file__), json.dumps(config)
+        ]
+
+        # Kept outside the jail so the run cannot rewrite what it printed
+        output_path = os.path.join(base, 'output.log')
+        with open(output_path, 'wb') as output:
+            process = subprocess.Popen(
+                command,
+                cwd=base,
+                env={'PATH': '/usr/bin:/bin', 'LANG': 'C.UTF-8'},
+                stdin=subprocess.DEVNULL,
+                stdout=output,
+                stderr=subprocess.STDOUT,
+                start_new_session=True
+            )
+            try:
+                process.wait(timeout=limits['timeout'])
+                timed_out = False
+            except subprocess.TimeoutExpired:
+                timed_out = True
+            finally:
+                # Also reaps anything a finished run left behind
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                process.wait()
+
+        if process.returncode == SETUP_FAILED and os.path.getsize(error_path):
+            with open(error_path) as error_file:
+                reason = error_file.read()
+            logger.error('Sandbox setup failed for submission %s: %s', key[0], reason)
+            raise SandboxError(f'the sandbox could not be set up ({reason})')
+
+        with open(output_path, 'rb') as output:
+            output.seek(max(os.path.getsize(output_path) - OUTPUT_TAIL_BYTES, 0))
+            tail = output.read().decode('utf-8', errors='replace')
+    except (SandboxError, OSError) as exc:
+        return key, None, '', str(exc)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+    if timed_out:
+        return key, 0.0, f"Time limit of {limits['timeout']} seconds exceeded", None
+    result = _parse_result(tail)
+    if result is None:
+        return key, 0.0, f'The test harness reported no result (exit code {process.returncode}):\n{tail}', None
+    score, feedback = result
+    return key, score, feedback, None
+
+
+if __name__ == '__main__':
+    _enter_jail(json.loads(sys.argv[1]))
@@ -1,10 +1,15 @@
 """Serializers for courses app."""
 from rest_framework import serializers
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files import File
+from django.db.models import Sum
 from .models import (
     Category, Course, Lesson, Video, Assignment, Quiz, 
-    Question, Submission, Progress, Payment
+    Question, Submission, Progress, Payment, UploadSession, SimilarSubmissionPair
 )
 from users.serializers import UserSerializer
+from .thumbnails import variant_urls
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -23,15 +28,26 @@ class CategorySerializer(serializers.ModelSerializer):
 
 
 class LessonSerializer(serializers.ModelSerializer):
-    """Serializer for Lesson model."""
+    """Serializer for Lesson model.
+    
+    The uploaded video's file URL is never sent out; players ask the
+    playback endpoint for a signed URL when `has_video` is set.
+    """
+    
+    has_video = serializers.SerializerMethodField()
     
     class Meta:
         model = Lesson
         fields = [
             'id', 'course', 'title', 'description', 'order', 'duration',
-            'media_type', 'video_url', 'external_link', 'created_at', 'updated_at'
+            'media_type', 'video_url', 'has_video', 'external_link', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        extra_kwargs = {'video_url': {'write_only': True}}
+    
+    def get_has_video(self, obj):
+        """Whether the lesson has an uploaded video to play."""
+        return bool(obj.video_url)
     
     def validate(self, attrs):
         """Validate lesson media fields."""
@@ -63,6 +79,14 @@ class LessonCreateSerializer(serializers.ModelSerializer):
         ]
 
 
+def _thumbnail_variants(serializer, course):
+    """Resized thumbnail URLs for a course, absolute when there is a request."""
+    if not course.thumbnail_url:
+        return {}
+    request = serializer.context.get('request')
+    return variant_urls(course.thumbnail_url.name, request.build_absolute_uri if request else None)
+
+
 class CourseListSerializer(serializers.ModelSerializer):
     """Serializer for course list view."""
     
@@ -72,14 +96,19 @@ class CourseListSerializer(serializers.ModelSerializer):
     total_duration = serializers.IntegerField(read_only=True)
     is_free = serializers.BooleanField(read_only=True)
     enrollment_count = serializers.IntegerField(read_only=True)
+    thumbnail_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
         fields = [
             'id', 'title', 'description', 'instructor_name', 'category_name',
-            'price', 'is_free', 'thumbnail_url', 'status', 'lesson_count',
+            'price', 'is_free', 'thumbnail_url', 'thumbnail_variants', 'status', 'lesson_count',
             'total_duration', 'enrollment_count', 'created_at'
         ]
+    
+    def get_thumbnail_variants(self, obj):
+        """WebP and JPEG thumbnail sizes with srcset strings."""
+        return _thumbnail_variants(self, obj)
 
 
 class CourseDetailSerializer(serializers.ModelSerializer):
@@ -92,16 +121,21 @@ class CourseDetailSerializer(serializers.ModelSerializer):
     total_duration = serializers.IntegerField(read_only=True)
     is_free = serializers.BooleanField(read_only=True)
     enrollment_count = serializers.IntegerField(read_only=True)
+    thumbnail_variants = serializers.SerializerMethodField()
     
     class Meta:
         model = Course
         fields = [
             'id', 'instructor', 'category', 'title', 'description', 'syllabus',
-            'price', 'is_free', 'thumbnail_url', 'status', 'admin_comment',
+            'price', 'is_free', 'thumbnail_url', 'thumbnail_variants', 'status', 'admin_comment',
             'lessons', 'lesson_count', 'total_duration', 'enrollment_count',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+    
+    def get_thumbnail_variants(self, obj):
+        """WebP and JPEG thumbnail sizes with srcset strings."""
+        return _thumbnail_variants(self, obj)
 
 
 class CourseCreateSerializer(serializers.ModelSerializer):
@@ -221,26 +255,38 @@ class AssignmentSerializer(serializers.ModelSerializer):
     course_title = serializers.CharField(source='course.title', read_only=True)
     submission_count = serializers.SerializerMethodField()
     has_submitted = serializers.SerializerMethodField()
+    has_test_harness = serializers.SerializerMethodField()
     
     class Meta:
         model = Assignment
         fields = [
             'id', 'course', 'course_title', 'title', 'description',
             'instructions', 'deadline', 'max_score', 'submission_count',
-            'has_submitted', 'created_at', 'updated_at'
+            'has_submitted', 'test_harness', 'has_test_harness', 'reminder_sent_at',
+            'closed_at', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'reminder_sent_at', 'closed_at', 'created_at', 'updated_at']
+        # Students must not be able to download the tests
+        extra_kwargs = {'test_harness': {'write_only': True}}
     
     def get_submission_count(self, obj):
         """Get number of submissions for this assignment."""
+        if hasattr(obj, 'submission_count'):
+            return obj.submission_count
         return obj.submissions.count()
     
     def get_has_submitted(self, obj):
         """Check if current user has submitted this assignment."""
+        if hasattr(obj, 'has_submitted'):
+            return obj.has_submitted
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.submissions.filter(student=request.user).exists()
         return False
+    
+    def get_has_test_harness(self, obj):
+        """Whether submissions are graded automatically."""
+        return bool(obj.test_harness)
 
 
 class QuestionSerializer(serializers.ModelSerializer):
@@ -251,7 +297,7 @@ class QuestionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'quiz', 'question_text', 'option_a', 'option_b',
             'option_c', 'option_d', 'correct_answer', 'points', 'order',
-            'created_at', 'updated_at'
+            'tag', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -280,21 +326,32 @@ class QuizSerializer(serializers.ModelSerializer):
         model = Quiz
         fields = [
             'id', 'course', 'course_title', 'title', 'description',
-            'duration', 'passing_score', 'max_attempts', 'question_count',
-            'total_points', 'has_completed', 'created_at', 'updated_at'
+            'duration', 'passing_score', 'max_attempts', 'sample_size',
+            'stratify_by', 'window_start', 'question_count', 'total_points',
+            'has_completed', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
     
     def get_question_count(self, obj):
-        """Get number of questions in this quiz."""
-        return obj.questions.count()
+        """Get number of questions delivered per attempt of this quiz."""
+        if hasattr(obj, 'question_count'):
+            count = obj.question_count
+        else:
+            count = obj.questions.count()
+        if obj.sample_size:
+            return min(obj.sample_size, count)
+        return count
     
     def get_total_points(self, obj):
         """Get total points available in this quiz."""
-        return sum(q.points for q in obj.questions.all())
+        if hasattr(obj, 'total_points'):
+            return obj.total_points or 0
+        return obj.questions.aggregate(total=Sum('points'))['total'] or 0
     
     def get_has_completed(self, obj):
         """Check if the current user has completed this quiz."""
+        if hasattr(obj, 'has_completed'):
+            return obj.has_completed
         request = self.context.get('request')
         if request and hasattr(request, 'user') and request.user.is_authenticated:
             return obj.sprint2_progress.filter(
@@ -307,10 +364,16 @@ class QuizSerializer(serializers.ModelSerializer):
 class QuizDetailSerializer(QuizSerializer):
     """Serializer for Quiz detail with questions."""
     
-    questions = QuestionListSerializer(many=True, read_only=True)
+    questions = serializers.SerializerMethodField()
     
     class Meta(QuizSerializer.Meta):
         fields = QuizSerializer.Meta.fields + ['questions']
+    
+    def get_questions(self, obj):
+        """Get the quiz questions; sampled and exam window quizzes deliver them per attempt instead."""
+        if obj.sample_size or obj.window_start:
+            return []
+        return QuestionListSerializer(obj.questions.all(), many=True).data
 
 
 class SubmissionSerializer(serializers.ModelSerializer):
@@ -324,9 +387,24 @@ class SubmissionSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'assignment', 'assignment_title', 'student', 'student_name',
             'file_url', 'submission_date', 'grade', 'feedback', 'status',
-            'graded_at', 'created_at', 'updated_at'
+            'graded_at', 'autograde_status', 'created_at', 'updated_at'
+        ]
+        read_only_fields = ['id', 'submission_date', 'autograde_status', 'created_at', 'updated_at']
+
+
+class SimilarSubmissionPairSerializer(serializers.ModelSerializer):
+    """Serializer for suspected duplicate submission pairs."""
+    
+    first_student_name = serializers.CharField(source='first.student.full_name', read_only=True)
+    second_student_name = serializers.CharField(source='second.student.full_name', read_only=True)
+    
+    class Meta:
+        model = SimilarSubmissionPair
+        fields = [
+            'id', 'assignment', 'first', 'first_student_name',
+            'second', 'second_student_name', 'similarity', 'detected_at'
         ]
-        read_only_fields = ['id', 'submission_date', 'created_at', 'updated_at']
+        read_only_fields = fields
 
 
 class ProgressSerializer(serializers.ModelSerializer):
@@ -359,3 +437,44 @@ class PaymentSerializer(serializers.ModelSerializer):
             'payment_date', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'payment_date', 'created_at', 'updated_at']
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer for resumable upload sessions."""
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'target', 'assignment', 'lesson', 'filename', 'size',
+            'offset', 'status', 'expires_at', 'created_at', 'completed_at'
+        ]
+        read_only_fields = [
+            'id', 'offset', 'status', 'expires_at', 'created_at', 'completed_at'
+        ]
+    
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Upload size must be positive')
+        if value > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Upload size exceeds the limit of {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes'
+            )
+        return value
+    
+    def validate(self, attrs):
+        target = attrs.get('target')
+        if target == 'SUBMISSION' and not attrs.get('assignment'):
+            raise serializers.ValidationError({'assignment': 'Assignment is required for submission uploads'})
+        if target == 'LESSON_VIDEO' and not attrs.get('lesson'):
+            raise serializers.ValidationError({'lesson': 'Lesson is required for video uploads'})
+        
+        # Reject disallowed file types before any bytes are sent
+        field_name = 'video_url' if target == 'LESSON_VIDEO' else 'file_url'
+        model = Lesson if target == 'LESSON_VIDEO' else Submission
+        try:
+            for validator in model._meta.get_field(field_name).validators:
+                validator(File(None, name=attrs.get('filename', '')))
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({'filename': e.messages})
+        
+        return attrs
@@ -0,0 +1,166 @@
+"""Signal handlers for courses app."""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from enrollments.models import Enrollment
+
+from .deadlines import scheduler
+from .delivery import invalidate_quiz_payload
+from .exams import invalidate_enrollments
+from .grading import invalidate_answer_key
+from .ingest import ingest_lesson_video
+from .models import Assignment, Course, CoursePackage, Lesson, Question, Quiz, Submission
+from .packages import delete_package_files, schedule_package
+from .storage import add_reference, remove_reference
+from .tasks import submit_on_commit
+from .thumbnails import schedule_variants
+
+
+@receiver([post_save, post_delete], sender=Question)
+def invalidate_quiz_caches(sender, instance, **kwargs):
+    """Drop the cached answer key and payload when one of the quiz's questions changes."""
+    invalidate_answer_key(instance.quiz_id)
+    invalidate_quiz_payload(instance.quiz_id)
+
+
+@receiver(post_save, sender=Quiz)
+def invalidate_quiz_settings_caches(sender, instance, **kwargs):
+    """Drop cached quiz data when the quiz itself is edited."""
+    invalidate_answer_key(instance.id)
+    invalidate_quiz_payload(instance.id)
+
+
+@receiver(post_save, sender=Course)
+def invalidate_course_quiz_payloads(sender, instance, created, **kwargs):
+    """Quiz payloads embed the course title, so refresh them on course edits."""
+    if created:
+        return
+    for quiz_id in Quiz.objects.filter(course=instance).values_list('id', flat=True):
+        invalidate_quiz_payload(quiz_id)
+
+
+@receiver(post_delete, sender=Enrollment)
+def invalidate_exam_enrollments(sender, instance, **kwargs):
+    """Keep removed enrollments out of a pre-warmed exam enrollment map."""
+    invalidate_enrollments(instance.course_id)
+
+
+@receiver(post_init, sender=Assignment)
+def remember_deadline(sender, instance, **kwargs):
+    """Remember the deadline as loaded so a moved deadline can be detected."""
+    instance._loaded_deadline = instance.__dict__.get('deadline')
+
+
+@receiver(pre_save, sender=Assignment)
+def reopen_moved_deadline(sender, instance, **kwargs):
+    """A deadline moved into the future needs its reminder and close again."""
+    if instance.deadline == instance._loaded_deadline or instance.deadline <= timezone.now():
+        return
+    instance.reminder_sent_at = None
+    instance.closed_at = None
+
+
+@receiver(post_save, sender=Assignment)
+def schedule_deadline_events(sender, instance, **kwargs):
+    """Hand the assignment's pending events to this process's deadline scheduler."""
+    instance._loaded_deadline = instance.deadline
+    if scheduler.running:
+        transaction.on_commit(lambda: scheduler.schedule(
+            instance.id, instance.deadline, instance.reminder_sent_at, instance.closed_at
+        ))
+
+
+# Uploaded file fields whose blobs are reference counted
+UPLOAD_FIELDS = {
+    Submission: 'file_url',
+    Lesson: 'video_url',
+    Course: 'thumbnail_url',
+}
+
+
+def _upload_name(instance, field):
+    value = instance.__dict__.get(field)
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Submission)
+@receiver(post_init, sender=Lesson)
+@receiver(post_init, sender=Course)
+def remember_upload_name(sender, instance, **kwargs):
+    """Remember the stored file name as loaded, without touching deferred fields."""
+    instance._loaded_upload_name = _upload_name(instance, UPLOAD_FIELDS[sender])
+
+
+@receiver(post_save, sender=Submission)
+@receiver(post_save, sender=Lesson)
+@receiver(post_save, sender=Course)
+def count_upload_references(sender, instance, created, **kwargs):
+    """Move the blob reference when a file field points at a new file."""
+    # New rows reference nothing yet, whatever the instance was built with
+    previous = '' if created else getattr(instance, '_loaded_upload_name', '')
+    current = _upload_name(instance, UPLOAD_FIELDS[sender])
+    if current != previous:
+        add_reference(current)
+        remove_reference(previous)
+        instance._loaded_upload_name = current
+
+
+@receiver(post_delete, sender=Submission)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_delete, sender=Course)
+def release_upload_reference(sender, instance, **kwargs):
+    """Drop the blob reference of a deleted row; the sweep reclaims the file."""
+    remove_reference(_upload_name(instance, UPLOAD_FIELDS[sender]))
+
+
+@receiver(post_init, sender=Lesson)
+def remember_video_name(sender, instance, **kwargs):
+    """Remember the lesson video as loaded so a new upload can be detected."""
+    instance._loaded_video_name = _upload_name(instance, 'video_url')
+
+
+@receiver(post_save, sender=Lesson)
+def schedule_video_ingest(sender, instance, **kwargs):
+    """Probe a newly uploaded lesson video once the upload is committed."""
+    current = _upload_name(instance, 'video_url')
+    if current and current != instance._loaded_video_name:
+        submit_on_commit(ingest_lesson_video, instance.id, current)
+    instance._loaded_video_name = current
+
+
+@receiver(post_init, sender=Course)
+def remember_thumbnail_name(sender, instance, **kwargs):
+    """Remember the course thumbnail as loaded so a new upload can be detected."""
+    instance._loaded_thumbnail_name = _upload_name(instance, 'thumbnail_url')
+
+
+@receiver(post_save, sender=Course)
+def schedule_thumbnail_variants(sender, instance, **kwargs):
+    """Resize a newly uploaded course thumbnail once the upload is committed."""
+    current = _upload_name(instance, 'thumbnail_url')
+    if current and current != instance._loaded_thumbnail_name:
+        transaction.on_commit(lambda: schedule_variants(current))
+    instance._loaded_thumbnail_name = current
+
+
+@receiver(post_save, sender=Course)
+def package_approved_course(sender, instance, **kwargs):
+    """Bring the offline package of an approved course up to date."""
+    if instance.status == 'APPROVED':
+        transaction.on_commit(lambda: schedule_package(instance.id))
+
+
+@receiver([post_save, post_delete], sender=Lesson)
+def repackage_course(sender, instance, **kwargs):
+    """Lesson changes reach the package of an approved course after commit."""
+    course_id = instance.course_id
+    if Course.objects.filter(id=course_id, status='APPROVED').exists():
+        transaction.on_commit(lambda: schedule_package(course_id))
+
+
+@receiver(post_delete, sender=CoursePackage)
+def remove_package_files(sender, instance, **kwargs):
+    """Delete the archives of a package whose course is gone."""
+    transaction.on_commit(lambda: delete_package_files(instance.course_id))
@@ -0,0 +1,198 @@
+"""Near-duplicate detection between submissions to the same assignment.
+
+Every submission file is reduced to a MinHash signature (see `minhash`),
+stored together with one LSH bucket row per signature band. Candidate
+pairs are submissions that share at least one bucket; only those are
+compared, and pairs whose estimated similarity reaches
+SIMILARITY_THRESHOLD are stored as `SimilarSubmissionPair` rows.
+
+`scan_assignment` signs the new or changed files of an assignment in a
+process pool and rebuilds its pairs from the buckets. `check_submission`
+signs one submission and compares it only with the submissions it shares
+a bucket with, so checking a new file costs the same however many came
+before it.
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations, groupby
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from . import minhash
+from .models import SimilarSubmissionPair, Submission, SubmissionLSHBucket, SubmissionSignature
+
+logger = logging.getLogger(__name__)
+
+STORE_BATCH_SIZE = 200
+
+
+def _file_path(submission_id, name):
+    field = Submission._meta.get_field('file_url')
+    try:
+        return field.storage.path(name)
+    except NotImplementedError:
+        logger.warning('Cannot check similarity of %s: storage has no local paths', submission_id)
+        return None
+
+
+def _store_signatures(assignment_id, names, results):
+    """Replace the signatures, buckets and pairs of the signed submissions."""
+    signatures = []
+    buckets = []
+    for submission_id, signature, shingle_count in results:
+        signatures.append(SubmissionSignature(
+            submission_id=submission_id,
+            assignment_id=assignment_id,
+            file_name=names[submission_id],
+            signature=signature,
+            shingle_count=shingle_count
+        ))
+        if shingle_count:
+            values = np.frombuffer(signature, dtype=np.uint32)
+            buckets.extend(
+                SubmissionLSHBucket(
+                    assignment_id=assignment_id,
+                    submission_id=submission_id,
+                    band=band,
+                    bucket=bucket
+                )
+                for band, bucket in enumerate(minhash.band_hashes(values))
+            )
+
+    submission_ids = [signature.submission_id for signature in signatures]
+    with transaction.atomic():
+        SubmissionSignature.objects.filter(submission_id__in=submission_ids).delete()
+        SubmissionLSHBucket.objects.filter(submission_id__in=submission_ids).delete()
+        SimilarSubmissionPair.objects.filter(
+            Q(first_id__in=submission_ids) | Q(second_id__in=submission_ids)
+        ).delete()
+        SubmissionSignature.objects.bulk_create(signatures)
+        SubmissionLSHBucket.objects.bulk_create(buckets, batch_size=1000)
+
+
+def _pair(assignment_id, first, second, score):
+    # Pairs are stored in a canonical order so each one exists only once
+    first, second = sorted((first, second))
+    return SimilarSubmissionPair(
+        assignment_id=assignment_id,
+        first_id=first,
+        second_id=second,
+        similarity=score
+    )
+
+
+def _load_signatures(queryset):
+    return {
+        submission_id: np.frombuffer(bytes(signature), dtype=np.uint32)
+        for submission_id, signature in queryset.exclude(shingle_count=0).values_list(
+            'submission_id', 'signature'
+        ).iterator(chunk_size=1000)
+    }
+
+
+def rebuild_pairs(assignment):
+    """Recompute the suspected duplicate pairs of an assignment from its LSH buckets."""
+    signatures = _load_signatures(SubmissionSignature.objects.filter(assignment=assignment))
+    rows = SubmissionLSHBucket.objects.filter(assignment=assignment).order_by(
+        'band', 'bucket', 'submission_id'
+    ).values_list('band', 'bucket', 'submission_id').iterator(chunk_size=2000)
+
+    threshold = settings.SIMILARITY_THRESHOLD
+    compared = set()
+    pairs = []
+    for _, members in groupby(rows, key=lambda row: row[:2]):
+        submission_ids = [row[2] for row in members]
+        for first, second in combinations(submission_ids, 2):
+            if (first, second) in compared:
+                continue
+            compared.add((first, second))
+            score = minhash.similarity(signatures[first], signatures[second])
+            if score >= threshold:
+                pairs.append(_pair(assignment.id, first, second, score))
+
+    with transaction.atomic():
+        SimilarSubmissionPair.objects.filter(assignment=assignment).delete()
+        SimilarSubmissionPair.objects.bulk_create(pairs, batch_size=1000)
+    return len(pairs)
+
+
+def scan_assignment(assignment, workers=None, rescan=False):
+    """Sign every new or changed submission of an assignment and rebuild its pairs.
+
+    Signatures are computed in a pool of `workers` processes (default
+    SIMILARITY_WORKERS, 0 meaning one per CPU). With `rescan`, files that
+    already have a signature are signed again. Returns (signed, pairs).
+    """
+    names = {}
+    tasks = []
+    for submission_id, name, signed_name in Submission.objects.filter(
+        assignment=assignment
+    ).exclude(file_url='').values_list('id', 'file_url', 'similarity_signature__file_name').iterator():
+        if signed_name == name and not rescan:
+            continue
+        path = _file_path(submission_id, name)
+        if path:
+            names[submission_id] = name
+            tasks.append((submission_id, path))
+
+    workers = workers or settings.SIMILARITY_WORKERS or os.cpu_count() or 1
+    batch = []
+    if tasks and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            for result in pool.map(minhash.compute_signature, tasks, chunksize=8):
+                batch.append(result)
+                if len(batch) >= STORE_BATCH_SIZE:
+                    _store_signatures(assignment.id, names, batch)
+                    batch = []
+    else:
+        batch = [minhash.compute_signature(task) for task in tasks]
+    if batch:
+        _store_signatures(assignment.id, names, batch)
+
+    return len(tasks), rebuild_pairs(assignment)
+
+
+def check_submission(submission_id):
+    """Sign one submission and compare it with the submissions sharing its buckets.
+
+    Returns the number of suspected duplicates found.
+    """
+    submission = Submission.objects.filter(id=submission_id).exclude(file_url='').values_list(
+        'assignment_id', 'file_url'
+    ).first()
+    if not submission:
+        return 0
+    assignment_id, name = submission
+    path = _file_path(submission_id, name)
+    if not path:
+        return 0
+
+    _, signature, shingle_count = minhash.compute_signature((submission_id, path))
+    # Stored in its own transaction first: of two submissions checked at the
+    # same time, the later query then always sees the other one's buckets
+    _store_signatures(assignment_id, {submission_id: name}, [(submission_id, signature, shingle_count)])
+    if not shingle_count:
+        return 0
+
+    values = np.frombuffer(signature, dtype=np.uint32)
+    shared_bucket = Q()
+    for band, bucket in enumerate(minhash.band_hashes(values)):
+        shared_bucket |= Q(band=band, bucket=bucket)
+    candidates = SubmissionLSHBucket.objects.filter(
+        shared_bucket,
+        assignment_id=assignment_id
+    ).exclude(submission_id=submission_id).values('submission_id')
+
+    threshold = settings.SIMILARITY_THRESHOLD
+    pairs = []
+    others = _load_signatures(SubmissionSignature.objects.filter(submission_id__in=candidates))
+    for other_id, other in others.items():
+        score = minhash.similarity(values, other)
+        if score >= threshold:
+            pairs.append(_pair(assignment_id, submission_id, other_id, score))
+    SimilarSubmissionPair.objects.bulk_create(pairs, ignore_conflicts=True)
+    return len(pairs)
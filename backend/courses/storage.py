@@ -0,0 +1,246 @@
+"""Content-addressed, deduplicating storage for uploaded files.
+
+Uploads are hashed while they are streamed to a temporary file and then
+stored once under their SHA-256 (`cas/ab/cd/<sha256>.<ext>`). A second
+upload of the same bytes reuses the existing blob instead of writing a new
+copy. `StoredBlob` rows count how many model fields point at each blob;
+the counts are kept by the signals in `courses.signals`, and blobs nobody
+references are removed by the `sweep_stored_blobs` command after a grace
+period. Names outside `cas/` (files stored before this backend was
+enabled) keep working as plain `FileSystemStorage` paths.
+"""
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import IntegrityError
+from django.db.models import F
+from django.utils import timezone
+
+CAS_PREFIX = 'cas'
+HASH_BLOCK_SIZE = 64 * 1024
+
+
+def blob_name(digest, filename):
+    """Storage name of the blob for a content digest."""
+    extension = os.path.splitext(filename)[1].lower()
+    return f'{CAS_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f'{CAS_PREFIX}/')
+
+
+def _touch_blob(name, size):
+    """Mark a blob as freshly written so a concurrent sweep leaves it alone.
+
+    Returns False if there was no row for the blob yet (one is created).
+    """
+    from .models import StoredBlob
+
+    if StoredBlob.objects.filter(name=name).update(updated_at=timezone.now()):
+        return True
+    try:
+        StoredBlob.objects.create(name=name, size=size)
+    except IntegrityError:
+        # Another upload of the same content registered it first
+        pass
+    return False
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that keeps one copy of each distinct file."""
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in `_save`
+        return name
+
+    def _save(self, name, content):
+        directory = self.path(os.path.join(CAS_PREFIX, 'tmp'))
+        os.makedirs(directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        handle, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                if hasattr(content, 'seek') and content.seekable():
+                    content.seek(0)
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+            return self._store(temp_path, digest.hexdigest(), size, name)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def adopt(self, path, filename):
+        """Move an already complete local file (e.g. a finished chunked upload) into the store.
+
+        The file is read once to hash it but not copied.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, 'rb') as source:
+            for block in iter(lambda: source.read(HASH_BLOCK_SIZE), b''):
+                digest.update(block)
+                size += len(block)
+        try:
+            return self._store(path, digest.hexdigest(), size, filename)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _store(self, source_path, digest, size, filename):
+        name = blob_name(digest, filename)
+        destination = self.path(name)
+        # Touch the row before checking the file so a sweep cannot delete it in between
+        if _touch_blob(name, size) and os.path.exists(destination):
+            return name
+
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        os.replace(source_path, destination)
+        # Temporary files are created owner-only; blobs must stay readable by the web server
+        os.chmod(destination, self.file_permissions_mode or 0o644)
+        return name
+
+    def delete(self, name):
+        """Blobs are only removed by the sweep once nothing references them."""
+        if not is_blob_name(name):
+            super().delete(name)
+
+
+content_storage = ContentAddressedStorage()
+
+
+def get_upload_storage():
+    """Storage used by uploaded file fields (see CONTENT_ADDRESSED_UPLOADS)."""
+    if settings.CONTENT_ADDRESSED_UPLOADS:
+        return content_storage
+    return default_storage
+
+
+private_storage = FileSystemStorage(location=settings.PRIVATE_MEDIA_ROOT)
+
+
+def get_private_storage():
+    """Storage for files that must never be served, such as test harnesses."""
+    return private_storage
+
+
+def add_reference(name):
+    from .models import StoredBlob
+
+    if is_blob_name(name):
+        StoredBlob.objects.filter(name=name).update(
+            ref_count=F('ref_count') + 1,
+            updated_at=timezone.now()
+        )
+
+
+def remove_reference(name):
+    from .models import StoredBlob
+
+    if is_blob_name(name):
+        StoredBlob.objects.filter(name=name, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1,
+            updated_at=timezone.now()
+        )
+
+
+def referenced_names():
+    """Yield every blob name currently stored in an uploaded file field."""
+    from .models import Course, Lesson, Submission
+
+    for model, field in (
+        (Submission, 'file_url'),
+        (Lesson, 'video_url'),
+        (Course, 'thumbnail_url'),
+    ):
+        yield from model.objects.filter(
+            **{f'{field}__startswith': f'{CAS_PREFIX}/'}
+        ).values_list(field, flat=True).iterator()
+
+
+def recount_references():
+    """Recompute every blob's reference count from the model fields.
+
+    Returns the number of blobs whose count changed.
+    """
+    from .models import StoredBlob
+
+    counts = {}
+    for name in referenced_names():
+        counts[name] = counts.get(name, 0) + 1
+
+    changed = []
+    for blob in StoredBlob.objects.all().iterator():
+        count = counts.get(blob.name, 0)
+        if blob.ref_count != count:
+            blob.ref_count = count
+            changed.append(blob)
+    StoredBlob.objects.bulk_update(changed, ['ref_count'], batch_size=1000)
+    return len(changed)
+
+
+def sweep_orphans(grace=None):
+    """Delete blobs that have had no references for longer than the grace period.
+
+    Returns the number of blobs removed.
+    """
+    from .models import StoredBlob
+    from .thumbnails import delete_variants
+
+    grace = grace or timedelta(seconds=settings.CONTENT_ADDRESSED_SWEEP_GRACE_SECONDS)
+    cutoff = timezone.now() - grace
+    removed = 0
+
+    aside_directory = content_storage.path(os.path.join(CAS_PREFIX, 'sweep'))
+    os.makedirs(aside_directory, exist_ok=True)
+
+    for blob_id, name in StoredBlob.objects.filter(
+        ref_count=0,
+        updated_at__lt=cutoff
+    ).values_list('id', 'name').iterator():
+        # Move the file aside before dropping the row: an upload of the same
+        # content in between then finds it missing and stores a fresh copy,
+        # instead of having its file deleted under a row it just recreated
+        path = content_storage.path(name)
+        aside = os.path.join(aside_directory, str(blob_id))
+        try:
+            os.replace(path, aside)
+        except FileNotFoundError:
+            aside = None
+        # Re-check the conditions so a blob re-used since the scan is kept
+        deleted, _ = StoredBlob.objects.filter(
+            id=blob_id, ref_count=0, updated_at__lt=cutoff
+        ).delete()
+        if not deleted:
+            if aside:
+                os.replace(aside, path)
+            continue
+        if aside:
+            os.remove(aside)
+        delete_variants(name)
+        removed += 1
+        # Prune the now possibly empty fan-out directories
+        directory = os.path.dirname(path)
+        for _ in range(2):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+
+    # Temporary files left behind by interrupted uploads
+    temp_directory = content_storage.path(os.path.join(CAS_PREFIX, 'tmp'))
+    if os.path.isdir(temp_directory):
+        for entry in os.scandir(temp_directory):
+            if entry.is_file() and entry.stat().st_mtime < cutoff.timestamp():
+                os.remove(entry.path)
+
+    return removed
@@ -0,0 +1,61 @@
+"""Bounded in-process background executor.
+
+Work that should not hold up a request (similarity checks, media
+processing, package builds) is handed to a small thread pool after the
+surrounding transaction commits. The number of queued tasks is capped;
+when the pool is saturated new tasks are dropped and logged rather than
+piling up in worker memory, and the matching management command catches
+up later. Each task closes its database connection when it finishes.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.BACKGROUND_TASK_WORKERS,
+                thread_name_prefix='courses-task'
+            )
+            _slots = threading.BoundedSemaphore(
+                settings.BACKGROUND_TASK_WORKERS + settings.BACKGROUND_TASK_QUEUE_SIZE
+            )
+    return _executor
+
+
+def _run(fn, args, kwargs):
+    try:
+        close_old_connections()
+        fn(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', getattr(fn, '__name__', fn))
+    finally:
+        close_old_connections()
+        _slots.release()
+
+
+def submit_task(fn, *args, **kwargs):
+    """Run `fn(*args, **kwargs)` in the background; returns False if the queue is full."""
+    executor = _get_executor()
+    if not _slots.acquire(blocking=False):
+        logger.warning('Background queue full, dropping %s', getattr(fn, '__name__', fn))
+        return False
+    executor.submit(_run, fn, args, kwargs)
+    return True
+
+
+def submit_on_commit(fn, *args, **kwargs):
+    """Schedule `fn` once the current transaction commits (immediately outside one)."""
+    transaction.on_commit(lambda: submit_task(fn, *args, **kwargs))
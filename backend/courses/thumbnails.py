@@ -0,0 +1,193 @@
+"""Resized WebP and JPEG variants of course thumbnails.
+
+Each deduplicated thumbnail (see `storage`) gets one image per entry of
+`VARIANTS` in both formats, stored under `media/thumbs/<digest>/` where
+the digest is the source image's content hash. Names therefore change
+whenever the image does, and variants are served with immutable cache
+headers.
+
+Variants are generated in the background thread pool (see `tasks`) once
+a new thumbnail is committed, and lazily when a variant URL is requested
+before it exists: that request is redirected to the original image while
+the variants are produced, so request workers never resize images. Only
+images some course uses as its thumbnail are resized that way, and an
+image that cannot be resized is remembered for THUMBNAIL_FAILURE_TIMEOUT
+seconds instead of being retried on every request. The blob sweep removes
+a thumbnail's variants along with it.
+"""
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from PIL import Image, ImageOps
+
+from .storage import CAS_PREFIX, content_storage, is_blob_name
+from .tasks import submit_task
+
+# name: target width in pixels
+VARIANTS = {
+    'card': 400,
+    'detail': 960,
+    'retina': 1920,
+}
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+THUMBS_PREFIX = 'thumbs'
+FAILED_CACHE_PREFIX = 'thumbnail_failed'
+
+logger = logging.getLogger(__name__)
+
+variant_storage = FileSystemStorage()
+
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def source_digest(name):
+    """Content hash of a deduplicated upload, or None for other file names."""
+    if not is_blob_name(name):
+        return None
+    return os.path.splitext(os.path.basename(name))[0]
+
+
+def variant_name(digest, variant, fmt):
+    return f'{THUMBS_PREFIX}/{digest}/{variant}.{fmt}'
+
+
+def variant_urls(name, build_url=None):
+    """srcset-ready URLs for a thumbnail, or {} if it has no variants.
+
+    Returns {'card': {'webp': url, 'jpg': url}, ..., 'srcset': {'webp':
+    'url 400w, ...', 'jpg': ...}}.
+    """
+    digest = source_digest(name)
+    if not digest:
+        return {}
+    build_url = build_url or (lambda url: url)
+    urls = {
+        variant: {fmt: build_url(variant_storage.url(variant_name(digest, variant, fmt))) for fmt in FORMATS}
+        for variant in VARIANTS
+    }
+    urls['srcset'] = {
+        fmt: ', '.join(f'{urls[variant][fmt]} {width}w' for variant, width in VARIANTS.items())
+        for fmt in FORMATS
+    }
+    return urls
+
+
+def find_source(digest):
+    """Name of the course thumbnail with this content hash, or None.
+
+    Other deduplicated uploads (videos, submissions) are never resolved.
+    """
+    from .models import Course
+
+    return Course.objects.filter(
+        thumbnail_url__startswith=f'{CAS_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}.'
+    ).values_list('thumbnail_url', flat=True).first()
+
+
+def _failed_key(digest):
+    return f'{FAILED_CACHE_PREFIX}:{digest}'
+
+
+def generation_failed(name):
+    """True if resizing this thumbnail failed recently."""
+    digest = source_digest(name)
+    return bool(digest) and cache.get(_failed_key(digest)) is not None
+
+
+def _write(image, digest, variant, fmt):
+    path = variant_storage.path(variant_name(digest, variant, fmt))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pil_format, options = FORMATS[fmt]
+    # Written under a temporary name and renamed, so a half-written
+    # variant is never served
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            image.save(output, pil_format, **options)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def generate_variants(name):
+    """Write every missing variant of the thumbnail `name`; returns how many were written."""
+    digest = source_digest(name)
+    if not digest:
+        return 0
+    missing = [
+        (variant, fmt)
+        for variant in VARIANTS
+        for fmt in FORMATS
+        if not variant_storage.exists(variant_name(digest, variant, fmt))
+    ]
+    if not missing:
+        return 0
+
+    with Image.open(content_storage.path(name)) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert('RGBA' if image.has_transparency_data else 'RGB')
+
+    # Largest first, each variant scaled down from the previous one
+    written = 0
+    for variant, width in sorted(VARIANTS.items(), key=lambda item: -item[1]):
+        if image.width > width:
+            image = image.resize((width, max(round(image.height * width / image.width), 1)), Image.LANCZOS)
+        for fmt in FORMATS:
+            if (variant, fmt) not in missing:
+                continue
+            output = image
+            if fmt == 'jpg' and image.mode == 'RGBA':
+                # JPEG has no alpha channel: flatten onto white
+                output = Image.new('RGB', image.size, (255, 255, 255))
+                output.paste(image, mask=image.getchannel('A'))
+            _write(output, digest, variant, fmt)
+            written += 1
+    return written
+
+
+def delete_variants(name):
+    """Remove the variants of a deduplicated upload that is being deleted."""
+    digest = source_digest(name)
+    if not digest:
+        return
+    directory = variant_storage.path(f'{THUMBS_PREFIX}/{digest}')
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def _generate_once(name):
+    try:
+        generate_variants(name)
+    except Exception:
+        logger.exception('Could not generate thumbnail variants for %s', name)
+        cache.set(_failed_key(source_digest(name)), True, settings.THUMBNAIL_FAILURE_TIMEOUT)
+    finally:
+        with _pending_lock:
+            _pending.discard(name)
+
+
+def schedule_variants(name):
+    """Queue variant generation for `name` unless it is already queued or recently failed."""
+    if not source_digest(name) or generation_failed(name):
+        return False
+    with _pending_lock:
+        if name in _pending:
+            return True
+        _pending.add(name)
+    if not submit_task(_generate_once, name):
+        with _pending_lock:
+            _pending.discard(name)
+        return False
+    return True
@@ -0,0 +1,262 @@
+"""Resumable chunked uploads for submission files and lesson videos.
+
+Modelled on the tus core protocol: a session is created with the total
+length, each PATCH writes its request body at `Upload-Offset`, and HEAD
+reports how much has arrived so an interrupted client can resume where it
+stopped. Chunks are copied from the request stream to a partial file in
+small blocks, so worker memory stays flat whatever the file size, under
+a lock on the partial file rather than on the session row, so a slow
+client does not hold a database transaction open. An
+optional `Upload-Checksum: sha256 <base64>` header is verified while the
+chunk is written. Once the last byte arrives the partial file is renamed
+into the target field's upload directory, without being read again (with
+content-addressed storage it is read once more to hash it, never copied).
+"""
+import base64
+import binascii
+import fcntl
+import hashlib
+import os
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Lesson, Submission, UploadSession
+from .similarity import check_submission
+from .storage import ContentAddressedStorage
+from .tasks import submit_on_commit
+
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class ChecksumMismatch(Exception):
+    """The received chunk does not match its `Upload-Checksum`."""
+
+
+class UploadBusy(Exception):
+    """Another request is writing a chunk to the same upload."""
+
+
+def target_field(target):
+    """Return the model file field an upload target is attached to."""
+    if target == 'LESSON_VIDEO':
+        return Lesson._meta.get_field('video_url')
+    return Submission._meta.get_field('file_url')
+
+
+def partial_path(session):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{session.id}.part')
+
+
+def create_session(user, target, filename, size, assignment=None, lesson=None):
+    """Create an upload session backed by an empty partial file."""
+    session = UploadSession.objects.create(
+        user=user,
+        target=target,
+        assignment=assignment,
+        lesson=lesson,
+        filename=os.path.basename(filename),
+        size=size,
+        expires_at=timezone.now() + timedelta(hours=settings.CHUNKED_UPLOAD_EXPIRY_HOURS)
+    )
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    open(partial_path(session), 'wb').close()
+    return session
+
+
+def parse_checksum(header):
+    """Parse an `Upload-Checksum` header into a raw digest (None if absent)."""
+    if not header:
+        return None
+    algorithm, _, value = header.strip().partition(' ')
+    if algorithm.lower() != 'sha256':
+        raise ValueError('Only sha256 upload checksums are supported')
+    try:
+        return base64.b64decode(value.strip(), validate=True)
+    except binascii.Error:
+        raise ValueError('Malformed upload checksum')
+
+
+@contextmanager
+def open_partial(session):
+    """Open the session's partial file, locked so one chunk is written at a time.
+
+    Raises `UploadBusy` if another request holds the lock, and
+    FileNotFoundError if the upload was completed or discarded.
+    """
+    with open(partial_path(session), 'r+b') as destination:
+        try:
+            fcntl.flock(destination, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadBusy()
+        yield destination
+
+
+def write_chunk(destination, offset, stream, length, expected_digest=None):
+    """Copy up to `length` bytes from `stream` into the open partial file at `offset`.
+
+    Returns the number of bytes kept. A chunk cut short by a dropped
+    connection is kept so the client can resume right after it, unless a
+    checksum was given, in which case anything that does not verify is
+    discarded and `ChecksumMismatch` is raised.
+    """
+    digest = hashlib.sha256()
+    written = 0
+
+    destination.seek(offset)
+    try:
+        while written < length:
+            block = stream.read(min(STREAM_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            destination.write(block)
+            digest.update(block)
+            written += len(block)
+    except OSError:
+        # The client went away mid-chunk (UnreadablePostError is an OSError)
+        pass
+
+    if expected_digest is not None and (
+        written != length or digest.digest() != expected_digest
+    ):
+        destination.truncate(offset)
+        raise ChecksumMismatch()
+
+    # Drop anything left past the new offset by an earlier, unrecorded write
+    destination.truncate(offset + written)
+    destination.flush()
+
+    return written
+
+
+def advance_session(session, written):
+    """Record `written` more bytes, unless the session changed meanwhile.
+
+    Returns False if the session was completed, discarded or moved on.
+    """
+    updated = UploadSession.objects.filter(
+        pk=session.pk,
+        status='ACTIVE',
+        offset=session.offset
+    ).update(offset=F('offset') + written, updated_at=timezone.now())
+    if updated:
+        session.offset += written
+    return bool(updated)
+
+
+def save_submission(assignment, student, file):
+    """Create or replace the student's submission for an assignment.
+
+    Returns (submission, created).
+    """
+    is_late = timezone.now() > assignment.deadline
+    submission_status = 'LATE' if is_late else 'PENDING'
+    # Code assignments are graded by the autograder worker
+    autograde_status = 'QUEUED' if assignment.test_harness else ''
+
+    submission = Submission.objects.filter(
+        assignment=assignment,
+        student=student
+    ).first()
+
+    if submission:
+        # Update existing submission (resubmission)
+        submission.file_url = file
+        submission.status = submission_status
+        submission.grade = None  # Reset grade for regrading
+        submission.feedback = ''  # Reset feedback (use empty string, not None)
+        submission.graded_at = None  # Reset graded_at
+        submission.autograde_status = autograde_status
+        submission.save()
+        created = False
+    else:
+        submission = Submission.objects.create(
+            assignment=assignment,
+            student=student,
+            file_url=file,
+            status=submission_status,
+            autograde_status=autograde_status
+        )
+        created = True
+
+    if settings.SIMILARITY_CHECK_ON_SUBMIT:
+        submit_on_commit(check_submission, submission.id)
+    return submission, created
+
+
+def _move_into_storage(session):
+    """Move the finished partial file into the target field's storage."""
+    field = target_field(session.target)
+    instance = session.lesson if session.target == 'LESSON_VIDEO' else Submission(
+        assignment=session.assignment,
+        student=session.user
+    )
+    storage = field.storage
+    source = partial_path(session)
+
+    if isinstance(storage, ContentAddressedStorage):
+        # Hashed in place and renamed into the store (or dropped as a duplicate)
+        return storage.adopt(source, session.filename)
+
+    name = storage.get_available_name(field.generate_filename(instance, session.filename))
+
+    try:
+        destination = storage.path(name)
+    except NotImplementedError:
+        # Remote storage: stream the file up instead of renaming it
+        with open(source, 'rb') as handle:
+            name = storage.save(name, File(handle))
+        os.remove(source)
+        return name
+
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    os.replace(source, destination)
+    return name
+
+
+def complete_session(session):
+    """Attach a fully received upload to its target and close the session.
+
+    Returns the updated `Submission` or `Lesson`.
+    """
+    name = _move_into_storage(session)
+
+    if session.target == 'LESSON_VIDEO':
+        lesson = session.lesson
+        lesson.video_url = name
+        lesson.save(update_fields=['video_url', 'updated_at'])
+        result = lesson
+    else:
+        result, _ = save_submission(session.assignment, session.user, name)
+
+    session.status = 'COMPLETE'
+    session.completed_at = timezone.now()
+    session.save(update_fields=['status', 'completed_at', 'updated_at'])
+    return result
+
+
+def discard_session(session):
+    """Delete a session together with its partial file."""
+    try:
+        os.remove(partial_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+def purge_expired_sessions(now=None):
+    """Remove abandoned sessions and their partial files.
+
+    Returns the number of sessions removed.
+    """
+    now = now or timezone.now()
+    expired = UploadSession.objects.filter(status='ACTIVE', expires_at__lt=now)
+    count = 0
+    for session in expired.iterator():
+        discard_session(session)
+        count += 1
+    return count
@@ -7,10 +7,12 @@ from .views import (
     PublicCourseListView, PublicCourseDetailView,
     PendingCoursesListView, CourseReviewView, CourseApprovalView,
     LessonListCreateView, LessonUpdateView, LessonDeleteView, CourseProgressView,
-    admin_dashboard_stats, instructor_dashboard_stats,
+    admin_dashboard_stats, instructor_dashboard_stats, course_completion_funnel,
+    export_course_gradebook, export_enrollments, lesson_playback, serve_lesson_media,
+    course_package, serve_course_package, submission_file, serve_submission_file,
     # Sprint 2 ViewSets
     VideoViewSet, AssignmentViewSet, SubmissionViewSet,
-    QuizViewSet, QuestionViewSet, ProgressViewSet, PaymentViewSet
+    QuizViewSet, QuestionViewSet, ProgressViewSet, PaymentViewSet, UploadViewSet
 )
 
 # Router for Sprint 2 ViewSets
@@ -22,6 +24,7 @@ router.register(r'quizzes', QuizViewSet, basename='quiz')
 router.register(r'questions', QuestionViewSet, basename='question')
 router.register(r'progress', ProgressViewSet, basename='progress')
 router.register(r'payments', PaymentViewSet, basename='payment')
+router.register(r'uploads', UploadViewSet, basename='upload')
 
 urlpatterns = [
     # Categories
@@ -34,6 +37,8 @@ urlpatterns = [
     path('instructor/<uuid:pk>/update/', CourseUpdateView.as_view(), name='course-update'),
     path('instructor/<uuid:pk>/delete/', CourseDeleteView.as_view(), name='course-delete'),
     path('instructor/dashboard/stats/', instructor_dashboard_stats, name='instructor-dashboard-stats'),
+    path('instructor/<uuid:course_id>/funnel/', course_completion_funnel, name='course-completion-funnel'),
+    path('instructor/<uuid:course_id>/gradebook/export/', export_course_gradebook, name='course-gradebook-export'),
     
     # Public course catalog
     path('catalog/', PublicCourseListView.as_view(), name='public-course-list'),
@@ -47,11 +52,22 @@ urlpatterns = [
     path('admin/review/<uuid:id>/', CourseReviewView.as_view(), name='course-review'),
     path('admin/approve/<uuid:id>/', CourseApprovalView.as_view(), name='course-approval'),
     path('admin/dashboard/stats/', admin_dashboard_stats, name='admin-dashboard-stats'),
+    path('admin/enrollments/export/', export_enrollments, name='enrollments-export'),
     
     # Lessons - Combined view for GET (list) and POST (create)
     path('<uuid:course_id>/lessons/', LessonListCreateView.as_view(), name='lesson-list-create'),
     path('lessons/<uuid:id>/update/', LessonUpdateView.as_view(), name='lesson-update'),
     path('lessons/<uuid:id>/delete/', LessonDeleteView.as_view(), name='lesson-delete'),
+    path('lessons/<uuid:lesson_id>/playback/', lesson_playback, name='lesson-playback'),
+    path('media/lessons/<uuid:lesson_id>/', serve_lesson_media, name='lesson-media'),
+    
+    # Offline course packages
+    path('<uuid:course_id>/package/', course_package, name='course-package'),
+    path('media/packages/<uuid:course_id>/', serve_course_package, name='course-package-download'),
+    
+    # Submission files
+    path('submissions/<uuid:submission_id>/file/', submission_file, name='submission-file'),
+    path('media/submissions/<uuid:submission_id>/', serve_submission_file, name='submission-file-download'),
     
     # Progress for a specific course
     path('<uuid:course_id>/progress/', CourseProgressView.as_view(), name='course-progress'),
@@ -4,30 +4,89 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db import models
-from django.db.models import Q, Count, Sum, F
+from django.db import models, transaction
+from django.db.models import Q, Count, Sum, F, Exists, OuterRef
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotModified, HttpResponseRedirect,
+    StreamingHttpResponse
+)
+from django.urls import reverse
+from django.views.decorators.http import require_safe
 from django.core.mail import send_mail
 from django.conf import settings
 from django.utils import timezone
 from datetime import datetime
+import mimetypes
+import os
 import uuid
 
 from users.authentication import JWTAuthentication as CustomJWTAuthentication
 
 from .models import (
     Category, Course, Lesson, Video, Assignment, Quiz, 
-    Question, Submission, Progress, Payment
+    Question, Submission, Progress, Payment, QuizAttempt, QuizAttemptCounter, UploadSession,
+    SimilarSubmissionPair, CoursePackage
 )
 from .serializers import (
     CategorySerializer, CourseListSerializer, CourseDetailSerializer,
     CourseCreateSerializer, CourseApprovalSerializer, LessonSerializer,
     VideoSerializer, AssignmentSerializer, QuizSerializer, QuizDetailSerializer,
-    QuestionSerializer, SubmissionSerializer, ProgressSerializer, PaymentSerializer
+    QuestionSerializer, QuestionListSerializer, SubmissionSerializer, ProgressSerializer,
+    PaymentSerializer, UploadSessionSerializer, SimilarSubmissionPairSerializer
+)
+from .funnel import record_lesson_completion
+from .grading import (
+    get_answer_key, encode_answers, grade, build_review, pack_answers, unpack_answers
+)
+from .attempts import release_attempt, reserve_attempt
+from .item_analysis import get_item_statistics, record_attempt, summarize
+from .sampling import new_seed, select_questions
+from .delivery import get_quiz_payload, merge_user_fields
+from .progress import record_quiz_progress, update_enrollment_progress
+from .exams import attempt_deadline, exam_window_error, get_enrollment_id, is_exam
+from .storage import CAS_PREFIX, content_storage
+from .archives import stream_submissions_zip
+from .media import (
+    check_package_token, check_playback_token, check_submission_token, package_token, playback_token,
+    serve_file, submission_token
+)
+from .packages import package_storage, read_manifest, schedule_package
+from .thumbnails import find_source, schedule_variants, variant_name, variant_storage
+from .similarity import scan_assignment
+from .autograder import queue_assignment
+from .tasks import submit_task
+from .exports import FORMATS as EXPORT_FORMATS, enrollment_rows, gradebook_rows, streaming_export
+from .uploads import (
+    ChecksumMismatch, UploadBusy, advance_session, complete_session, create_session,
+    discard_session, open_partial, parse_checksum, save_submission, write_chunk
 )
 from enrollments.models import Enrollment
 from users.permissions import IsInstructor, IsAdmin, IsInstructorOrAdmin
 
 
+# Upper bound on entries accepted by SubmissionViewSet.bulk_grade
+BULK_GRADE_MAX_ENTRIES = 1000
+
+
+def _is_truthy(value):
+    """Interpret a request flag such as ?review=true."""
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def _submission_error(user, assignment):
+    """Return a 403 response unless the user is a student enrolled in the assignment's course."""
+    if not user.is_student() or not Enrollment.objects.filter(
+        student=user,
+        course_id=assignment.course_id
+    ).exists():
+        return Response({
+            'error': 'Only students enrolled in the course can submit this assignment'
+        }, status=status.HTTP_403_FORBIDDEN)
+    return None
+
+
 # Category Views
 class CategoryListView(generics.ListAPIView):
     """List all categories."""
@@ -328,6 +387,105 @@ def instructor_dashboard_stats(request):
     return Response(stats)
 
 
+@api_view(['GET'])
+@permission_classes([IsInstructorOrAdmin])
+def course_completion_funnel(request, course_id):
+    """Get the lesson-by-lesson completion funnel for a course."""
+    
+    courses = Course.objects.all()
+    if request.user.is_instructor():
+        courses = courses.filter(instructor=request.user)
+    
+    try:
+        course = courses.get(id=course_id)
+    except Course.DoesNotExist:
+        return Response({
+            'error': 'Course not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    enrollment_count = course.enrollments.count()
+    lessons = Lesson.objects.filter(course=course).select_related(
+        'completion_stat'
+    ).order_by('order')
+    
+    funnel = []
+    for lesson in lessons:
+        stat = getattr(lesson, 'completion_stat', None)
+        completed_count = stat.completed_count if stat else 0
+        funnel.append({
+            'lesson_id': str(lesson.id),
+            'title': lesson.title,
+            'order': lesson.order,
+            'completed_count': completed_count,
+            'completion_rate': round(
+                completed_count / enrollment_count * 100, 2
+            ) if enrollment_count else 0
+        })
+    
+    return Response({
+        'course_id': str(course.id),
+        'course_title': course.title,
+        'enrollment_count': enrollment_count,
+        'lessons': funnel
+    })
+
+
+def _export_format(request):
+    """Read the export format (?fmt=csv|ndjson); `format` is taken by DRF."""
+    fmt = request.query_params.get('fmt', 'csv').lower()
+    return fmt if fmt in EXPORT_FORMATS else None
+
+
+@api_view(['GET'])
+@permission_classes([IsInstructorOrAdmin])
+def export_course_gradebook(request, course_id):
+    """Stream a course gradebook (students x assignments x quizzes)."""
+    
+    fmt = _export_format(request)
+    if fmt is None:
+        return Response({
+            'error': 'fmt must be csv or ndjson'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    courses = Course.objects.all()
+    if request.user.is_instructor():
+        courses = courses.filter(instructor=request.user)
+    
+    try:
+        course = courses.get(id=course_id)
+    except Course.DoesNotExist:
+        return Response({
+            'error': 'Course not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    header, rows = gradebook_rows(course)
+    return streaming_export(header, rows, fmt, f'gradebook-{course.id}')
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def export_enrollments(request):
+    """Stream all enrollments, optionally for one course (?course=<id>)."""
+    
+    fmt = _export_format(request)
+    if fmt is None:
+        return Response({
+            'error': 'fmt must be csv or ndjson'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    course_id = request.query_params.get('course')
+    if course_id:
+        try:
+            course_id = uuid.UUID(course_id)
+        except ValueError:
+            return Response({
+                'error': 'Invalid course id'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    
+    header, rows = enrollment_rows(course_id)
+    return streaming_export(header, rows, fmt, 'enrollments')
+
+
 # Sprint 2 ViewSets
 
 class VideoViewSet(viewsets.ModelViewSet):
@@ -353,13 +511,29 @@ class AssignmentViewSet(viewsets.ModelViewSet):
     authentication_classes = [CustomJWTAuthentication]  # Enable JWT for checking submissions
     
     def get_queryset(self):
-        queryset = Assignment.objects.all()
+        queryset = self._filter_queryset_for_user(Assignment.objects.all())
+        
+        if self.action in ('list', 'retrieve'):
+            # Counts and the user's own submission state in one query
+            queryset = queryset.select_related('course').annotate(
+                submission_count=Count('submissions')
+            ).order_by(*Assignment._meta.ordering)
+            user = self.request.user
+            if user.is_authenticated:
+                queryset = queryset.annotate(
+                    has_submitted=Exists(Submission.objects.filter(
+                        assignment=OuterRef('pk'),
+                        student=user
+                    ))
+                )
         
+        return queryset
+    
+    def _filter_queryset_for_user(self, queryset):
         # Filter by course if provided as query parameter
         course_id = self.request.query_params.get('course')
         if course_id:
-            queryset = queryset.filter(course_id=course_id)
-            return queryset
+            return queryset.filter(course_id=course_id)
         
         user = self.request.user
         if not user.is_authenticated:
@@ -373,6 +547,72 @@ class AssignmentViewSet(viewsets.ModelViewSet):
             return queryset.filter(course_id__in=enrolled_courses)
         return queryset
     
+    @action(detail=True, methods=['get'], permission_classes=[IsInstructorOrAdmin], authentication_classes=[CustomJWTAuthentication])
+    def download_submissions(self, request, pk=None):
+        """Stream a ZIP of every file submitted to this assignment (?compress=true to deflate)."""
+        assignment = self.get_object()
+        
+        if request.user.is_instructor() and assignment.course.instructor_id != request.user.id:
+            return Response({
+                'error': 'You can only download submissions for your own courses'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        response = StreamingHttpResponse(
+            stream_submissions_zip(assignment, _is_truthy(request.query_params.get('compress'))),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="submissions-{assignment.id}.zip"'
+        response['Cache-Control'] = 'no-store'
+        return response
+    
+    @action(detail=True, methods=['post'], permission_classes=[IsInstructorOrAdmin], authentication_classes=[CustomJWTAuthentication])
+    def autograde(self, request, pk=None):
+        """Queue every submission of this assignment for the autograder (regrades graded ones)."""
+        assignment = self.get_object()
+        
+        if request.user.is_instructor() and assignment.course.instructor_id != request.user.id:
+            return Response({
+                'error': 'You can only grade submissions for your own courses'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        if not assignment.test_harness:
+            return Response({
+                'error': 'This assignment has no test harness'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'message': 'Submissions queued for automatic grading',
+            'queued': queue_assignment(assignment)
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['get', 'post'], permission_classes=[IsInstructorOrAdmin], authentication_classes=[CustomJWTAuthentication])
+    def similarity(self, request, pk=None):
+        """List suspected near-duplicate submissions; POST schedules a full rescan."""
+        assignment = self.get_object()
+        
+        if request.user.is_instructor() and assignment.course.instructor_id != request.user.id:
+            return Response({
+                'error': 'You can only check submissions for your own courses'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        if request.method == 'POST':
+            if not submit_task(scan_assignment, assignment, rescan=_is_truthy(request.data.get('rescan'))):
+                return Response({
+                    'error': 'Too many background tasks queued, try again later'
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            return Response({
+                'message': 'Similarity scan scheduled'
+            }, status=status.HTTP_202_ACCEPTED)
+        
+        pairs = SimilarSubmissionPair.objects.filter(
+            assignment=assignment
+        ).select_related('first__student', 'second__student')
+        serializer = SimilarSubmissionPairSerializer(pairs, many=True)
+        return Response({
+            'threshold': settings.SIMILARITY_THRESHOLD,
+            'pairs': serializer.data
+        })
+    
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny], authentication_classes=[CustomJWTAuthentication])
     def submit(self, request, pk=None):
         """Submit an assignment."""
@@ -386,11 +626,9 @@ class AssignmentViewSet(viewsets.ModelViewSet):
                 'error': 'Authentication required'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Check if already submitted
-        existing_submission = Submission.objects.filter(
-            assignment=assignment,
-            student=request.user
-        ).first()
+        error = _submission_error(request.user, assignment)
+        if error:
+            return error
         
         file_url = request.FILES.get('file')
         if not file_url:
@@ -398,32 +636,14 @@ class AssignmentViewSet(viewsets.ModelViewSet):
                 'error': 'No file provided'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Check deadline
-        is_late = timezone.now() > assignment.deadline
-        submission_status = 'LATE' if is_late else 'PENDING'
-        
-        if existing_submission:
-            # Update existing submission (resubmission)
-            existing_submission.file_url = file_url
-            existing_submission.status = submission_status
-            existing_submission.grade = None  # Reset grade for regrading
-            existing_submission.feedback = ''  # Reset feedback (use empty string, not None)
-            existing_submission.graded_at = None  # Reset graded_at
-            existing_submission.save()
-            
-            serializer = SubmissionSerializer(existing_submission)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        
-        # Create new submission
-        submission = Submission.objects.create(
-            assignment=assignment,
-            student=request.user,
-            file_url=file_url,
-            status=submission_status
-        )
+        # Create the submission, or replace an existing one for regrading
+        submission, created = save_submission(assignment, request.user, file_url)
         
         serializer = SubmissionSerializer(submission)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
     
     @action(detail=True, methods=['get'], permission_classes=[permissions.AllowAny], authentication_classes=[CustomJWTAuthentication])
     def my_submission(self, request, pk=None):
@@ -502,6 +722,90 @@ class SubmissionViewSet(viewsets.ModelViewSet):
         
         serializer = SubmissionSerializer(submission)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['post'], permission_classes=[IsInstructor], authentication_classes=[CustomJWTAuthentication])
+    def bulk_grade(self, request):
+        """Grade many submissions at once.
+        
+        Expects {"grades": [{"submission": id, "grade": n, "feedback": "..."}]}.
+        Valid entries are applied together; the rest are reported per row.
+        """
+        entries = request.data.get('grades')
+        if not isinstance(entries, list) or not entries:
+            return Response({
+                'error': 'grades must be a non-empty list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(entries) > BULK_GRADE_MAX_ENTRIES:
+            return Response({
+                'error': f'At most {BULK_GRADE_MAX_ENTRIES} grades can be submitted at once'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        errors = []
+        requested = {}
+        for index, entry in enumerate(entries):
+            submission_id = entry.get('submission') if isinstance(entry, dict) else None
+            try:
+                submission_id = uuid.UUID(str(submission_id))
+            except ValueError:
+                errors.append({'index': index, 'submission': submission_id, 'error': 'Invalid submission id'})
+                continue
+            if submission_id in requested:
+                errors.append({'index': index, 'submission': str(submission_id), 'error': 'Duplicate submission'})
+                continue
+            requested[submission_id] = (index, entry)
+        
+        # Ownership and max_score for every row in one joined query
+        submissions = {
+            submission.id: submission
+            for submission in Submission.objects.filter(
+                id__in=requested,
+                assignment__course__instructor=request.user
+            ).select_related('assignment').only(
+                'id', 'grade', 'feedback', 'status', 'graded_at', 'updated_at',
+                'assignment__max_score'
+            )
+        }
+        
+        now = timezone.now()
+        graded = []
+        for submission_id, (index, entry) in requested.items():
+            submission = submissions.get(submission_id)
+            if submission is None:
+                errors.append({'index': index, 'submission': str(submission_id), 'error': 'Submission not found'})
+                continue
+            
+            max_score = submission.assignment.max_score
+            try:
+                grade = int(entry.get('grade'))
+                if grade < 0 or grade > max_score:
+                    raise ValueError()
+            except (ValueError, TypeError):
+                errors.append({
+                    'index': index,
+                    'submission': str(submission_id),
+                    'error': f'Grade must be between 0 and {max_score}'
+                })
+                continue
+            
+            submission.grade = grade
+            submission.feedback = entry.get('feedback') or ''
+            submission.status = 'GRADED'
+            submission.graded_at = now
+            submission.updated_at = now
+            graded.append(submission)
+        
+        with transaction.atomic():
+            Submission.objects.bulk_update(
+                graded,
+                ['grade', 'feedback', 'status', 'graded_at', 'updated_at'],
+                batch_size=500
+            )
+        
+        errors.sort(key=lambda error: error['index'])
+        return Response({
+            'graded': len(graded),
+            'errors': errors
+        }, status=status.HTTP_200_OK if graded or not errors else status.HTTP_400_BAD_REQUEST)
 
 
 class QuizViewSet(viewsets.ModelViewSet):
@@ -517,13 +821,31 @@ class QuizViewSet(viewsets.ModelViewSet):
         return QuizSerializer
     
     def get_queryset(self):
-        queryset = Quiz.objects.all()
+        queryset = self._filter_queryset_for_user(Quiz.objects.all())
+        
+        if self.action == 'list':
+            # Question totals and the user's completion state in one query
+            queryset = queryset.select_related('course').annotate(
+                question_count=Count('questions'),
+                total_points=Sum('questions__points')
+            ).order_by(*Quiz._meta.ordering)
+            user = self.request.user
+            if user.is_authenticated:
+                queryset = queryset.annotate(
+                    has_completed=Exists(Progress.objects.filter(
+                        quiz=OuterRef('pk'),
+                        enrollment__student=user,
+                        completed=True
+                    ))
+                )
         
+        return queryset
+    
+    def _filter_queryset_for_user(self, queryset):
         # Filter by course if provided as query parameter
         course_id = self.request.query_params.get('course')
         if course_id:
-            queryset = queryset.filter(course_id=course_id)
-            return queryset
+            return queryset.filter(course_id=course_id)
         
         user = self.request.user
         if not user.is_authenticated:
@@ -535,6 +857,31 @@ class QuizViewSet(viewsets.ModelViewSet):
             return queryset.filter(course_id__in=enrolled_courses)
         return queryset
     
+    def retrieve(self, request, *args, **kwargs):
+        """Serve the cached quiz payload with the user's attempt state merged in."""
+        quiz = self.get_object()
+        payload = get_quiz_payload(quiz)
+        
+        attempts, has_completed = 0, False
+        if request.user.is_authenticated:
+            state = QuizAttemptCounter.objects.filter(
+                quiz=quiz,
+                enrollment__student=request.user
+            ).annotate(
+                completed=Exists(Progress.objects.filter(
+                    enrollment_id=OuterRef('enrollment_id'),
+                    quiz_id=OuterRef('quiz_id'),
+                    completed=True
+                ))
+            ).values_list('count', 'completed').first()
+            if state:
+                attempts, has_completed = state
+        
+        return HttpResponse(
+            merge_user_fields(payload, attempts=attempts, has_completed=has_completed),
+            content_type='application/json'
+        )
+    
     @action(detail=True, methods=['get'], permission_classes=[permissions.AllowAny], authentication_classes=[])
     def attempts(self, request, pk=None):
         """Get quiz attempt count for current user."""
@@ -547,10 +894,10 @@ class QuizViewSet(viewsets.ModelViewSet):
                 'remaining': quiz.max_attempts
             })
         
-        attempts = Progress.objects.filter(
+        attempts = QuizAttemptCounter.objects.filter(
             quiz=quiz,
             enrollment__student=request.user
-        ).count()
+        ).values_list('count', flat=True).first() or 0
         
         return Response({
             'attempts': attempts,
@@ -559,123 +906,323 @@ class QuizViewSet(viewsets.ModelViewSet):
         })
     
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny], authentication_classes=[CustomJWTAuthentication])
-    def submit(self, request, pk=None):
-        """Submit quiz answers and auto-grade."""
+    def start(self, request, pk=None):
+        """Start a quiz attempt and deliver the questions drawn for it."""
         quiz = self.get_object()
-        answers = request.data.get('answers', {})
-        
-        print(f"[DEBUG] Quiz submit - answers received: {answers}")
         
-        # Require authentication
         if not request.user.is_authenticated:
             return Response({
                 'error': 'Authentication required'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Check enrollment
-        enrollment = Enrollment.objects.filter(
-            student=request.user,
-            course=quiz.course
-        ).first()
+        window_error = exam_window_error(quiz)
+        if window_error:
+            return Response({
+                'error': window_error
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        if not enrollment:
+        # Served from the pre-warmed map while an exam window is open
+        enrollment_id = get_enrollment_id(request.user.id, quiz.course_id)
+        
+        if not enrollment_id:
             return Response({
                 'error': 'You are not enrolled in this course'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Check attempts
-        attempt_count = Progress.objects.filter(
-            quiz=quiz,
-            enrollment=enrollment
-        ).count()
+        key = get_answer_key(quiz.id)
+        created = False
+        
+        with transaction.atomic():
+            # Resume an open attempt unless the quiz changed underneath it
+            attempt = self._open_attempt(enrollment_id, quiz)
+            if attempt is not None and attempt.key_version != key.version:
+                # Not the student's doing, so the attempt is not used up
+                attempt.delete()
+                release_attempt(attempt)
+                attempt = None
+            elif attempt is not None and timezone.now() > attempt_deadline(quiz, attempt):
+                self._expire_attempt(attempt)
+                attempt = None
+            
+            if attempt is None:
+                attempt_number = reserve_attempt(enrollment_id, quiz)
+                if attempt_number is None:
+                    return Response({
+                        'error': f'Maximum attempts ({quiz.max_attempts}) reached'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                
+                sampled = 0 < quiz.sample_size < len(key)
+                attempt = QuizAttempt.objects.create(
+                    enrollment_id=enrollment_id,
+                    quiz=quiz,
+                    attempt_number=attempt_number,
+                    key_version=key.version,
+                    question_count=quiz.sample_size if sampled else len(key),
+                    seed=new_seed() if sampled else None
+                )
+                created = True
+        
+        # Only the drawn questions are loaded, by primary key
+        positions = select_questions(key, attempt.question_count, attempt.seed)
+        question_ids = [key.question_ids[i] for i in positions]
+        questions = {
+            str(question.id): question
+            for question in Question.objects.filter(id__in=question_ids)
+        }
+        serializer = QuestionListSerializer(
+            [questions[qid] for qid in question_ids if qid in questions],
+            many=True
+        )
         
-        if attempt_count >= quiz.max_attempts:
+        return Response({
+            'attempt_id': str(attempt.id),
+            'attempt_number': attempt.attempt_number,
+            'started_at': attempt.started_at,
+            'deadline': attempt_deadline(quiz, attempt),
+            'question_count': attempt.question_count,
+            'questions': serializer.data
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+    
+    @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny], authentication_classes=[CustomJWTAuthentication])
+    def submit(self, request, pk=None):
+        """Submit quiz answers and auto-grade.
+        
+        Quizzes with an exam window are queued for grading and answered
+        with 202; poll `attempt_result` for the score.
+        """
+        quiz = self.get_object()
+        answers = request.data.get('answers', {})
+        
+        # Require authentication
+        if not request.user.is_authenticated:
             return Response({
-                'error': f'Maximum attempts ({quiz.max_attempts}) reached'
+                'error': 'Authentication required'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        
+        window_error = exam_window_error(quiz)
+        if window_error:
+            return Response({
+                'error': window_error
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Auto-grade
-        questions = quiz.questions.all()
-        total_points = sum(q.points for q in questions)
-        earned_points = 0
-        correct_count = 0
-        question_results = []
+        # Check enrollment
+        queued = is_exam(quiz)
+        if queued:
+            enrollment = None
+            enrollment_id = get_enrollment_id(request.user.id, quiz.course_id)
+        else:
+            enrollment = Enrollment.objects.filter(
+                student=request.user,
+                course_id=quiz.course_id
+            ).first()
+            enrollment_id = enrollment.id if enrollment else None
+        
+        if not enrollment_id:
+            return Response({
+                'error': 'You are not enrolled in this course'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        key = get_answer_key(quiz.id)
         
-        for question in questions:
-            student_answer = answers.get(str(question.id))
-            is_correct = student_answer == question.correct_answer
+        with transaction.atomic():
+            # Submit into the attempt opened by `start`, if there is one
+            attempt = self._open_attempt(enrollment_id, quiz)
             
-            if is_correct:
-                earned_points += question.points
-                correct_count += 1
+            if attempt is None:
+                if quiz.sample_size:
+                    return Response({
+                        'error': 'Start the quiz before submitting'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                
+                # Claim an attempt; the counter row stays locked until commit
+                attempt_number = reserve_attempt(enrollment_id, quiz)
+                if attempt_number is None:
+                    return Response({
+                        'error': f'Maximum attempts ({quiz.max_attempts}) reached'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                
+                attempt = QuizAttempt(
+                    enrollment_id=enrollment_id,
+                    quiz=quiz,
+                    attempt_number=attempt_number,
+                    key_version=key.version,
+                    question_count=len(key)
+                )
+            elif attempt.key_version != key.version:
+                # Not the student's doing, so the attempt is not used up
+                attempt.delete()
+                release_attempt(attempt)
+                return Response({
+                    'error': 'The quiz was changed after your attempt started. Please start again.'
+                }, status=status.HTTP_409_CONFLICT)
+            elif timezone.now() > attempt_deadline(quiz, attempt):
+                self._expire_attempt(attempt)
+                return Response({
+                    'error': 'Time is up for this attempt'
+                }, status=status.HTTP_400_BAD_REQUEST)
             
-            question_results.append({
-                'id': str(question.id),
-                'question_text': question.question_text,
-                'option_a': question.option_a,
-                'option_b': question.option_b,
-                'option_c': question.option_c,
-                'option_d': question.option_d,
-                'correct_answer': question.correct_answer,
-                'user_answer': student_answer,
-                'is_correct': is_correct,
-                'points': question.points
-            })
-        
-        # Calculate score percentage
-        score_percentage = (earned_points / total_points * 100) if total_points > 0 else 0
-        
-        # Create progress record
-        progress = Progress.objects.create(
-            enrollment=enrollment,
-            quiz=quiz,
-            completed=True,
-            completion_date=timezone.now(),
-            quiz_score=score_percentage,
-            quiz_attempts=attempt_count + 1
-        )
+            # Replay the attempt's question selection and encode against it
+            positions = select_questions(key, attempt.question_count, attempt.seed)
+            attempt_key = key if len(positions) == len(key) else key.subset(positions)
+            codes = encode_answers(attempt_key, answers)
+            attempt.answers, attempt.answered = pack_answers(codes)
+            attempt.submitted_at = timezone.now()
+            
+            if queued:
+                # Grading and progress writes happen in the queue worker; the
+                # question ids let it grade the answers if the quiz changes first
+                attempt.status = 'QUEUED'
+                attempt.question_ids = ','.join(attempt_key.question_ids)
+                attempt.save()
+                return Response({
+                    'attempt_id': str(attempt.id),
+                    'attempt_number': attempt.attempt_number,
+                    'status': attempt.status,
+                    'remaining': max(0, quiz.max_attempts - attempt.attempt_number)
+                }, status=status.HTTP_202_ACCEPTED)
+            
+            earned_points, _, _ = grade(attempt_key, codes)
+            total_points = attempt_key.total_points
+            
+            # Calculate score percentage
+            score_percentage = (earned_points / total_points * 100) if total_points > 0 else 0
+            
+            attempt.score = earned_points
+            attempt.total_points = total_points
+            attempt.percentage = round(score_percentage, 2)
+            attempt.status = 'GRADED'
+            attempt.graded_at = attempt.submitted_at
+            attempt.save()
+            
+            # Keep a single progress record per quiz with the best score
+            record_quiz_progress(enrollment_id, quiz, score_percentage, attempt.attempt_number)
         
         # Update enrollment progress
         self._update_enrollment_progress(enrollment)
         
-        return Response({
-            'score': earned_points,
-            'total_points': total_points,
-            'percentage': round(score_percentage, 2),
-            'correct_count': correct_count,
-            'passed': score_percentage >= quiz.passing_score,
-            'questions': question_results
-        }, status=status.HTTP_200_OK)
+        # Keep cached item statistics current
+        record_attempt(
+            quiz.id, key, positions, codes,
+            earned_points / total_points if total_points else 0.0,
+            attempt.graded_at
+        )
+        
+        review = _is_truthy(request.data.get('review', request.query_params.get('review')))
+        return Response(
+            self._attempt_result(quiz, attempt, attempt_key, codes, review),
+            status=status.HTTP_200_OK
+        )
     
-    def _update_enrollment_progress(self, enrollment):
-        """Recalculate and update enrollment progress."""
-        course = enrollment.course
+    @action(detail=True, methods=['get'], permission_classes=[permissions.AllowAny], authentication_classes=[CustomJWTAuthentication])
+    def attempt_result(self, request, pk=None):
+        """Get the grading status and result of a submitted attempt."""
+        quiz = self.get_object()
         
-        # Count completed lessons
-        completed_lessons = Progress.objects.filter(
-            enrollment=enrollment,
-            lesson__isnull=False,
-            completed=True
-        ).count()
+        if not request.user.is_authenticated:
+            return Response({
+                'error': 'Authentication required'
+            }, status=status.HTTP_401_UNAUTHORIZED)
         
-        # Count passed quizzes
-        passed_quizzes = Progress.objects.filter(
-            enrollment=enrollment,
-            quiz__isnull=False,
-            quiz_score__gte=F('quiz__passing_score')
-        ).count()
+        attempts = QuizAttempt.objects.filter(quiz=quiz, enrollment__student=request.user)
+        attempt_id = request.query_params.get('attempt')
+        if attempt_id:
+            try:
+                attempts = attempts.filter(id=uuid.UUID(attempt_id))
+            except ValueError:
+                return Response({
+                    'error': 'Invalid attempt id'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            attempts = attempts.exclude(status='STARTED').order_by('-attempt_number')
+        
+        attempt = attempts.first()
+        if attempt is None:
+            return Response({
+                'error': 'Attempt not found'
+            }, status=status.HTTP_404_NOT_FOUND)
         
-        # Total items
-        total_lessons = course.lessons.count()
-        total_quizzes = course.quizzes.count()
-        total_items = total_lessons + total_quizzes
+        if attempt.status != 'GRADED':
+            result = {
+                'attempt_id': str(attempt.id),
+                'attempt_number': attempt.attempt_number,
+                'status': attempt.status
+            }
+            if attempt.status == 'FAILED':
+                result['error'] = 'This attempt could not be graded'
+            return Response(result)
+        
+        # Answers can only be reviewed against the key they were graded with
+        attempt_key, codes = None, None
+        key = get_answer_key(quiz.id)
+        if key.version == attempt.key_version:
+            positions = select_questions(key, attempt.question_count, attempt.seed)
+            attempt_key = key if len(positions) == len(key) else key.subset(positions)
+            codes = unpack_answers(attempt.answers, attempt.answered, attempt.question_count)
+        
+        review = _is_truthy(request.query_params.get('review'))
+        return Response(self._attempt_result(quiz, attempt, attempt_key, codes, review))
+    
+    @action(detail=True, methods=['get'], permission_classes=[IsInstructorOrAdmin])
+    def item_analysis(self, request, pk=None):
+        """Get per-question difficulty, discrimination and option distribution."""
+        quiz = self.get_object()
         
-        if total_items > 0:
-            completed_items = completed_lessons + passed_quizzes
-            progress_percentage = (completed_items / total_items) * 100
-            enrollment.progress = round(progress_percentage, 2)
-            enrollment.completed = progress_percentage == 100
-            enrollment.save()
+        if request.user.is_instructor() and quiz.course.instructor_id != request.user.id:
+            return Response({
+                'error': 'You can only analyze quizzes in your own courses'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        key = get_answer_key(quiz.id)
+        stats = get_item_statistics(quiz.id, key)
+        
+        return Response({
+            'quiz_id': str(quiz.id),
+            'key_version': key.version,
+            'attempt_count': stats['count'],
+            'questions': summarize(key, stats)
+        })
+    
+    def _open_attempt(self, enrollment_id, quiz):
+        """Lock and return the enrollment's unsubmitted attempt, if any."""
+        return QuizAttempt.objects.select_for_update().filter(
+            enrollment_id=enrollment_id,
+            quiz=quiz,
+            status='STARTED'
+        ).order_by('-attempt_number').first()
+    
+    def _expire_attempt(self, attempt):
+        """Close an attempt whose time ran out; it keeps its attempt slot."""
+        attempt.status = 'FAILED'
+        attempt.submitted_at = timezone.now()
+        attempt.graded_at = attempt.submitted_at
+        attempt.save(update_fields=['status', 'submitted_at', 'graded_at'])
+    
+    def _attempt_result(self, quiz, attempt, attempt_key=None, codes=None, review=False):
+        """Build the result payload for a graded attempt."""
+        result = {
+            'status': attempt.status,
+            'score': attempt.score,
+            'total_points': attempt.total_points,
+            'percentage': float(attempt.percentage),
+            'correct_count': None,
+            'passed': float(attempt.percentage) >= quiz.passing_score,
+            'attempt_id': str(attempt.id),
+            'attempt_number': attempt.attempt_number,
+            'remaining': max(0, quiz.max_attempts - attempt.attempt_number)
+        }
+        
+        if attempt_key is not None:
+            _, correct_count, correct_mask = grade(attempt_key, codes)
+            result['correct_count'] = correct_count
+            # The detailed review is only built when the client asks for it
+            if review:
+                result['questions'] = build_review(attempt_key, codes, correct_mask)
+        
+        return result
+    
+    def _update_enrollment_progress(self, enrollment):
+        """Recalculate and update enrollment progress."""
+        update_enrollment_progress(enrollment)
 
 
 class QuestionViewSet(viewsets.ModelViewSet):
@@ -763,10 +1310,18 @@ class ProgressViewSet(viewsets.ModelViewSet):
             }
         )
         
+        transitioned = created
         if not created and not progress.completed:
-            progress.completed = True
+            # Conditional update so concurrent requests only count once
             progress.completion_date = timezone.now()
-            progress.save()
+            transitioned = bool(Progress.objects.filter(
+                pk=progress.pk,
+                completed=False
+            ).update(completed=True, completion_date=progress.completion_date))
+            progress.completed = True
+        
+        if transitioned:
+            record_lesson_completion(enrollment.id, lesson, 'progress')
         
         # Update enrollment progress
         self._update_enrollment_progress(enrollment)
@@ -918,3 +1473,371 @@ class PaymentViewSet(viewsets.ModelViewSet):
         
         serializer = PaymentSerializer(payment)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class UploadViewSet(viewsets.ViewSet):
+    """Resumable chunked uploads for submission files and lesson videos.
+    
+    POST creates a session, HEAD/GET report the current `Upload-Offset`,
+    PATCH writes the request body (application/offset+octet-stream) at
+    that offset and DELETE abandons the upload. The chunk that completes
+    the upload attaches the file and returns the submission or lesson.
+    """
+    
+    permission_classes = [permissions.IsAuthenticated]
+    authentication_classes = [CustomJWTAuthentication]
+    
+    def _get_session(self, request, pk):
+        return UploadSession.objects.filter(pk=pk, user=request.user).first()
+    
+    def _offset_response(self, session, data=None, status_code=status.HTTP_204_NO_CONTENT):
+        response = Response(data, status=status_code)
+        response['Upload-Offset'] = str(session.offset)
+        response['Upload-Length'] = str(session.size)
+        response['Cache-Control'] = 'no-store'
+        return response
+    
+    def create(self, request):
+        """Start an upload session."""
+        serializer = UploadSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        if data['target'] == 'LESSON_VIDEO':
+            lesson = data['lesson']
+            if (not request.user.is_instructor() or lesson.course.instructor_id != request.user.id
+                    or lesson.course.status != 'DRAFT'):
+                return Response({
+                    'error': 'You can only upload videos to lessons of your own draft courses'
+                }, status=status.HTTP_403_FORBIDDEN)
+        else:
+            error = _submission_error(request.user, data['assignment'])
+            if error:
+                return error
+        
+        session = create_session(
+            request.user,
+            data['target'],
+            data['filename'],
+            data['size'],
+            assignment=data.get('assignment') if data['target'] == 'SUBMISSION' else None,
+            lesson=data.get('lesson') if data['target'] == 'LESSON_VIDEO' else None
+        )
+        
+        response = self._offset_response(
+            session, UploadSessionSerializer(session).data, status.HTTP_201_CREATED
+        )
+        response['Location'] = request.build_absolute_uri(f'{session.id}/')
+        return response
+    
+    def retrieve(self, request, pk=None):
+        """Report how much of the upload has been received (also serves HEAD)."""
+        session = self._get_session(request, pk)
+        if session is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        return self._offset_response(
+            session, UploadSessionSerializer(session).data, status.HTTP_200_OK
+        )
+    
+    def partial_update(self, request, pk=None):
+        """Write one chunk at the current offset."""
+        if request.content_type != 'application/offset+octet-stream':
+            return Response({
+                'error': 'Chunks must be sent as application/offset+octet-stream'
+            }, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+            expected_digest = parse_checksum(request.headers.get('Upload-Checksum'))
+        except KeyError:
+            return Response({'error': 'Upload-Offset header is required'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        session = self._get_session(request, pk)
+        if session is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            # One writer per session; a concurrent PATCH is told to retry
+            with open_partial(session) as destination:
+                # Re-read under the lock, an earlier chunk may just have landed
+                session.refresh_from_db()
+                if session.status != 'ACTIVE' or session.expires_at < timezone.now():
+                    return Response({'error': 'Upload is no longer active'}, status=status.HTTP_410_GONE)
+                if offset != session.offset:
+                    return self._offset_response(
+                        session, {'error': 'Upload-Offset does not match the received length'},
+                        status.HTTP_409_CONFLICT
+                    )
+                if offset + length > session.size:
+                    return Response({
+                        'error': 'Chunk extends past the declared upload length'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                
+                try:
+                    written = write_chunk(destination, offset, request.stream, length, expected_digest)
+                except ChecksumMismatch:
+                    # 460 is the tus status for a failed chunk checksum
+                    return self._offset_response(
+                        session, {'error': 'Chunk checksum mismatch'}, 460
+                    )
+                
+                with transaction.atomic():
+                    if not advance_session(session, written):
+                        return Response({'error': 'Upload is no longer active'}, status=status.HTTP_410_GONE)
+                    if session.offset < session.size:
+                        return self._offset_response(session)
+                    result = complete_session(session)
+        except UploadBusy:
+            return Response({
+                'error': 'Another chunk is being written to this upload'
+            }, status=status.HTTP_423_LOCKED)
+        except (FileNotFoundError, UploadSession.DoesNotExist):
+            # Completed or discarded while this request was on its way
+            return Response({'error': 'Upload is no longer active'}, status=status.HTTP_410_GONE)
+        
+        if session.target == 'LESSON_VIDEO':
+            data = LessonSerializer(result).data
+        else:
+            data = SubmissionSerializer(result).data
+        return self._offset_response(session, data, status.HTTP_200_OK)
+    
+    def destroy(self, request, pk=None):
+        """Abandon an upload and delete what was received."""
+        session = self._get_session(request, pk)
+        if session is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        if session.status != 'ACTIVE':
+            return Response({'error': 'Completed uploads cannot be deleted'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        discard_session(session)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+# Content-addressed blobs never change, so clients may cache them forever
+BLOB_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+@require_safe
+def serve_blob(request, path):
+    """Serve a content-addressed course thumbnail with immutable cache headers.
+
+    Only thumbnails are public; lesson videos and submission files in the
+    same store go through token-checked views and are never served here.
+    """
+    name = f'{CAS_PREFIX}/{path}'
+    if not Course.objects.filter(thumbnail_url=name).exists():
+        raise Http404('File not found')
+    
+    digest = os.path.splitext(os.path.basename(path))[0]
+    etag = f'"{digest}"'
+    
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        try:
+            handle = content_storage.open(name, 'rb')
+        except FileNotFoundError:
+            raise Http404('File not found')
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        response = FileResponse(handle, content_type=content_type)
+    
+    response['ETag'] = etag
+    response['Cache-Control'] = BLOB_CACHE_CONTROL
+    return response
+
+
+@require_safe
+def serve_thumbnail(request, digest, variant, fmt):
+    """Serve a resized course thumbnail, scheduling it if it does not exist yet."""
+    name = variant_name(digest, variant, fmt)
+    try:
+        return serve_file(request, variant_storage, name, cache_control=BLOB_CACHE_CONTROL)
+    except FileNotFoundError:
+        pass
+    
+    source = find_source(digest)
+    if source is None:
+        raise Http404('Image not found')
+    schedule_variants(source)
+    # The original stands in until the variant is ready; never cache the redirect
+    response = HttpResponseRedirect(content_storage.url(source))
+    response['Cache-Control'] = 'no-store'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def lesson_playback(request, lesson_id):
+    """Issue a short-lived, seekable URL for a lesson video after checking access once."""
+    try:
+        lesson = Lesson.objects.select_related('course').get(id=lesson_id)
+    except Lesson.DoesNotExist:
+        return Response({
+            'error': 'Lesson not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if lesson.media_type != 'VIDEO' or not lesson.video_url:
+        return Response({
+            'error': 'This lesson has no uploaded video'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    user = request.user
+    allowed = (
+        user.is_admin()
+        or lesson.course.instructor_id == user.id
+        or Enrollment.objects.filter(student=user, course_id=lesson.course_id).exists()
+    )
+    if not allowed:
+        return Response({
+            'error': 'You must be enrolled in this course to watch its videos'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    url = reverse('lesson-media', kwargs={'lesson_id': lesson.id})
+    return Response({
+        'url': request.build_absolute_uri(f'{url}?token={playback_token(lesson.id, user.id)}'),
+        'expires_in': settings.MEDIA_PLAYBACK_TOKEN_MAX_AGE
+    })
+
+
+@require_safe
+def serve_lesson_media(request, lesson_id):
+    """Stream a lesson video with range requests, authorised by a playback token."""
+    if not check_playback_token(request.GET.get('token', ''), lesson_id):
+        return HttpResponse('Invalid or expired playback token', status=403, content_type='text/plain')
+    
+    name = Lesson.objects.filter(id=lesson_id).values_list('video_url', flat=True).first()
+    if not name:
+        raise Http404('Video not found')
+    try:
+        return serve_file(request, Lesson._meta.get_field('video_url').storage, name)
+    except FileNotFoundError:
+        raise Http404('Video not found')
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def submission_file(request, submission_id):
+    """Issue a short-lived download URL for a submission's file after checking access once."""
+    submission = Submission.objects.select_related('assignment__course').filter(id=submission_id).first()
+    if submission is None:
+        return Response({
+            'error': 'Submission not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if not submission.file_url:
+        return Response({
+            'error': 'This submission has no file'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    user = request.user
+    allowed = (
+        user.is_admin()
+        or submission.student_id == user.id
+        or submission.assignment.course.instructor_id == user.id
+    )
+    if not allowed:
+        return Response({
+            'error': 'You do not have access to this submission'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    url = reverse('submission-file-download', kwargs={'submission_id': submission.id})
+    return Response({
+        'url': request.build_absolute_uri(f'{url}?token={submission_token(submission.id, user.id)}'),
+        'expires_in': settings.MEDIA_PLAYBACK_TOKEN_MAX_AGE
+    })
+
+
+@require_safe
+def serve_submission_file(request, submission_id):
+    """Send a submission's file with range requests, authorised by a submission token."""
+    if not check_submission_token(request.GET.get('token', ''), submission_id):
+        return HttpResponse('Invalid or expired download token', status=403, content_type='text/plain')
+    
+    name = Submission.objects.filter(id=submission_id).values_list('file_url', flat=True).first()
+    if not name:
+        raise Http404('File not found')
+    try:
+        return serve_file(
+            request,
+            Submission._meta.get_field('file_url').storage,
+            name,
+            cache_control='private, no-store',
+            filename=os.path.basename(name)
+        )
+    except FileNotFoundError:
+        raise Http404('File not found')
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def course_package(request, course_id):
+    """Describe a course's offline package and issue a resumable download URL."""
+    try:
+        course = Course.objects.get(id=course_id)
+    except Course.DoesNotExist:
+        return Response({
+            'error': 'Course not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    user = request.user
+    allowed = (
+        user.is_admin()
+        or course.instructor_id == user.id
+        or Enrollment.objects.filter(student=user, course_id=course.id).exists()
+    )
+    if not allowed:
+        return Response({
+            'error': 'You must be enrolled in this course to download it'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    if course.status != 'APPROVED':
+        return Response({
+            'error': 'Only approved courses can be downloaded'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    package = CoursePackage.objects.filter(course=course).first()
+    manifest = read_manifest(package) if package else None
+    if manifest is None:
+        # Packages are only built in the background; clients poll until ready
+        if not schedule_package(course.id):
+            return Response({
+                'error': 'Too many background tasks queued, try again later'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({
+            'status': 'building'
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    url = reverse('course-package-download', kwargs={'course_id': course.id})
+    return Response({
+        'status': 'ready',
+        'version': package.version,
+        'size': package.size,
+        'built_at': package.built_at,
+        'manifest': manifest,
+        'url': request.build_absolute_uri(f'{url}?token={package_token(course.id, user.id)}'),
+        'expires_in': settings.COURSE_PACKAGE_TOKEN_MAX_AGE
+    })
+
+
+@require_safe
+def serve_course_package(request, course_id):
+    """Send a course's offline package with range requests, authorised by a package token."""
+    if not check_package_token(request.GET.get('token', ''), course_id):
+        return HttpResponse('Invalid or expired download token', status=403, content_type='text/plain')
+    
+    package = CoursePackage.objects.filter(course_id=course_id, course__status='APPROVED').first()
+    if package is None:
+        raise Http404('Package not found')
+    try:
+        return serve_file(
+            request,
+            package_storage,
+            package.file_name,
+            filename=f'course-{course_id}-{package.version[:12]}.tar'
+        )
+    except FileNotFoundError:
+        raise Http404('Package not found')
@@ -14,6 +14,7 @@ from .serializers import (
 from users.permissions import IsStudent
 from users.authentication import JWTAuthentication as CustomJWTAuthentication
 from courses.models import Course
+from courses.funnel import record_lesson_completion, revert_lesson_completion
 
 
 class MockPaymentView(APIView):
@@ -178,13 +179,24 @@ class LessonProgressUpdateView(APIView):
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
-        serializer.save()
+        # Claim completion transitions with a conditional update so the
+        # funnel counter is only touched once per transition
+        completed = serializer.validated_data.pop('completed', None)
+        if completed is not None and completed != lesson_progress.completed:
+            completed_at = timezone.now() if completed else None
+            transitioned = LessonProgress.objects.filter(
+                pk=lesson_progress.pk,
+                completed=not completed
+            ).update(completed=completed, completed_at=completed_at)
+            lesson_progress.completed = completed
+            lesson_progress.completed_at = completed_at
+            if transitioned:
+                if completed:
+                    record_lesson_completion(enrollment.id, lesson_progress.lesson, 'lesson_progress')
+                else:
+                    revert_lesson_completion(enrollment.id, lesson_progress.lesson, 'lesson_progress')
         
-        # Mark as completed if indicated
-        if request.data.get('completed') and not lesson_progress.completed:
-            lesson_progress.completed = True
-            lesson_progress.completed_at = timezone.now()
-            lesson_progress.save()
+        serializer.save()
         
         # Update overall enrollment progress
         total_lessons = enrollment.course.lessons.count()
@@ -9,3 +9,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skillsphere.settings')
 
 application = get_asgi_application()
+
+from courses.deadlines import start_scheduler  # noqa: E402
+
+start_scheduler()
@@ -124,6 +124,19 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 # Media files
 MEDIA_URL = os.getenv('MEDIA_URL', '/media/')
 MEDIA_ROOT = BASE_DIR / os.getenv('MEDIA_ROOT', 'media')
+# Files that are never served, such as autograder test harnesses; keep it
+# outside MEDIA_ROOT and anything the web server exposes
+PRIVATE_MEDIA_ROOT = BASE_DIR / os.getenv('PRIVATE_MEDIA_ROOT', 'private_media')
+
+# Cache
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. Redis or memcached) when running more than one worker.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'skillsphere'),
+    }
+}
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -183,10 +196,109 @@ JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', SECRET_KEY)
 JWT_ALGORITHM = os.getenv('JWT_ALGORITHM', 'HS256')
 JWT_ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv('JWT_ACCESS_TOKEN_EXPIRE_MINUTES', 30))
 JWT_REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv('JWT_REFRESH_TOKEN_EXPIRE_DAYS', 7))
+JWT_VERIFIED_CACHE_SIZE = int(os.getenv('JWT_VERIFIED_CACHE_SIZE', 10000))  # verified tokens memoized per process, 0 = off
+
+# Token Revocation Settings
+# Revocations made by another process take effect here within SYNC_SECONDS
+TOKEN_REVOCATION_SYNC_SECONDS = int(os.getenv('TOKEN_REVOCATION_SYNC_SECONDS', 15))
+TOKEN_REVOCATION_REBUILD_SECONDS = int(os.getenv('TOKEN_REVOCATION_REBUILD_SECONDS', 3600))  # drops expired revocations
+TOKEN_REVOCATION_FALSE_POSITIVE_RATE = float(os.getenv('TOKEN_REVOCATION_FALSE_POSITIVE_RATE', 0.001))  # Bloom filter hits checked in the database
+
+# Password Reset Settings
+PASSWORD_RESET_TOKEN_EXPIRE_MINUTES = int(os.getenv('PASSWORD_RESET_TOKEN_EXPIRE_MINUTES', 60))
+PASSWORD_RESET_PURGE_BATCH_SIZE = int(os.getenv('PASSWORD_RESET_PURGE_BATCH_SIZE', 1000))  # rows per delete statement
+
+# Password Hashing Settings
+# With ASYNC_AUTH_VIEWS on, login, registration and password change are async
+# views that hash on a bounded thread pool; serve through skillsphere/asgi.py
+ASYNC_AUTH_VIEWS = os.getenv('ASYNC_AUTH_VIEWS', 'False') == 'True'
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 0))  # threads, 0 = one per CPU
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv('PASSWORD_HASH_QUEUE_SIZE', 64))  # further sign-ins get 503
+
+# Authentication User Cache Settings
+# Each process keeps recently seen users for LOCAL_TTL seconds in front of
+# the shared cache; changes made by another process show up after that.
+# This needs a CACHE_BACKEND shared by all workers: with LocMemCache the
+# shared timeout is capped at LOCAL_TTL and `manage.py check` warns
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', 300))  # 5 minutes in the shared cache
+USER_CACHE_LOCAL_TTL = int(os.getenv('USER_CACHE_LOCAL_TTL', 30))
+USER_CACHE_LOCAL_SIZE = int(os.getenv('USER_CACHE_LOCAL_SIZE', 10000))  # users per process
 
 # Frontend URL
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:3000')
 
 # File Upload Settings
-FILE_UPLOAD_MAX_MEMORY_SIZE = 104857600  # 100MB
-DATA_UPLOAD_MAX_MEMORY_SIZE = 104857600  # 100MB
+# Larger multipart files spill to temporary files instead of worker memory;
+# big files should go through the resumable upload API
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5MB
+
+# Uploaded files are stored once per distinct content under media/cas/.
+# Only course thumbnails are served from there publicly (by Django); the web
+# server must not expose media/cas/ itself, or videos and submissions leak
+CONTENT_ADDRESSED_UPLOADS = os.getenv('CONTENT_ADDRESSED_UPLOADS', 'True') == 'True'
+CONTENT_ADDRESSED_SWEEP_GRACE_SECONDS = int(os.getenv('CONTENT_ADDRESSED_SWEEP_GRACE_SECONDS', 3600))  # 1 hour
+THUMBNAIL_FAILURE_TIMEOUT = int(os.getenv('THUMBNAIL_FAILURE_TIMEOUT', 3600))  # images that could not be resized are retried after this
+
+# Protected Media Settings
+# Set MEDIA_SENDFILE_BACKEND to 'x-accel-redirect' behind nginx, with an
+# internal location (e.g. `location /protected-media/ { internal; alias <MEDIA_ROOT>/; }`),
+# or to 'x-sendfile' behind Apache/lighttpd; empty serves files from Django
+MEDIA_SENDFILE_BACKEND = os.getenv('MEDIA_SENDFILE_BACKEND', '')
+MEDIA_ACCEL_REDIRECT_LOCATION = os.getenv('MEDIA_ACCEL_REDIRECT_LOCATION', '/protected-media/')
+MEDIA_PLAYBACK_TOKEN_MAX_AGE = int(os.getenv('MEDIA_PLAYBACK_TOKEN_MAX_AGE', 21600))  # 6 hours
+COURSE_PACKAGE_TOKEN_MAX_AGE = int(os.getenv('COURSE_PACKAGE_TOKEN_MAX_AGE', 86400))  # long enough to resume offline downloads
+
+# Resumable Upload Settings
+# Partial files must live on the same filesystem as MEDIA_ROOT so completed
+# uploads can be moved into place with a rename
+CHUNKED_UPLOAD_DIR = MEDIA_ROOT / 'uploads' / 'partial'
+CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv('CHUNKED_UPLOAD_MAX_SIZE', 4294967296))  # 4GB
+CHUNKED_UPLOAD_EXPIRY_HOURS = int(os.getenv('CHUNKED_UPLOAD_EXPIRY_HOURS', 24))
+
+# Quiz Settings
+QUIZ_ANSWER_KEY_CACHE_TIMEOUT = int(os.getenv('QUIZ_ANSWER_KEY_CACHE_TIMEOUT', 3600))  # 1 hour
+QUIZ_ITEM_ANALYSIS_CACHE_TIMEOUT = int(os.getenv('QUIZ_ITEM_ANALYSIS_CACHE_TIMEOUT', 86400))  # 1 day
+QUIZ_PAYLOAD_CACHE_TIMEOUT = int(os.getenv('QUIZ_PAYLOAD_CACHE_TIMEOUT', 3600))  # 1 hour
+QUIZ_SUBMISSION_GRACE_SECONDS = int(os.getenv('QUIZ_SUBMISSION_GRACE_SECONDS', 30))  # late allowance for exam submissions
+QUIZ_PREWARM_LEAD_MINUTES = int(os.getenv('QUIZ_PREWARM_LEAD_MINUTES', 15))  # warm caches this long before a window opens
+QUIZ_GRADING_BATCH_SIZE = int(os.getenv('QUIZ_GRADING_BATCH_SIZE', 500))  # queued attempts graded per batch
+
+# Background Task Settings
+BACKGROUND_TASK_WORKERS = int(os.getenv('BACKGROUND_TASK_WORKERS', 2))
+BACKGROUND_TASK_QUEUE_SIZE = int(os.getenv('BACKGROUND_TASK_QUEUE_SIZE', 100))  # further tasks are dropped
+
+# Assignment Deadline Settings
+# The scheduler runs inside each web process when AUTOSTART is on; otherwise
+# run `manage.py run_deadline_scheduler` as a separate worker
+DEADLINE_SCHEDULER_AUTOSTART = os.getenv('DEADLINE_SCHEDULER_AUTOSTART', 'False') == 'True'
+DEADLINE_SCHEDULER_WINDOW_SECONDS = int(os.getenv('DEADLINE_SCHEDULER_WINDOW_SECONDS', 300))  # events loaded per heap refill
+DEADLINE_SCHEDULER_CATCHUP_HOURS = int(os.getenv('DEADLINE_SCHEDULER_CATCHUP_HOURS', 72))  # missed events still fired on startup
+ASSIGNMENT_REMINDER_LEAD_HOURS = int(os.getenv('ASSIGNMENT_REMINDER_LEAD_HOURS', 24))
+ASSIGNMENT_REMINDER_BATCH_SIZE = int(os.getenv('ASSIGNMENT_REMINDER_BATCH_SIZE', 100))  # emails per SMTP batch
+
+# Autograder Settings
+AUTOGRADER_WORKERS = int(os.getenv('AUTOGRADER_WORKERS', 0))  # sandbox processes, 0 = one per CPU
+AUTOGRADER_BATCH_SIZE = int(os.getenv('AUTOGRADER_BATCH_SIZE', 200))  # submissions claimed per batch
+AUTOGRADER_WRITE_BATCH_SIZE = int(os.getenv('AUTOGRADER_WRITE_BATCH_SIZE', 50))  # results per bulk update
+AUTOGRADER_TIMEOUT_SECONDS = int(os.getenv('AUTOGRADER_TIMEOUT_SECONDS', 30))  # wall clock and CPU time per run
+AUTOGRADER_MEMORY_MB = int(os.getenv('AUTOGRADER_MEMORY_MB', 512))
+AUTOGRADER_FILE_SIZE_MB = int(os.getenv('AUTOGRADER_FILE_SIZE_MB', 50))  # largest file a run may write or extract
+# Runs are confined as a dedicated unprivileged uid that owns no other files;
+# the worker (`manage.py run_autograder`) must run as root to set that up,
+# and nothing is graded until AUTOGRADER_SANDBOX_UID is set
+AUTOGRADER_SANDBOX_UID = int(os.getenv('AUTOGRADER_SANDBOX_UID')) if os.getenv('AUTOGRADER_SANDBOX_UID') else None
+AUTOGRADER_SANDBOX_GID = int(os.getenv('AUTOGRADER_SANDBOX_GID', AUTOGRADER_SANDBOX_UID or 0))
+AUTOGRADER_MAX_PROCESSES = int(os.getenv('AUTOGRADER_MAX_PROCESSES', 256))  # for all concurrent runs, which share the uid
+AUTOGRADER_STALE_SECONDS = int(os.getenv('AUTOGRADER_STALE_SECONDS', 600))  # requeue runs left behind by a dead worker
+
+# Video Ingest Settings
+VIDEO_INGEST_FFPROBE = os.getenv('VIDEO_INGEST_FFPROBE', 'ffprobe')  # binary name or path
+VIDEO_INGEST_FFMPEG = os.getenv('VIDEO_INGEST_FFMPEG', 'ffmpeg')  # binary name or path
+VIDEO_INGEST_TIMEOUT_SECONDS = int(os.getenv('VIDEO_INGEST_TIMEOUT_SECONDS', 120))
+VIDEO_POSTER_WIDTH = int(os.getenv('VIDEO_POSTER_WIDTH', 640))
+
+# Submission Similarity Settings
+SIMILARITY_THRESHOLD = float(os.getenv('SIMILARITY_THRESHOLD', 0.8))  # estimated Jaccard similarity
+SIMILARITY_WORKERS = int(os.getenv('SIMILARITY_WORKERS', 0))  # processes for batch scans, 0 = one per CPU
+SIMILARITY_CHECK_ON_SUBMIT = os.getenv('SIMILARITY_CHECK_ON_SUBMIT', 'True') == 'True'
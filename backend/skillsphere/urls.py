@@ -2,15 +2,31 @@
 URL configuration for skillsphere project.
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from courses.views import serve_blob, serve_thumbnail
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/users/', include('users.urls')),
     path('api/courses/', include('courses.urls')),
     path('api/enrollments/', include('enrollments.urls')),
+    
+    # Deduplicated course thumbnails are named by content hash and served as
+    # immutable; other deduplicated uploads are only served by token-checked views
+    re_path(
+        r'^%scas/(?P<path>[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[A-Za-z0-9]+)?)$' % settings.MEDIA_URL.lstrip('/'),
+        serve_blob,
+        name='serve-blob'
+    ),
+    # Resized course thumbnails, generated on first request if missing
+    re_path(
+        r'^%sthumbs/(?P<digest>[0-9a-f]{64})/(?P<variant>card|detail|retina)\.(?P<fmt>webp|jpg)$' % settings.MEDIA_URL.lstrip('/'),
+        serve_thumbnail,
+        name='serve-thumbnail'
+    ),
 ]
 
 # Serve media files in development
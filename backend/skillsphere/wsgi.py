@@ -9,3 +9,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'skillsphere.settings')
 
 application = get_wsgi_application()
+
+from courses.deadlines import start_scheduler  # noqa: E402
+
+start_scheduler()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Session
+from .models import User, Session, PasswordResetToken, RevokedToken
 
 
 @admin.register(User)
@@ -15,7 +15,6 @@ class UserAdmin(BaseUserAdmin):
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
         ('Personal Info', {'fields': ('first_name', 'last_name', 'role')}),
-        ('Password Reset', {'fields': ('reset_token', 'reset_token_expiry')}),
         ('Permissions', {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
         ('Important dates', {'fields': ('last_login', 'created_at', 'updated_at')}),
     )
@@ -39,3 +38,24 @@ class SessionAdmin(admin.ModelAdmin):
     search_fields = ['user__email', 'session_key', 'ip_address']
     ordering = ['-last_activity']
     readonly_fields = ['session_key', 'created_at', 'last_activity']
+
+
+@admin.register(PasswordResetToken)
+class PasswordResetTokenAdmin(admin.ModelAdmin):
+    """Admin configuration for PasswordResetToken model."""
+    
+    list_display = ['user', 'created_at', 'expires_at', 'used_at']
+    search_fields = ['user__email']
+    ordering = ['-created_at']
+    readonly_fields = ['user', 'token_hash', 'created_at', 'expires_at', 'used_at']
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    """Admin configuration for RevokedToken model."""
+    
+    list_display = ['jti', 'token_type', 'user', 'revoked_at', 'expires_at']
+    list_filter = ['token_type']
+    search_fields = ['jti', 'user__email']
+    ordering = ['-revoked_at']
+    readonly_fields = ['jti', 'token_type', 'user', 'revoked_at', 'expires_at']
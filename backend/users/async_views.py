@@ -0,0 +1,185 @@
+"""Async views for login, registration and password change.
+
+They answer exactly like LoginView, RegisterView and PasswordChangeView,
+but run the password hashing on the bounded pool in `hashing`, so under
+ASGI (skillsphere/asgi.py) a burst of sign-ins no longer ties up a
+request thread for every PBKDF2 run. When the pool is full they answer
+503 with Retry-After instead of queueing. DRF 3.14 has no async APIView,
+so these are plain Django async views; `urls` routes to them when
+ASYNC_AUTH_VIEWS is on.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+
+from .authentication import JWTAuthentication, generate_access_token, generate_refresh_token
+from .hashing import HashingBusy, hash_password, schedule_rehash, verify_password
+from .models import User
+from .serializers import (
+    UserSerializer, UserRegistrationSerializer, UserLoginSerializer, PasswordChangeSerializer
+)
+
+RETRY_AFTER_SECONDS = 2
+
+
+def _request_data(request):
+    """The JSON or form body, or None if the JSON cannot be parsed."""
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+    return request.POST
+
+
+def _parse_error():
+    return JsonResponse({'detail': 'JSON parse error'}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _busy():
+    response = JsonResponse({
+        'error': 'Too many sign-in requests, try again shortly'
+    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = str(RETRY_AFTER_SECONDS)
+    return response
+
+
+@csrf_exempt
+@require_POST
+async def login(request):
+    """Handle user login."""
+    data = _request_data(request)
+    if data is None:
+        return _parse_error()
+    serializer = UserLoginSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    email = serializer.validated_data['email']
+    password = serializer.validated_data['password']
+    
+    user = await User.objects.filter(email=email).afirst()
+    if user is None:
+        return JsonResponse({
+            'error': 'Invalid credentials'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    try:
+        matches, upgrade = await verify_password(password, user.password)
+    except HashingBusy:
+        return _busy()
+    if not matches:
+        return JsonResponse({
+            'error': 'Invalid credentials'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    if not user.is_active:
+        return JsonResponse({
+            'error': 'Account is inactive'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+    
+    if upgrade:
+        schedule_rehash(user.id, password, user.password)
+    
+    # Generate tokens
+    access_token = generate_access_token(user)
+    refresh_token = generate_refresh_token(user)
+    
+    # Update last login
+    user.last_login = timezone.now()
+    await user.asave(update_fields=['last_login'])
+    
+    return JsonResponse({
+        'message': 'Login successful',
+        'user': UserSerializer(user).data,
+        'access_token': access_token,
+        'refresh_token': refresh_token
+    }, status=status.HTTP_200_OK)
+
+
+@csrf_exempt
+@require_POST
+async def register(request):
+    """Handle user registration."""
+    data = _request_data(request)
+    if data is None:
+        return _parse_error()
+    serializer = UserRegistrationSerializer(data=data)
+    # Validation queries the database for an existing email
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    fields = dict(serializer.validated_data)
+    fields.pop('password_confirm')
+    try:
+        encoded = await hash_password(fields.pop('password'))
+    except HashingBusy:
+        return _busy()
+    
+    # What User.objects.create_user() does, with the hash made off the loop
+    fields['email'] = User.objects.normalize_email(fields['email'])
+    user = User(password=encoded, **fields)
+    await user.asave()
+    
+    # Generate tokens
+    access_token = generate_access_token(user)
+    refresh_token = generate_refresh_token(user)
+    
+    return JsonResponse({
+        'message': 'User registered successfully',
+        'user': UserSerializer(user).data,
+        'access_token': access_token,
+        'refresh_token': refresh_token
+    }, status=status.HTTP_201_CREATED)
+
+
+@csrf_exempt
+@require_POST
+async def change_password(request):
+    """Handle password change for authenticated users."""
+    try:
+        credentials = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed as exc:
+        return JsonResponse({'detail': exc.detail}, status=status.HTTP_403_FORBIDDEN)
+    if credentials is None:
+        return JsonResponse({
+            'detail': 'Authentication credentials were not provided.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    user = credentials[0]
+    
+    data = _request_data(request)
+    if data is None:
+        return _parse_error()
+    serializer = PasswordChangeSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    old_password = serializer.validated_data['old_password']
+    new_password = serializer.validated_data['new_password']
+    
+    # The authenticated user comes from the user cache without the hash
+    encoded = await User.objects.filter(id=user.id).values_list('password', flat=True).afirst()
+    
+    try:
+        # Verify old password
+        matches, _ = await verify_password(old_password, encoded or '')
+        if not matches:
+            return JsonResponse({
+                'error': 'Current password is incorrect'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Set new password
+        user.password = await hash_password(new_password)
+    except HashingBusy:
+        return _busy()
+    await user.asave(update_fields=['password'])
+    
+    return JsonResponse({
+        'message': 'Password changed successfully'
+    }, status=status.HTTP_200_OK)
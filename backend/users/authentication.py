@@ -1,9 +1,68 @@
-"""JWT Authentication for SkillSphere."""
+"""JWT Authentication for SkillSphere.
+
+Verified access tokens are memoized per process: the same token comes
+back on every request of its 30-minute life, so its decoded payload is
+kept in an LRU (see `cache.LocalCache`) until the token's `exp`, keyed by
+a digest of the token together with the signing key and algorithm.
+Changing JWT_SECRET_KEY or JWT_ALGORITHM therefore misses every entry and
+tokens are verified against the new key. The memo only replaces the
+signature and claim checks; the revocation check (see `revocation`), the
+user lookup and its `is_active` check still run on every request.
+"""
+import hashlib
+import threading
+import time
 import jwt
 from datetime import datetime, timedelta
 from django.conf import settings
 from rest_framework import authentication, exceptions
-from .models import User
+from .cache import LocalCache, get_cached_user
+from .revocation import is_revoked, new_jti
+
+_verified_tokens = None
+_verified_tokens_lock = threading.Lock()
+
+
+def _verified_cache():
+    global _verified_tokens
+    with _verified_tokens_lock:
+        if _verified_tokens is None:
+            _verified_tokens = LocalCache(
+                settings.JWT_VERIFIED_CACHE_SIZE,
+                settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES * 60
+            )
+    return _verified_tokens
+
+
+def _token_digest(token):
+    # Bound to the key material, so entries verified under a rotated key never match
+    material = f'{settings.JWT_ALGORITHM}\0{settings.JWT_SECRET_KEY}\0{token}'
+    return hashlib.blake2b(material.encode(), digest_size=20).digest()
+
+
+def decode_access_token(token):
+    """Verify an access token and return its payload, memoized until it expires.
+
+    Raises the same `jwt` exceptions as `jwt.decode`; failures are not memoized.
+    """
+    if not settings.JWT_VERIFIED_CACHE_SIZE:
+        return jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    
+    cache = _verified_cache()
+    key = _token_digest(token)
+    payload = cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        lifetime = payload.get('exp', 0) - time.time()
+        if lifetime > 0:
+            cache.set(key, payload, ttl=lifetime)
+    return payload
+
+
+def forget_token(token):
+    """Drop a token from the memo, e.g. once it has been revoked."""
+    if settings.JWT_VERIFIED_CACHE_SIZE:
+        _verified_cache().delete(_token_digest(token))
 
 
 class JWTAuthentication(authentication.BaseAuthentication):
@@ -22,26 +81,32 @@ class JWTAuthentication(authentication.BaseAuthentication):
             if prefix.lower() != 'bearer':
                 return None
             
+            # Views that repeat this class in authentication_classes next to
+            # the default can run it twice; the result is kept on the request
+            django_request = getattr(request, '_request', request)
+            authenticated = getattr(django_request, '_jwt_authenticated', None)
+            if authenticated is not None and authenticated[1] == token:
+                return authenticated
+            
             # Decode and verify token
-            payload = jwt.decode(
-                token,
-                settings.JWT_SECRET_KEY,
-                algorithms=[settings.JWT_ALGORITHM]
-            )
+            payload = decode_access_token(token)
             
             # Get user from payload
             user_id = payload.get('user_id')
             if not user_id:
                 raise exceptions.AuthenticationFailed('Invalid token payload')
             
-            try:
-                user = User.objects.get(id=user_id)
-            except User.DoesNotExist:
+            if is_revoked(payload):
+                raise exceptions.AuthenticationFailed('Token has been revoked')
+            
+            user = get_cached_user(user_id)
+            if user is None:
                 raise exceptions.AuthenticationFailed('User not found')
             
             if not user.is_active:
                 raise exceptions.AuthenticationFailed('User is inactive')
             
+            django_request._jwt_authenticated = (user, token)
             return (user, token)
             
         except jwt.ExpiredSignatureError:
@@ -59,7 +124,8 @@ def generate_access_token(user):
         'email': user.email,
         'role': user.role,
         'exp': datetime.utcnow() + timedelta(minutes=settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES),
-        'iat': datetime.utcnow()
+        'iat': datetime.utcnow(),
+        'jti': new_jti()
     }
     
     token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
@@ -72,7 +138,8 @@ def generate_refresh_token(user):
         'user_id': str(user.id),
         'exp': datetime.utcnow() + timedelta(days=settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS),
         'iat': datetime.utcnow(),
-        'type': 'refresh'
+        'type': 'refresh',
+        'jti': new_jti()
     }
     
     token = jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
@@ -90,9 +157,11 @@ def verify_refresh_token(token):
         
         if payload.get('type') != 'refresh':
             raise jwt.InvalidTokenError('Not a refresh token')
-        
-        return payload
     except jwt.ExpiredSignatureError:
         raise exceptions.AuthenticationFailed('Refresh token has expired')
     except jwt.InvalidTokenError:
         raise exceptions.AuthenticationFailed('Invalid refresh token')
+    
+    if is_revoked(payload):
+        raise exceptions.AuthenticationFailed('Refresh token has been revoked')
+    return payload
@@ -0,0 +1,135 @@
+"""Two-level cache of the user records that authentication needs.
+
+Every authenticated request resolves the token's user. Instead of a
+database query each time, a slim record (id, email, role, is_active and
+names, plus the flags and timestamps the user serializers show) is looked
+up in a small per-process LRU first, then in the shared Django cache, and
+only then in the database. The record becomes a `User` instance whose
+other fields are deferred, so code that needs e.g. the password hash still
+loads it on access.
+
+Saving or deleting a user drops both levels in the process that made the
+change and the shared entry for everyone (see `signals`). Other worker
+processes may keep their local copy for up to USER_CACHE_LOCAL_TTL
+seconds, which bounds how long a deactivated user can still authenticate
+there.
+
+That bound needs a cache shared by all workers (Redis, Memcached, ...).
+With a per-process backend such as the default LocMemCache the "shared"
+level cannot be invalidated across processes either, so its entries are
+kept no longer than USER_CACHE_LOCAL_TTL, and `manage.py check` warns.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import User
+
+USER_CACHE_PREFIX = 'auth_user'
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+CACHED_FIELDS = (
+    'id', 'email', 'first_name', 'last_name', 'role', 'is_active', 'is_staff', 'created_at', 'updated_at'
+)
+
+
+class LocalCache:
+    """Thread-safe LRU mapping whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store `value`, expiring after `ttl` seconds (the cache's default if None)."""
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local = None
+_local_lock = threading.Lock()
+
+
+def _local_cache():
+    global _local
+    with _local_lock:
+        if _local is None:
+            _local = LocalCache(settings.USER_CACHE_LOCAL_SIZE, settings.USER_CACHE_LOCAL_TTL)
+    return _local
+
+
+def shared_cache_is_process_local():
+    """True if the default cache is not actually shared between worker processes."""
+    return settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_BACKENDS
+
+
+def _shared_timeout():
+    if shared_cache_is_process_local():
+        # Nothing could invalidate it in other processes
+        return min(settings.USER_CACHE_TIMEOUT, settings.USER_CACHE_LOCAL_TTL)
+    return settings.USER_CACHE_TIMEOUT
+
+
+def _cache_key(user_id):
+    return f'{USER_CACHE_PREFIX}:{user_id}'
+
+
+def _to_user(record):
+    # Like a row loaded with .only(CACHED_FIELDS); from_db() takes the
+    # values in model field order
+    fields = [field.attname for field in User._meta.concrete_fields if field.attname in record]
+    return User.from_db(DEFAULT_DB_ALIAS, fields, [record[field] for field in fields])
+
+
+def get_cached_user(user_id):
+    """Return the User with this id, or None if there is none."""
+    key = _cache_key(user_id)
+    local = _local_cache()
+    record = local.get(key)
+    if record is None:
+        record = cache.get(key)
+        if record is None:
+            record = User.objects.filter(id=user_id).values(*CACHED_FIELDS).first()
+            if record is None:
+                return None
+            cache.set(key, record, _shared_timeout())
+        local.set(key, record)
+    return _to_user(record)
+
+
+def invalidate_user(user_id):
+    """Forget a user's record after it changed."""
+    key = _cache_key(user_id)
+    _local_cache().delete(key)
+    cache.delete(key)
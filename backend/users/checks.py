@@ -0,0 +1,20 @@
+"""System checks for the users app."""
+from django.core.checks import Tags, Warning, register
+
+from .cache import shared_cache_is_process_local
+
+
+@register(Tags.caches)
+def check_user_cache_backend(app_configs, **kwargs):
+    """Warn when the user cache cannot reach other worker processes."""
+    if not shared_cache_is_process_local():
+        return []
+    return [Warning(
+        'The default cache backend is local to each process.',
+        hint=(
+            'Cached users are kept for at most USER_CACHE_LOCAL_TTL seconds, but a change '
+            'made in one worker is not seen by the others until then. Configure a shared '
+            'cache (CACHE_BACKEND, e.g. Redis or Memcached) when running several workers.'
+        ),
+        id='users.W001',
+    )]
@@ -0,0 +1,107 @@
+"""Password hashing on a bounded thread pool.
+
+PBKDF2 costs tens of milliseconds of CPU per call. The async
+authentication views (see `async_views`) hand it to a thread pool of
+PASSWORD_HASH_WORKERS threads (`hashlib` releases the GIL while hashing,
+so they run in parallel) and keep the event loop free for other
+requests. At most PASSWORD_HASH_QUEUE_SIZE more hashes wait for a
+thread; beyond that callers get `HashingBusy` and answer 503, so a login
+storm is shed at the door instead of queueing until clients time out.
+
+Upgrading a stored hash after a successful login (a new default hasher
+or more iterations) is deferred: the login answers first, and the rehash
+runs on the pool later if there is room, otherwise at a later login.
+"""
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+
+
+class HashingBusy(Exception):
+    """Too many password hashes are queued; the caller should retry later."""
+
+
+def pool_size():
+    return settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+
+
+def _get_executor():
+    global _executor, _slots
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=pool_size(), thread_name_prefix='password-hash')
+            _slots = threading.BoundedSemaphore(pool_size() + settings.PASSWORD_HASH_QUEUE_SIZE)
+    return _executor
+
+
+def _submit(fn, *args):
+    executor = _get_executor()
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future
+
+
+def needs_rehash(encoded):
+    """True if a stored hash should be replaced by one from the default hasher."""
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = get_hasher('default')
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def verify(raw_password, encoded):
+    """Return (matches, needs_rehash) without updating the stored hash."""
+    matches = check_password(raw_password, encoded)
+    return matches, matches and needs_rehash(encoded)
+
+
+async def verify_password(raw_password, encoded):
+    """`verify` on the hashing pool; raises HashingBusy when it is full."""
+    return await asyncio.wrap_future(_submit(verify, raw_password, encoded))
+
+
+async def hash_password(raw_password):
+    """`make_password` on the hashing pool; raises HashingBusy when it is full."""
+    return await asyncio.wrap_future(_submit(make_password, raw_password))
+
+
+def _rehash(user_id, raw_password, encoded):
+    from .models import User
+
+    try:
+        close_old_connections()
+        # Skipped if the password changed since it was checked
+        User.objects.filter(id=user_id, password=encoded).update(password=make_password(raw_password))
+    except Exception:
+        logger.exception('Deferred password rehash failed for user %s', user_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_rehash(user_id, raw_password, encoded):
+    """Upgrade a user's stored hash in the background, if the pool has room."""
+    try:
+        _submit(_rehash, user_id, raw_password, encoded)
+    except HashingBusy:
+        # The next successful login tries again
+        pass
@@ -0,0 +1,114 @@
+"""Simulate a login storm against the sync and async login views."""
+import asyncio
+import secrets
+import time
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.test import AsyncRequestFactory
+from django.test.utils import override_settings
+
+from users import async_views
+from users.authentication import generate_access_token
+from users.models import User
+from users.views import CurrentUserView, LoginView
+
+
+class Command(BaseCommand):
+    help = (
+        'Fire concurrent logins at LoginView and at the async login view, run the way the '
+        'ASGI handler runs them, and time them alongside cheap current-user requests'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--logins',
+            type=int,
+            default=200,
+            help='Logins per run, all started at once'
+        )
+        parser.add_argument(
+            '--probes',
+            type=int,
+            default=50,
+            help='Current-user requests made one after another during each run'
+        )
+    
+    def percentile(self, values, fraction):
+        if not values:
+            return 0.0
+        values = sorted(values)
+        return values[min(int(len(values) * fraction), len(values) - 1)] * 1000
+    
+    async def timed(self, view, request, latencies, statuses):
+        started = time.perf_counter()
+        # Like ASGIHandler: each request runs its sync code on a thread of its own
+        async with ThreadSensitiveContext():
+            response = await view(request)
+        latencies.append(time.perf_counter() - started)
+        statuses.append(response.status_code)
+    
+    async def storm(self, login_view, body, token, logins, probes):
+        factory = AsyncRequestFactory()
+        me_view = sync_to_async(CurrentUserView.as_view(), thread_sensitive=True)
+        login_latencies, login_statuses = [], []
+        probe_latencies, probe_statuses = [], []
+        
+        async def probe():
+            for _ in range(probes):
+                request = factory.get('/api/users/me/', headers={'Authorization': f'Bearer {token}'})
+                await self.timed(me_view, request, probe_latencies, probe_statuses)
+        
+        started = time.perf_counter()
+        await asyncio.gather(probe(), *(
+            self.timed(
+                login_view,
+                factory.post('/api/users/login/', body, content_type='application/json'),
+                login_latencies,
+                login_statuses
+            )
+            for _ in range(logins)
+        ))
+        elapsed = time.perf_counter() - started
+        return elapsed, login_latencies, login_statuses, probe_latencies
+    
+    def handle(self, *args, **options):
+        password = secrets.token_urlsafe(16)
+        user = User.objects.create(
+            email=f'bench-{secrets.token_hex(6)}@example.com',
+            password=make_password(password),
+            first_name='Bench',
+            last_name='User'
+        )
+        body = {'email': user.email, 'password': password}
+        token = generate_access_token(user)
+        sync_login = sync_to_async(LoginView.as_view(), thread_sensitive=True)
+        
+        try:
+            results = []
+            for label, view in (('sync LoginView', sync_login), ('async login', async_views.login)):
+                # Every request is admitted, so both runs do the same work
+                with override_settings(PASSWORD_HASH_QUEUE_SIZE=options['logins']):
+                    elapsed, latencies, statuses, probes = asyncio.run(
+                        self.storm(view, body, token, options['logins'], options['probes'])
+                    )
+                ok = statuses.count(200)
+                rate = ok / elapsed
+                results.append((rate, self.percentile(latencies, 0.5), self.percentile(probes, 0.95)))
+                self.stdout.write(
+                    f'{label:>15}: {ok}/{len(statuses)} ok in {elapsed:6.2f}s, {rate:7.1f} logins/s, '
+                    f'login p50 {self.percentile(latencies, 0.5):7.1f} ms '
+                    f'p95 {self.percentile(latencies, 0.95):7.1f} ms, '
+                    f'/me p50 {self.percentile(probes, 0.5):7.1f} ms '
+                    f'p95 {self.percentile(probes, 0.95):7.1f} ms'
+                )
+        finally:
+            user.delete()
+        
+        (rate_before, login_before, probe_before), (rate_after, login_after, probe_after) = results
+        self.stdout.write(self.style.SUCCESS(
+            f'Async view: login throughput {rate_after / rate_before:.1f}x, '
+            f'median login {login_before:.0f} -> {login_after:.0f} ms, '
+            f'/me p95 {probe_before:.1f} -> {probe_after:.1f} ms'
+        ))
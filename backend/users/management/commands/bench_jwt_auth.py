@@ -0,0 +1,69 @@
+"""Measure the per-request cost of JWT authentication."""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from users.authentication import JWTAuthentication, decode_access_token, generate_access_token
+from users.cache import get_cached_user
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Time token verification and JWTAuthentication.authenticate with and without the verified-token memo'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            help='User to issue the token for (default: the first active user)'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20000,
+            help='Requests per measurement'
+        )
+    
+    def time_per_call(self, fn, arguments):
+        started = time.perf_counter()
+        for argument in arguments:
+            fn(argument)
+        return (time.perf_counter() - started) / len(arguments) * 1e6
+    
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True)
+        if options['email']:
+            users = users.filter(email=options['email'])
+        user = users.first()
+        if user is None:
+            raise CommandError('No matching active user')
+        
+        iterations = options['iterations']
+        token = generate_access_token(user)
+        factory = RequestFactory()
+        authenticator = JWTAuthentication()
+        # Warm the user cache so only token handling differs between runs
+        get_cached_user(user.id)
+        
+        results = []
+        for label, cache_size in (('without memo', 0), ('with memo', 10000)):
+            with override_settings(JWT_VERIFIED_CACHE_SIZE=cache_size):
+                decode_access_token(token)
+                decode = self.time_per_call(decode_access_token, [token] * iterations)
+                # A fresh request each time, as the result is also kept per request
+                requests = [
+                    factory.get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+                    for _ in range(iterations)
+                ]
+                authenticate = self.time_per_call(authenticator.authenticate, requests)
+            results.append((decode, authenticate))
+            self.stdout.write(
+                f'{label:>12}: verify {decode:8.2f} us/request, authenticate {authenticate:8.2f} us/request'
+            )
+        
+        (decode_before, auth_before), (decode_after, auth_after) = results
+        self.stdout.write(self.style.SUCCESS(
+            f'Verification {decode_before / decode_after:.1f}x faster, '
+            f'authentication overhead {auth_before - auth_after:.2f} us/request lower'
+        ))
@@ -0,0 +1,20 @@
+"""Delete expired and used password reset tokens."""
+from django.core.management.base import BaseCommand
+
+from users.password_reset import purge_reset_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired and used password reset tokens in batches'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Rows deleted per statement (default: PASSWORD_RESET_PURGE_BATCH_SIZE)'
+        )
+    
+    def handle(self, *args, **options):
+        deleted = purge_reset_tokens(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} password reset token(s)'))
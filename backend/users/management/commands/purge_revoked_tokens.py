@@ -0,0 +1,12 @@
+"""Delete revocation records of tokens that have expired."""
+from django.core.management.base import BaseCommand
+
+from users.revocation import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete revoked token records whose tokens have expired'
+    
+    def handle(self, *args, **options):
+        deleted = purge_expired()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired revocation(s)'))
@@ -0,0 +1,31 @@
+# Generated by Django 5.0 on 2026-10-19 09:00
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('jti', models.CharField(max_length=64, unique=True)),
+                ('token_type', models.CharField(choices=[('ACCESS', 'Access'), ('REFRESH', 'Refresh')], max_length=20)),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='Expiry of the token; the row can be purged after it')),
+                ('revoked_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='revoked_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'revoked_tokens',
+                'ordering': ['-revoked_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.0 on 2026-10-19 09:01
+
+import django.db.models.deletion
+import hashlib
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def move_reset_tokens(apps, schema_editor):
+    """Keep reset links that are still valid, storing only their digest."""
+    User = apps.get_model('users', 'User')
+    PasswordResetToken = apps.get_model('users', 'PasswordResetToken')
+    PasswordResetToken.objects.bulk_create([
+        PasswordResetToken(
+            user_id=user_id,
+            token_hash=hashlib.sha256(token.encode()).hexdigest(),
+            expires_at=expiry
+        )
+        for user_id, token, expiry in User.objects.filter(
+            reset_token__isnull=False,
+            reset_token_expiry__gt=timezone.now()
+        ).exclude(reset_token='').values_list('id', 'reset_token', 'reset_token_expiry')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_revoked_tokens'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PasswordResetToken',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('token_hash', models.CharField(help_text='Hex SHA-256 of the token sent by email; the token itself is never stored', max_length=64, unique=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('used_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='password_reset_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'password_reset_tokens',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.RunPython(move_reset_tokens, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='user',
+            name='reset_token',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='reset_token_expiry',
+        ),
+    ]
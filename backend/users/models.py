@@ -46,10 +46,6 @@ class User(AbstractBaseUser, PermissionsMixin):
     last_name = models.CharField(max_length=50)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='STUDENT')
     
-    # Password reset fields
-    reset_token = models.CharField(max_length=255, blank=True, null=True)
-    reset_token_expiry = models.DateTimeField(blank=True, null=True)
-    
     # Django required fields
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -114,3 +110,61 @@ class Session(models.Model):
     def is_expired(self):
         """Check if session has expired."""
         return timezone.now() > self.expire_date
+
+
+class PasswordResetToken(models.Model):
+    """One-time password reset link, stored as a SHA-256 digest of the token."""
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='password_reset_tokens'
+    )
+    token_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text='Hex SHA-256 of the token sent by email; the token itself is never stored'
+    )
+    expires_at = models.DateTimeField(db_index=True)
+    used_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'password_reset_tokens'
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"Password reset for {self.user.email}"
+
+
+class RevokedToken(models.Model):
+    """A JWT revoked before its expiry, identified by its jti claim."""
+    
+    TOKEN_TYPE_CHOICES = [
+        ('ACCESS', 'Access'),
+        ('REFRESH', 'Refresh'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    jti = models.CharField(max_length=64, unique=True)
+    token_type = models.CharField(max_length=20, choices=TOKEN_TYPE_CHOICES)
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='revoked_tokens'
+    )
+    expires_at = models.DateTimeField(
+        db_index=True,
+        help_text='Expiry of the token; the row can be purged after it'
+    )
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    class Meta:
+        db_table = 'revoked_tokens'
+        ordering = ['-revoked_at']
+    
+    def __str__(self):
+        return f"{self.get_token_type_display()} token {self.jti}"
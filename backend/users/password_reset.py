@@ -0,0 +1,82 @@
+"""Password reset tokens.
+
+The token mailed to the user is random; only its SHA-256 digest is
+stored, in a unique index, so confirming a reset is a single indexed
+lookup and a leaked table holds no usable links. A token works once: it
+is claimed with a conditional update in the same transaction that sets
+the new password. Issuing a token discards the user's earlier ones.
+Expired and used rows are deleted in batches by
+`manage.py purge_password_reset_tokens`.
+"""
+import hashlib
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import PasswordResetToken
+
+
+class InvalidResetToken(Exception):
+    """The token is unknown, already used or expired; the message says which."""
+
+
+def token_digest(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_reset_token(user):
+    """Create a reset token for `user` and return it; only its digest is kept."""
+    token = secrets.token_urlsafe(32)
+    with transaction.atomic():
+        PasswordResetToken.objects.filter(user=user, used_at__isnull=True).delete()
+        PasswordResetToken.objects.create(
+            user=user,
+            token_hash=token_digest(token),
+            expires_at=timezone.now() + timedelta(minutes=settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES)
+        )
+    return token
+
+
+def reset_password(token, new_password):
+    """Set a new password with a reset token, using the token up.
+
+    Returns the user; raises InvalidResetToken if the token cannot be used.
+    """
+    now = timezone.now()
+    reset = PasswordResetToken.objects.select_related('user').filter(token_hash=token_digest(token)).first()
+    if reset is None or reset.used_at is not None:
+        raise InvalidResetToken('Invalid reset token')
+    if reset.expires_at <= now:
+        raise InvalidResetToken('Reset token has expired')
+
+    with transaction.atomic():
+        # Only one of several concurrent confirmations gets the token
+        claimed = PasswordResetToken.objects.filter(
+            id=reset.id,
+            used_at__isnull=True,
+            expires_at__gt=now
+        ).update(used_at=now)
+        if not claimed:
+            raise InvalidResetToken('Invalid reset token')
+        user = reset.user
+        user.set_password(new_password)
+        user.save(update_fields=['password'])
+    return user
+
+
+def purge_reset_tokens(batch_size=None, now=None):
+    """Delete expired and used tokens in batches; returns how many were deleted."""
+    batch_size = batch_size or settings.PASSWORD_RESET_PURGE_BATCH_SIZE
+    now = now or timezone.now()
+    dead = PasswordResetToken.objects.filter(Q(expires_at__lte=now) | Q(used_at__isnull=False))
+    deleted = 0
+    while True:
+        # Short deletes by primary key instead of one long-running statement
+        ids = list(dead.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += PasswordResetToken.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,162 @@
+"""Revocation of JWTs before they expire.
+
+Tokens carry a random `jti` claim. Revoking one stores its jti in the
+`RevokedToken` table until the token's own expiry. Each process keeps a
+Bloom filter of the revoked jtis, so checking a token needs no I/O unless
+the filter reports a possible match, which is then confirmed against the
+table (false positives cost one indexed query, false negatives cannot
+happen for revocations the filter has seen).
+
+The filter picks up revocations made by other processes every
+TOKEN_REVOCATION_SYNC_SECONDS by reading the rows revoked since the last
+sync, so a token revoked elsewhere keeps working in this process for at
+most that long. Bloom filters cannot forget entries; the filter is rebuilt
+from the unexpired rows every TOKEN_REVOCATION_REBUILD_SECONDS, or sooner
+once it holds more entries than it was sized for.
+"""
+import hashlib
+import math
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.utils import timezone
+
+from .models import RevokedToken
+
+MIN_CAPACITY = 1024
+# Rows committed late or stamped by a slower clock are still picked up
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+def new_jti():
+    return secrets.token_hex(16)
+
+
+class BloomFilter:
+    """Set membership with false positives, sized for `capacity` items."""
+
+    def __init__(self, capacity, false_positive_rate):
+        self.capacity = max(capacity, MIN_CAPACITY)
+        bits = -self.capacity * math.log(false_positive_rate) / math.log(2) ** 2
+        self.size = max(int(bits), 8)
+        self.hash_count = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationFilter:
+    """Per-process Bloom filter of revoked jtis, kept in step with the table."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._built = 0.0
+        self._synced = 0.0
+        self._synced_at = None
+
+    def _rebuild(self, now):
+        started = timezone.now()
+        jtis = list(RevokedToken.objects.filter(expires_at__gt=started).values_list('jti', flat=True))
+        bloom = BloomFilter(len(jtis) * 2, settings.TOKEN_REVOCATION_FALSE_POSITIVE_RATE)
+        for jti in jtis:
+            bloom.add(jti)
+        self._filter = bloom
+        self._built = self._synced = now
+        self._synced_at = started
+
+    def _sync(self, now):
+        started = timezone.now()
+        for jti in RevokedToken.objects.filter(
+            revoked_at__gte=self._synced_at - SYNC_OVERLAP,
+            expires_at__gt=started
+        ).values_list('jti', flat=True):
+            self._filter.add(jti)
+        self._synced = now
+        self._synced_at = started
+
+    def _refresh(self):
+        now = time.monotonic()
+        if (
+            self._filter is not None
+            and now - self._synced < settings.TOKEN_REVOCATION_SYNC_SECONDS
+        ):
+            return self._filter
+        with self._lock:
+            if self._filter is None or self._filter.count > self._filter.capacity or (
+                now - self._built >= settings.TOKEN_REVOCATION_REBUILD_SECONDS
+            ):
+                self._rebuild(now)
+            elif now - self._synced >= settings.TOKEN_REVOCATION_SYNC_SECONDS:
+                self._sync(now)
+            return self._filter
+
+    def might_contain(self, jti):
+        return jti in self._refresh()
+
+    def add(self, jti):
+        bloom = self._refresh()
+        with self._lock:
+            bloom.add(jti)
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+
+
+revoked = RevocationFilter()
+
+
+def is_revoked(payload):
+    """True if the token with this payload has been revoked."""
+    jti = payload.get('jti')
+    if not jti:
+        # Issued before tokens carried a jti; they expire on their own
+        return False
+    if not revoked.might_contain(jti):
+        return False
+    return RevokedToken.objects.filter(jti=jti).exists()
+
+
+def revoke(payload):
+    """Revoke the token with this (verified) payload; returns False if it cannot be revoked."""
+    jti = payload.get('jti')
+    if not jti or 'exp' not in payload:
+        return False
+    try:
+        RevokedToken.objects.create(
+            jti=jti,
+            token_type='REFRESH' if payload.get('type') == 'refresh' else 'ACCESS',
+            user_id=payload.get('user_id'),
+            expires_at=datetime.fromtimestamp(payload['exp'], tz=dt_timezone.utc)
+        )
+    except IntegrityError:
+        # Already revoked
+        pass
+    revoked.add(jti)
+    return True
+
+
+def purge_expired(now=None):
+    """Delete revocations of tokens that have expired anyway; returns how many."""
+    deleted, _ = RevokedToken.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
@@ -0,0 +1,21 @@
+"""Signal handlers for users app."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import CACHED_FIELDS, invalidate_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached authentication record when it may have changed."""
+    # e.g. the last_login update on every sign-in leaves the record as it is
+    if update_fields is not None and not set(update_fields) & set(CACHED_FIELDS):
+        return
+    invalidate_user(instance.id)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_user(sender, instance, **kwargs):
+    """Forget the cached record of a deleted user."""
+    invalidate_user(instance.id)
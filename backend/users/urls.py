@@ -1,18 +1,30 @@
 """URL configuration for users app."""
+from django.conf import settings
 from django.urls import path
+from . import async_views
 from .views import (
     RegisterView, LoginView, LogoutView, RefreshTokenView,
     CurrentUserView, PasswordResetRequestView, PasswordResetConfirmView,
     PasswordChangeView
 )
 
+if settings.ASYNC_AUTH_VIEWS:
+    # Hash passwords off the event loop when served through ASGI
+    register_view = async_views.register
+    login_view = async_views.login
+    password_change_view = async_views.change_password
+else:
+    register_view = RegisterView.as_view()
+    login_view = LoginView.as_view()
+    password_change_view = PasswordChangeView.as_view()
+
 urlpatterns = [
-    path('register/', RegisterView.as_view(), name='register'),
-    path('login/', LoginView.as_view(), name='login'),
+    path('register/', register_view, name='register'),
+    path('login/', login_view, name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('refresh/', RefreshTokenView.as_view(), name='refresh-token'),
     path('me/', CurrentUserView.as_view(), name='current-user'),
     path('password/reset/', PasswordResetRequestView.as_view(), name='password-reset-request'),
     path('password/reset/confirm/', PasswordResetConfirmView.as_view(), name='password-reset-confirm'),
-    path('password/change/', PasswordChangeView.as_view(), name='password-change'),
+    path('password/change/', password_change_view, name='password-change'),
 ]
@@ -1,6 +1,7 @@
 """Views for user authentication and management."""
 from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.contrib.auth import authenticate
@@ -8,8 +9,6 @@ from django.utils import timezone
 from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
-from datetime import timedelta
-import secrets
 
 from .models import User
 from .serializers import (
@@ -17,7 +16,12 @@ from .serializers import (
     PasswordResetRequestSerializer, PasswordResetConfirmSerializer,
     PasswordChangeSerializer
 )
-from .authentication import generate_access_token, generate_refresh_token, verify_refresh_token
+from .authentication import (
+    decode_access_token, forget_token, generate_access_token, generate_refresh_token, verify_refresh_token
+)
+from .hashing import schedule_rehash, verify
+from .password_reset import InvalidResetToken, issue_reset_token, reset_password
+from .revocation import revoke
 
 
 class RegisterView(APIView):
@@ -64,7 +68,8 @@ class LoginView(APIView):
                 'error': 'Invalid credentials'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
-        if not user.check_password(password):
+        matches, upgrade = verify(password, user.password)
+        if not matches:
             return Response({
                 'error': 'Invalid credentials'
             }, status=status.HTTP_401_UNAUTHORIZED)
@@ -74,6 +79,10 @@ class LoginView(APIView):
                 'error': 'Account is inactive'
             }, status=status.HTTP_401_UNAUTHORIZED)
         
+        if upgrade:
+            # Answer now; the stronger hash is computed in the background
+            schedule_rehash(user.id, password, user.password)
+        
         # Generate tokens
         access_token = generate_access_token(user)
         refresh_token = generate_refresh_token(user)
@@ -94,8 +103,19 @@ class LogoutView(APIView):
     """Handle user logout."""
     
     def post(self, request):
-        # In a JWT system, logout is handled client-side by removing tokens
-        # Here we can add token to a blacklist if needed
+        # Revoke the access token of this request and the refresh token, if sent
+        if request.auth:
+            revoke(decode_access_token(request.auth))
+            forget_token(request.auth)
+        
+        refresh_token = request.data.get('refresh_token')
+        if refresh_token:
+            try:
+                revoke(verify_refresh_token(refresh_token))
+            except AuthenticationFailed:
+                # Expired, revoked or invalid: nothing left to revoke
+                pass
+        
         return Response({
             'message': 'Logout successful'
         }, status=status.HTTP_200_OK)
@@ -163,10 +183,7 @@ class PasswordResetRequestView(APIView):
             user = User.objects.get(email=email)
             
             # Generate reset token
-            reset_token = secrets.token_urlsafe(32)
-            user.reset_token = reset_token
-            user.reset_token_expiry = timezone.now() + timedelta(hours=1)
-            user.save(update_fields=['reset_token', 'reset_token_expiry'])
+            reset_token = issue_reset_token(user)
             
             # Send email
             reset_url = f"{settings.FRONTEND_URL}/reset-password?token={reset_token}"
@@ -174,7 +191,10 @@ class PasswordResetRequestView(APIView):
             try:
                 send_mail(
                     subject='Password Reset Request - SkillSphere',
-                    message=f'Click the following link to reset your password: {reset_url}\n\nThis link will expire in 1 hour.',
+                    message=(
+                        f'Click the following link to reset your password: {reset_url}\n\n'
+                        f'This link will expire in {settings.PASSWORD_RESET_TOKEN_EXPIRE_MINUTES} minutes.'
+                    ),
                     from_email=settings.DEFAULT_FROM_EMAIL,
                     recipient_list=[user.email],
                     fail_silently=False,
@@ -207,28 +227,15 @@ class PasswordResetConfirmView(APIView):
         new_password = serializer.validated_data['new_password']
         
         try:
-            user = User.objects.get(reset_token=token)
-            
-            # Check if token has expired
-            if user.reset_token_expiry < timezone.now():
-                return Response({
-                    'error': 'Reset token has expired'
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Set new password
-            user.set_password(new_password)
-            user.reset_token = None
-            user.reset_token_expiry = None
-            user.save(update_fields=['password', 'reset_token', 'reset_token_expiry'])
-            
+            reset_password(token, new_password)
+        except InvalidResetToken as e:
             return Response({
-                'message': 'Password reset successful'
-            }, status=status.HTTP_200_OK)
-            
-        except User.DoesNotExist:
-            return Response({
-                'error': 'Invalid reset token'
+                'error': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            'message': 'Password reset successful'
+        }, status=status.HTTP_200_OK)
 
 
 class PasswordChangeView(APIView):
@@ -23,6 +23,7 @@ const CourseLearning = () => {
   const [currentTime, setCurrentTime] = useState(0);
   const [duration, setDuration] = useState(0);
   const [showSpeedMenu, setShowSpeedMenu] = useState(false);
+  const [playbackUrl, setPlaybackUrl] = useState(null);
   const videoRef = useRef(null);
 
   useEffect(() => {
@@ -92,6 +93,25 @@ const CourseLearning = () => {
     setPlaybackSpeed(1);
   }, [currentLesson?.id]);
 
+  // Uploaded videos are streamed through a signed, seekable playback URL
+  useEffect(() => {
+    setPlaybackUrl(null);
+    if (currentLesson?.media_type !== 'VIDEO' || !currentLesson.has_video) return;
+
+    let cancelled = false;
+    fetch(`/api/courses/lessons/${currentLesson.id}/playback/`, {
+      headers: { 'Authorization': `Bearer ${accessToken}` }
+    })
+      .then((res) => (res.ok ? res.json() : null))
+      .then((data) => {
+        if (!cancelled && data?.url) {
+          setPlaybackUrl(data.url);
+        }
+      })
+      .catch((error) => console.error('Error fetching playback URL:', error));
+    return () => { cancelled = true; };
+  }, [currentLesson?.id, accessToken]);
+
   const fetchCourseData = async () => {
     try {
       console.log('[DEBUG] fetchCourseData - accessToken:', accessToken ? 'present' : 'MISSING');
@@ -286,8 +306,8 @@ const CourseLearning = () => {
   };
 
   const getVideoUrl = (lesson) => {
-    if (lesson.media_type === 'VIDEO' && lesson.video_url) {
-      return lesson.video_url;
+    if (lesson.media_type === 'VIDEO' && lesson.has_video) {
+      return playbackUrl;
     }
     if (lesson.media_type === 'EXTERNAL' && lesson.external_link) {
       return lesson.external_link;
@@ -64,8 +64,18 @@ const TakeQuiz = () => {
 
       setQuiz(quizData);
       
-      // Get questions from quiz data if available
-      const questionsData = quizData.questions || [];
+      // Get questions from quiz data if available; quizzes drawn from a
+      // question bank or held in an exam window deliver the questions when
+      // the attempt is started
+      let questionsData = quizData.questions || [];
+      if (quizData.sample_size > 0 || quizData.window_start) {
+        const startRes = await fetch(`/api/courses/quizzes/${quizId}/start/`, {
+          method: 'POST',
+          headers: { 'Authorization': `Bearer ${accessToken}` }
+        });
+        const startData = await startRes.json();
+        questionsData = startData.questions || [];
+      }
       console.log('[DEBUG] Quiz questions received:', questionsData);
       setQuestions(Array.isArray(questionsData) ? questionsData : []);
       
@@ -88,6 +98,23 @@ const TakeQuiz = () => {
     setAnswers(prev => ({ ...prev, [questionId]: answer }));
   };
 
+  const pollAttemptResult = async (attemptId) => {
+    for (;;) {
+      await new Promise(resolve => setTimeout(resolve, 2000));
+      const res = await fetch(
+        `/api/courses/quizzes/${quizId}/attempt_result/?attempt=${attemptId}&review=true`,
+        { headers: { 'Authorization': `Bearer ${accessToken}` } }
+      );
+      const data = await res.json();
+      if (data.status === 'FAILED') {
+        throw new Error(data.error || 'Failed to grade quiz');
+      }
+      if (data.status !== 'QUEUED') {
+        return data;
+      }
+    }
+  };
+
   const handleSubmit = async (skipConfirm = false) => {
     if (!skipConfirm) {
       setShowConfirm(true);
@@ -104,14 +131,19 @@ const TakeQuiz = () => {
           'Content-Type': 'application/json',
           'Authorization': `Bearer ${accessToken}`
         },
-        body: JSON.stringify({ answers })
+        body: JSON.stringify({ answers, review: true })
       });
 
       if (!response.ok) {
         throw new Error('Failed to submit quiz');
       }
 
-      const resultData = await response.json();
+      let resultData = await response.json();
+
+      // Exam window submissions are queued and graded in the background
+      if (response.status === 202) {
+        resultData = await pollAttemptResult(resultData.attempt_id);
+      }
       console.log('[DEBUG] Quiz result received:', resultData);
       setResult(resultData);
       